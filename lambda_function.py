@@ -127,7 +127,7 @@ def store_image_metadata(bucket_name, object_key, s3_record, labels):
                 '#processedAt': 'ProcessedAt'
             },
             ExpressionAttributeValues={
-                ':status': 'processed',
+                ':status': 'completed',
                 ':labels': labels,
                 ':labelValue': primary_label,
                 ':processedAt': datetime.now().isoformat()
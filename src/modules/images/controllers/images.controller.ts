@@ -15,11 +15,19 @@ import {
 import { FileInterceptor } from '@nestjs/platform-express';
 import { ApiTags, ApiOperation, ApiResponse, ApiConsumes, ApiBody, ApiParam, ApiQuery } from '@nestjs/swagger';
 import type { Response } from 'express';
-import { ImagesService, GetAllImagesResponseDto, SearchImagesResponseDto } from '../services/images.service';
+import {
+  ImagesService,
+  GetAllImagesResponseDto,
+  SearchImagesResponseDto,
+  GetCompletionsResponseDto,
+  GetImagesByStatusResponseDto,
+} from '../services/images.service';
 import { UploadImageDto } from '../dto/upload-image.dto';
 import { ImageUploadResponseDto } from '../dto/image-upload-response.dto';
 import { GetAllImagesDto } from '../dto/get-all-images.dto';
 import { SearchImagesDto } from '../dto/search-images.dto';
+import { GetCompletionsDto } from '../dto/get-completions.dto';
+import { GetImagesByStatusDto } from '../dto/get-images-by-status.dto';
 import { ImageResponseDto } from '../dto/image-response.dto';
 import { LabelResponseDto } from '../dto/label-response.dto';
 
@@ -81,6 +89,46 @@ export class ImagesController {
     return this.imagesService.getAllLabels(query);
   }
 
+  @Get('completions')
+  @ApiOperation({
+    summary: 'Get images whose recognition finished since a cursor',
+    description: 'Read the completions feed instead of polling each image; pass the returned cursor to the next call',
+  })
+  @ApiResponse({
+    status: HttpStatus.OK,
+    description: 'Completions retrieved successfully',
+  })
+  @ApiQuery({ name: 'since', required: false, description: 'Cursor or ISO timestamp (default: 5 minutes ago)' })
+  @ApiQuery({ name: 'limit', required: false, description: 'Maximum number of completions (default: 100, max: 100)' })
+  async getCompletions(@Query() query: GetCompletionsDto): Promise<GetCompletionsResponseDto> {
+    this.logger.log('Retrieving recent completions');
+    return this.imagesService.getCompletions(query);
+  }
+
+  @Get('status/:status')
+  @ApiOperation({
+    summary: 'Get the newest images with a status',
+    description: 'List images from the status/time index, newest first; pass the returned cursor to get the next page',
+  })
+  @ApiParam({ name: 'status', description: 'Image status, currently only completed' })
+  @ApiResponse({
+    status: HttpStatus.OK,
+    description: 'Images retrieved successfully',
+  })
+  @ApiResponse({
+    status: HttpStatus.BAD_REQUEST,
+    description: 'Status is not indexed',
+  })
+  @ApiQuery({ name: 'cursor', required: false, description: 'Cursor from the previous response' })
+  @ApiQuery({ name: 'limit', required: false, description: 'Maximum number of images (default: 10, max: 100)' })
+  async getImagesByStatus(
+    @Param('status') status: string,
+    @Query() query: GetImagesByStatusDto,
+  ): Promise<GetImagesByStatusResponseDto> {
+    this.logger.log(`Retrieving images with status: ${status}`);
+    return this.imagesService.getImagesByStatus(status, query);
+  }
+
   @Get(':id')
   @ApiOperation({
     summary: 'Get image metadata by ID',
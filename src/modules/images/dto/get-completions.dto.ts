@@ -0,0 +1,27 @@
+import { ApiPropertyOptional } from '@nestjs/swagger';
+import { IsString, IsOptional, IsInt, Min, Max } from 'class-validator';
+import { Type } from 'class-transformer';
+
+export class GetCompletionsDto {
+  @ApiPropertyOptional({
+    description: 'Cursor from the previous response, or an ISO timestamp (default: 5 minutes ago)',
+    example: '2025-09-04T12:00:00.000Z',
+  })
+  @IsOptional()
+  @IsString()
+  since?: string;
+
+  @ApiPropertyOptional({
+    description: 'Maximum number of completions',
+    example: 100,
+    minimum: 1,
+    maximum: 100,
+    default: 100,
+  })
+  @IsOptional()
+  @Type(() => Number)
+  @IsInt()
+  @Min(1)
+  @Max(100)
+  limit?: number = 100;
+}
@@ -63,4 +63,13 @@ export class ImageResponseDto {
     enum: ['uploading', 'processing', 'completed', 'failed'],
   })
   status?: string;
+
+  @ApiPropertyOptional({
+    description: 'URLs of resized copies by name, when derivatives are enabled',
+    example: {
+      thumbnail: 'https://image-bucket.s3.amazonaws.com/derivatives/thumbnail/img_1234567890123.webp',
+      preview: 'https://image-bucket.s3.amazonaws.com/derivatives/preview/img_1234567890123.webp',
+    },
+  })
+  derivatives?: Record<string, string>;
 }
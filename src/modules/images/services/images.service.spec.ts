@@ -52,6 +52,7 @@ describe('ImagesService', () => {
       uploadImage: jest.fn(),
       imageExists: jest.fn(),
       getImageUrl: jest.fn(),
+      getObjectUrl: jest.fn(),
       getImageStream: jest.fn(),
       deleteImage: jest.fn(),
     };
@@ -63,6 +64,8 @@ describe('ImagesService', () => {
       queryImagesByLabel: jest.fn(),
       getAllLabelsWithStats: jest.fn(),
       deleteImageMetadata: jest.fn(),
+      queryCompletionFeed: jest.fn(),
+      queryImagesByStatus: jest.fn(),
     };
 
     const mockConfigService = {
@@ -213,6 +216,25 @@ describe('ImagesService', () => {
       });
     });
 
+    it('should return derivative URLs when the item has derivatives', async () => {
+      const derivatives = {
+        thumbnail: { key: 'derivatives/thumbnail/img_123456789.webp', size: 5120, width: 256, height: 144 },
+      };
+      dynamoService.getAllImages.mockResolvedValue({
+        items: [{ ...mockImageEntity, derivatives }],
+        total: 1,
+        hasMore: false,
+      });
+      s3Service.getObjectUrl.mockImplementation((key: string) => `https://bucket.s3.amazonaws.com/${key}`);
+
+      const result = await service.getAllImages({});
+
+      expect(s3Service.getObjectUrl).toHaveBeenCalledWith('derivatives/thumbnail/img_123456789.webp');
+      expect(result.images[0].derivatives).toEqual({
+        thumbnail: 'https://bucket.s3.amazonaws.com/derivatives/thumbnail/img_123456789.webp',
+      });
+    });
+
     it('should handle custom pagination parameters', async () => {
       const query: GetAllImagesDto = { page: 2, limit: 5 };
       const mockResult = {
@@ -274,6 +296,17 @@ describe('ImagesService', () => {
       });
     });
 
+    it('should report images processed before the status rename as completed', async () => {
+      dynamoService.getImageMetadata.mockResolvedValue({
+        ...mockImageEntity,
+        status: 'processed' as ImageEntity['status'],
+      });
+
+      const result = await service.getImageById('img_123456789');
+
+      expect(result.status).toBe('completed');
+    });
+
     it('should throw NotFoundException when image not found', async () => {
       dynamoService.getImageMetadata.mockResolvedValue(null);
 
@@ -469,6 +502,90 @@ describe('ImagesService', () => {
     });
   });
 
+  describe('getImagesByStatus', () => {
+    it('should return images with the next cursor', async () => {
+      dynamoService.queryImagesByStatus.mockResolvedValue({
+        items: [mockImageEntity],
+        nextCursor: '2025-09-04T12:00:00.000001#img_123456789',
+      });
+
+      const result = await service.getImagesByStatus('completed', { limit: 1 });
+
+      expect(dynamoService.queryImagesByStatus).toHaveBeenCalledWith('completed', 1, undefined);
+      expect(result.images.map((image) => image.id)).toEqual(['img_123456789']);
+      expect(result.cursor).toBe('2025-09-04T12:00:00.000001#img_123456789');
+    });
+
+    it('should pass the cursor through', async () => {
+      dynamoService.queryImagesByStatus.mockResolvedValue({ items: [] });
+
+      const result = await service.getImagesByStatus('completed', { cursor: '2025-09-04T12:00:00#img_1' });
+
+      expect(dynamoService.queryImagesByStatus).toHaveBeenCalledWith('completed', 10, '2025-09-04T12:00:00#img_1');
+      expect(result).toEqual({ images: [], cursor: undefined });
+    });
+
+    it('should reject statuses that are not indexed', async () => {
+      await expect(service.getImagesByStatus('uploading', {})).rejects.toThrow(
+        new BadRequestException('Listing by status supports: completed'),
+      );
+      expect(dynamoService.queryImagesByStatus).not.toHaveBeenCalled();
+    });
+
+    it('should handle DynamoDB errors', async () => {
+      dynamoService.queryImagesByStatus.mockRejectedValue(new Error('DynamoDB error'));
+
+      await expect(service.getImagesByStatus('completed', {})).rejects.toThrow(
+        new BadRequestException('Failed to get images by status: DynamoDB error'),
+      );
+    });
+  });
+
+  describe('getCompletions', () => {
+    const completion = {
+      imageId: 'img_123456789',
+      status: 'completed' as const,
+      primaryLabel: 'Car',
+      completedAt: '2025-09-04T12:00:01.000000',
+    };
+
+    it('should return completions with the next cursor', async () => {
+      dynamoService.queryCompletionFeed.mockResolvedValue({
+        items: [completion],
+        nextCursor: '2025-09-04T12:00:01.000000#img_123456789',
+      });
+
+      const result = await service.getCompletions({ since: '2025-09-04T12:00:00', limit: 50 });
+
+      expect(dynamoService.queryCompletionFeed).toHaveBeenCalledWith('2025-09-04T12:00:00', 50);
+      expect(result).toEqual({
+        completions: [completion],
+        cursor: '2025-09-04T12:00:01.000000#img_123456789',
+      });
+    });
+
+    it('should start five minutes back without a cursor', async () => {
+      jest.useFakeTimers().setSystemTime(new Date('2025-09-04T12:05:00.000Z'));
+      dynamoService.queryCompletionFeed.mockResolvedValue({ items: [], nextCursor: '2025-09-04T12:04~' });
+
+      try {
+        await service.getCompletions({});
+      } finally {
+        jest.useRealTimers();
+      }
+
+      expect(dynamoService.queryCompletionFeed).toHaveBeenCalledWith('2025-09-04T12:00:00.000Z', 100);
+    });
+
+    it('should handle DynamoDB errors', async () => {
+      dynamoService.queryCompletionFeed.mockRejectedValue(new Error('DynamoDB error'));
+
+      await expect(service.getCompletions({})).rejects.toThrow(
+        new BadRequestException('Failed to get completions: DynamoDB error'),
+      );
+    });
+  });
+
   describe('deleteImage', () => {
     it('should delete image successfully', async () => {
       dynamoService.getImageMetadata.mockResolvedValue(mockImageEntity);
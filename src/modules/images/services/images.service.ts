@@ -8,11 +8,15 @@ import {
   ImageEntity,
   getLabelName,
   getLabelConfidence,
+  normalizeStatus,
+  CompletionFeedEntry,
 } from '../../../shared/aws/dynamodb/dynamodb.service';
 import { UploadImageDto } from '../dto/upload-image.dto';
 import { ImageUploadResponseDto } from '../dto/image-upload-response.dto';
 import { GetAllImagesDto } from '../dto/get-all-images.dto';
 import { SearchImagesDto } from '../dto/search-images.dto';
+import { GetCompletionsDto } from '../dto/get-completions.dto';
+import { GetImagesByStatusDto } from '../dto/get-images-by-status.dto';
 import { ImageResponseDto } from '../dto/image-response.dto';
 import { LabelResponseDto } from '../dto/label-response.dto';
 import { getErrorMessage } from '../../../shared/utils/error.util';
@@ -40,6 +44,22 @@ export interface SearchImagesResponseDto {
   };
 }
 
+export interface GetCompletionsResponseDto {
+  completions: CompletionFeedEntry[];
+  cursor: string;
+}
+
+export interface GetImagesByStatusResponseDto {
+  images: ImageResponseDto[];
+  cursor?: string;
+}
+
+// Statuses the recognition Lambda writes to the status/time index
+const INDEXED_STATUSES: ImageEntity['status'][] = ['completed'];
+
+// How far back a client without a cursor starts reading the completions feed
+const DEFAULT_COMPLETIONS_WINDOW_MS = 5 * 60 * 1000;
+
 @Injectable()
 export class ImagesService {
   private readonly logger = new Logger(ImagesService.name);
@@ -299,6 +319,55 @@ export class ImagesService {
     }
   }
 
+  /**
+   * Get the newest images with a status, newest first
+   */
+  async getImagesByStatus(status: string, query: GetImagesByStatusDto): Promise<GetImagesByStatusResponseDto> {
+    if (!INDEXED_STATUSES.includes(status as ImageEntity['status'])) {
+      throw new BadRequestException(`Listing by status supports: ${INDEXED_STATUSES.join(', ')}`);
+    }
+
+    try {
+      const limit = Math.min(100, Math.max(1, query.limit || 10));
+
+      this.logger.log(`Getting images with status ${status}, limit ${limit}`);
+
+      const result = await this.dynamoService.queryImagesByStatus(status as ImageEntity['status'], limit, query.cursor);
+
+      return {
+        images: result.items.map((item) => this.mapToImageResponse(item)),
+        cursor: result.nextCursor,
+      };
+    } catch (error: unknown) {
+      const errorMessage = getErrorMessage(error);
+      this.logger.error(`Failed to get images by status: ${errorMessage}`);
+      throw new BadRequestException(`Failed to get images by status: ${errorMessage}`);
+    }
+  }
+
+  /**
+   * Get images whose recognition finished since a cursor
+   */
+  async getCompletions(query: GetCompletionsDto): Promise<GetCompletionsResponseDto> {
+    try {
+      const since = query.since || new Date(Date.now() - DEFAULT_COMPLETIONS_WINDOW_MS).toISOString();
+      const limit = Math.min(100, Math.max(1, query.limit || 100));
+
+      this.logger.log(`Getting completions since ${since}`);
+
+      const result = await this.dynamoService.queryCompletionFeed(since, limit);
+
+      return {
+        completions: result.items,
+        cursor: result.nextCursor,
+      };
+    } catch (error: unknown) {
+      const errorMessage = getErrorMessage(error);
+      this.logger.error(`Failed to get completions: ${errorMessage}`);
+      throw new BadRequestException(`Failed to get completions: ${errorMessage}`);
+    }
+  }
+
   /**
    * Delete an image and its metadata
    */
@@ -348,7 +417,15 @@ export class ImagesService {
       uploadedAt: entity.uploadedAt,
       size: entity.size,
       mimeType: entity.mimeType,
-      status: entity.status,
+      status: normalizeStatus(entity.status),
+      ...(entity.derivatives && {
+        derivatives: Object.fromEntries(
+          Object.entries(entity.derivatives).map(([name, derivative]) => [
+            name,
+            this.s3Service.getObjectUrl(derivative.key),
+          ]),
+        ),
+      }),
     };
   }
 }
@@ -1,6 +1,14 @@
 import { Test, TestingModule } from '@nestjs/testing';
 import { ConfigService } from '@nestjs/config';
-import { DynamoDBService, ImageEntity, getLabelName, getLabelConfidence, isRawLabel } from './dynamodb.service';
+import {
+  DynamoDBService,
+  ImageEntity,
+  getLabelName,
+  getLabelConfidence,
+  isRawLabel,
+  decodePackedLabels,
+  withDecodedLabels,
+} from './dynamodb.service';
 import { DynamoDBClient } from '@aws-sdk/client-dynamodb';
 import { DynamoDBDocumentClient } from '@aws-sdk/lib-dynamodb';
 
@@ -105,6 +113,22 @@ describe('DynamoDBService', () => {
       expect(isRawLabel(apiLabel)).toBe(false);
       expect(isRawLabel(rawLabel)).toBe(true);
     });
+
+    it('should decode compact labels with decodePackedLabels', () => {
+      expect(decodePackedLabels('Car:9550|Vehicle:8720')).toEqual([
+        { Name: 'Car', Confidence: 95.5 },
+        { Name: 'Vehicle', Confidence: 87.2 },
+      ]);
+      expect(decodePackedLabels('')).toEqual([]);
+    });
+
+    it('should only rewrite items with compact labels in withDecodedLabels', () => {
+      const listItem = { ImageId: 'img_1', labels: [{ Name: 'Car', Confidence: 95 }] };
+      const packedItem = { ImageId: 'img_2', labelsPacked: 'Car:9500' };
+
+      expect(withDecodedLabels(listItem)).toBe(listItem);
+      expect(withDecodedLabels(packedItem)).toEqual({ ImageId: 'img_2', labels: [{ Name: 'Car', Confidence: 95 }] });
+    });
   });
 
   describe('constructor', () => {
@@ -587,6 +611,253 @@ describe('DynamoDBService', () => {
     });
   });
 
+  describe('queryImagesByStatus', () => {
+    const indexItem = (imageId: string, processedAt: string) => ({
+      ...mockImageEntity,
+      ImageId: imageId,
+      ProcessedKey: `${processedAt}#${imageId}`,
+    });
+
+    // Serves day markers (newest first, after the cursor and up to Limit) and status index items by bucket
+    const mockStatusIndex = (markedDays: string[], itemsByBucket: Record<string, any[]>) => {
+      mockDocClient.send.mockImplementation((command: { input: any }) => {
+        const { input } = command;
+        if (input.IndexName === undefined) {
+          const cursor: string | undefined = input.ExpressionAttributeValues[':cursor'];
+          const days = markedDays.filter((day) => cursor === undefined || day < cursor).sort().reverse();
+          return Promise.resolve({
+            Items: days.slice(0, input.Limit).map((day) => ({ CreatedAt: day })),
+            LastEvaluatedKey: days.length > input.Limit ? { CreatedAt: days[input.Limit - 1] } : undefined,
+          });
+        }
+        return Promise.resolve({ Items: itemsByBucket[input.ExpressionAttributeValues[':bucket']] || [] });
+      });
+    };
+
+    it('should merge all shards of a day newest first', async () => {
+      mockStatusIndex(['2025-09-04'], {
+        'completed#2025-09-04#0': [
+          indexItem('img_3', '2025-09-04T12:00:03'),
+          indexItem('img_1', '2025-09-04T12:00:01'),
+        ],
+        'completed#2025-09-04#1': [indexItem('img_2', '2025-09-04T12:00:02')],
+      });
+
+      const result = await service.queryImagesByStatus('completed', 2, '2025-09-04T23:59:59#img_9');
+
+      // One marker Query, then one per shard
+      expect(mockDocClient.send).toHaveBeenCalledTimes(5);
+      expect(mockDocClient.send).toHaveBeenCalledWith(
+        expect.objectContaining({
+          input: expect.objectContaining({
+            IndexName: 'StatusProcessedIndex',
+            KeyConditionExpression: 'StatusBucket = :bucket AND ProcessedKey < :cursor',
+            ScanIndexForward: false,
+            Limit: 2,
+          }),
+        }),
+      );
+      expect(result.items.map((item) => item.ImageId)).toEqual(['img_3', 'img_2']);
+      expect(result.nextCursor).toBe('2025-09-04T12:00:02#img_2');
+    });
+
+    it('should skip days without images', async () => {
+      mockStatusIndex(['2025-06-01', '2025-09-04'], {
+        'completed#2025-09-04#0': [indexItem('img_2', '2025-09-04T08:00:00')],
+        'completed#2025-06-01#3': [indexItem('img_1', '2025-06-01T08:00:00')],
+      });
+
+      const result = await service.queryImagesByStatus('completed', 5, '2025-09-04T10:00:00#img_3');
+
+      expect(mockDocClient.send).toHaveBeenCalledWith(
+        expect.objectContaining({
+          input: expect.objectContaining({
+            KeyConditionExpression: 'ImageId = :marker AND CreatedAt < :cursor',
+            ExpressionAttributeValues: { ':marker': 'STATUS_DAYS#completed', ':cursor': '2025-09-04T10:00:00#img_3' },
+            ScanIndexForward: false,
+          }),
+        }),
+      );
+      // Three months apart, but only the two marked days are queried
+      expect(mockDocClient.send).toHaveBeenCalledTimes(9);
+      expect(result.items.map((item) => item.ImageId)).toEqual(['img_2', 'img_1']);
+      expect(result.nextCursor).toBeUndefined();
+    });
+
+    it('should resume at the next unread day instead of stopping', async () => {
+      mockStatusIndex(['2025-01-01', '2025-01-02', '2025-01-03'], {
+        'completed#2025-01-03#0': [indexItem('img_3', '2025-01-03T08:00:00')],
+        'completed#2025-01-01#0': [indexItem('img_1', '2025-01-01T08:00:00')],
+      });
+
+      const first = await service.queryImagesByStatus('completed', 5, undefined, 2);
+
+      expect(first.items.map((item) => item.ImageId)).toEqual(['img_3']);
+      expect(first.nextCursor).toBe('2025-01-02');
+
+      const second = await service.queryImagesByStatus('completed', 5, first.nextCursor, 2);
+
+      expect(mockDocClient.send).toHaveBeenLastCalledWith(
+        expect.objectContaining({
+          input: expect.objectContaining({
+            ExpressionAttributeValues: { ':bucket': 'completed#2025-01-01#3', ':cursor': '2025-01-02' },
+          }),
+        }),
+      );
+      expect(second.items.map((item) => item.ImageId)).toEqual(['img_1']);
+      expect(second.nextCursor).toBeUndefined();
+    });
+
+    it('should handle DynamoDB query errors', async () => {
+      mockDocClient.send.mockRejectedValue(new Error('Throttled'));
+
+      await expect(service.queryImagesByStatus('completed')).rejects.toThrow('DynamoDB query failed: Throttled');
+    });
+  });
+
+  describe('queryCompletionFeed', () => {
+    const feedItem = (imageId: string, completedAt: string) => ({
+      FeedMinute: completedAt.slice(0, 16),
+      CompletedKey: `${completedAt}#${imageId}`,
+      imageId,
+      completionStatus: 'completed',
+      primaryLabel: 'Person',
+    });
+
+    beforeEach(() => {
+      jest.useFakeTimers({ now: new Date('2025-09-04T12:02:30.000Z') });
+    });
+
+    afterEach(() => {
+      jest.useRealTimers();
+    });
+
+    it('should read the cursor minute with a single query', async () => {
+      mockDocClient.send.mockResolvedValue({ Items: [feedItem('img_2', '2025-09-04T12:02:10.000001')] });
+
+      const result = await service.queryCompletionFeed('2025-09-04T12:02:05.000000#img_1');
+
+      expect(mockDocClient.send).toHaveBeenCalledTimes(1);
+      expect(mockDocClient.send).toHaveBeenCalledWith(
+        expect.objectContaining({
+          input: expect.objectContaining({
+            TableName: 'image-recognition-dev-completion-feed',
+            KeyConditionExpression: 'FeedMinute = :minute AND CompletedKey BETWEEN :cursor AND :settled',
+            ExpressionAttributeValues: {
+              ':minute': '2025-09-04T12:02',
+              ':cursor': '2025-09-04T12:02:05.000000#img_1',
+              ':settled': '2025-09-04T12:02:15.000',
+            },
+          }),
+        }),
+      );
+      expect(result.items).toEqual([
+        { imageId: 'img_2', status: 'completed', primaryLabel: 'Person', completedAt: '2025-09-04T12:02:10.000001' },
+      ]);
+      expect(result.nextCursor).toBe('2025-09-04T12:02:10.000001#img_2');
+    });
+
+    it('should walk minute partitions up to now and skip finished minutes next time', async () => {
+      mockDocClient.send.mockImplementation((command: { input: any }) => {
+        const minute: string = command.input.ExpressionAttributeValues[':minute'];
+        const itemsByMinute: Record<string, any[]> = {
+          '2025-09-04T12:00': [feedItem('img_1', '2025-09-04T12:00:40.000000')],
+        };
+        return Promise.resolve({ Items: itemsByMinute[minute] || [] });
+      });
+
+      const result = await service.queryCompletionFeed('2025-09-04T12:00:00');
+
+      expect(mockDocClient.send).toHaveBeenCalledTimes(3);
+      expect(result.items.map((item) => item.imageId)).toEqual(['img_1']);
+      expect(result.nextCursor).toBe('2025-09-04T12:01~');
+    });
+
+    it('should keep a minute open until its late entries have settled', async () => {
+      jest.setSystemTime(new Date('2025-09-04T12:03:10.000Z'));
+      mockDocClient.send.mockResolvedValue({ Items: [feedItem('img_1', '2025-09-04T12:02:40.000000')] });
+
+      const result = await service.queryCompletionFeed('2025-09-04T12:02:00');
+
+      // An entry stamped 12:02:59.9 may still be written, so 12:02 is neither closed nor skipped
+      expect(mockDocClient.send).toHaveBeenCalledTimes(1);
+      expect(mockDocClient.send).toHaveBeenCalledWith(
+        expect.objectContaining({
+          input: expect.objectContaining({
+            ExpressionAttributeValues: expect.objectContaining({ ':settled': '2025-09-04T12:02:55.000' }),
+          }),
+        }),
+      );
+      expect(result.nextCursor).toBe('2025-09-04T12:02:40.000000#img_1');
+    });
+
+    it.each(['2025-09-04T12:02:00', '2025-09-04T12:02:00Z', '2025-09-04T12:02:00.000Z', '2025-09-04T14:02:00+02:00'])(
+      'should read %s as 12:02 UTC',
+      async (since) => {
+        mockDocClient.send.mockResolvedValue({ Items: [] });
+
+        await service.queryCompletionFeed(since);
+
+        expect(mockDocClient.send).toHaveBeenCalledWith(
+          expect.objectContaining({
+            input: expect.objectContaining({
+              ExpressionAttributeValues: expect.objectContaining({
+                ':minute': '2025-09-04T12:02',
+                ':cursor': '2025-09-04T12:02:00.000',
+              }),
+            }),
+          }),
+        );
+      },
+    );
+
+    it('should start after a finished minute and drop the entry at the cursor', async () => {
+      mockDocClient.send.mockResolvedValue({
+        Items: [feedItem('img_1', '2025-09-04T12:02:01.000000'), feedItem('img_2', '2025-09-04T12:02:02.000000')],
+      });
+
+      const result = await service.queryCompletionFeed('2025-09-04T12:02:01.000000#img_1');
+
+      expect(result.items.map((item) => item.imageId)).toEqual(['img_2']);
+
+      mockDocClient.send.mockClear();
+      mockDocClient.send.mockResolvedValue({ Items: [] });
+      await service.queryCompletionFeed('2025-09-04T12:01~');
+
+      expect(mockDocClient.send).toHaveBeenCalledTimes(1);
+      expect(mockDocClient.send).toHaveBeenCalledWith(
+        expect.objectContaining({
+          input: expect.objectContaining({
+            ExpressionAttributeValues: expect.objectContaining({ ':minute': '2025-09-04T12:02' }),
+          }),
+        }),
+      );
+    });
+
+    it('should reject cursors that are not timestamps', async () => {
+      await expect(service.queryCompletionFeed('yesterday')).rejects.toThrow('Invalid completions cursor: yesterday');
+      expect(mockDocClient.send).not.toHaveBeenCalled();
+    });
+
+    it('should normalize legacy statuses', async () => {
+      mockDocClient.send.mockResolvedValue({
+        Items: [{ ...feedItem('img_1', '2025-09-04T12:02:01.000000'), completionStatus: 'processed' }],
+      });
+
+      const result = await service.queryCompletionFeed('2025-09-04T12:02:00');
+
+      expect(result.items[0].status).toBe('completed');
+    });
+
+    it('should handle DynamoDB query errors', async () => {
+      mockDocClient.send.mockRejectedValue(new Error('Throttled'));
+
+      await expect(service.queryCompletionFeed('2025-09-04T12:02:00')).rejects.toThrow(
+        'DynamoDB query failed: Throttled',
+      );
+    });
+  });
+
   describe('queryImagesByLabel', () => {
     it('should search images by label', async () => {
       const mockQueryResponse = {
@@ -765,6 +1036,24 @@ describe('DynamoDBService', () => {
       );
     });
 
+    it('should aggregate list and compact labels during migration', async () => {
+      const mockItems = [
+        { ...mockImageEntity, labels: [{ Name: 'Car', Confidence: 95 }] },
+        { ImageId: 'img_2', CreatedAt: 'METADATA', labelsPacked: 'Car:9000|Tree:8500' },
+      ];
+
+      mockDocClient.send.mockResolvedValue({
+        Items: mockItems,
+      });
+
+      const result = await service.getAllLabelsWithStats(50, 1);
+
+      expect(result).toEqual([
+        { name: 'Car', count: 2, averageConfidence: 92.5 },
+        { name: 'Tree', count: 1, averageConfidence: 85 },
+      ]);
+    });
+
     it('should handle empty label collection', async () => {
       mockDocClient.send.mockResolvedValue({
         Items: [],
@@ -29,6 +29,15 @@ export interface ImageEntity {
     width: number;
     height: number;
   };
+  derivatives?: Record<string, ImageDerivative>;
+}
+
+// Resized copy written by the recognition Lambda (thumbnail, preview, ...)
+export interface ImageDerivative {
+  key: string;
+  size: number;
+  width: number;
+  height: number;
 }
 
 export interface Label {
@@ -36,6 +45,23 @@ export interface Label {
   confidence: number;
 }
 
+// Statuses written before the Lambda used the API's enum
+const LEGACY_STATUSES: Record<string, ImageEntity['status']> = {
+  processed: 'completed',
+};
+
+export function normalizeStatus(status: string): ImageEntity['status'] {
+  return LEGACY_STATUSES[status] || (status as ImageEntity['status']);
+}
+
+// Item of the recent-completions feed the recognition Lambda appends to
+export interface CompletionFeedEntry {
+  imageId: string;
+  status: ImageEntity['status'];
+  primaryLabel: string;
+  completedAt: string;
+}
+
 // Raw label format from DynamoDB/Lambda
 export interface RawLabel {
   Name: string;
@@ -65,12 +91,95 @@ export function isRawLabel(label: LabelUnion): label is RawLabel {
   return 'Name' in label && 'Confidence' in label;
 }
 
+// Compact label format from the Lambda: "Name:9912|Name:8750", confidence in hundredths
+export function decodePackedLabels(packed: string): RawLabel[] {
+  if (!packed) {
+    return [];
+  }
+
+  return packed.split('|').map((entry) => {
+    const separatorIndex = entry.lastIndexOf(':');
+    return {
+      Name: entry.slice(0, separatorIndex),
+      Confidence: parseInt(entry.slice(separatorIndex + 1), 10) / 100,
+    };
+  });
+}
+
+// Expand compact labels so callers only ever see the labels array
+export function withDecodedLabels<T extends { labels?: LabelUnion[]; labelsPacked?: string }>(item: T): T {
+  if (typeof item.labelsPacked !== 'string') {
+    return item;
+  }
+
+  const decoded = { ...item, labels: decodePackedLabels(item.labelsPacked) };
+  delete decoded.labelsPacked;
+  return decoded;
+}
+
 export interface PaginatedResult<T> {
   items: T[];
   total: number;
   hasMore: boolean;
 }
 
+export interface CursorPage<T> {
+  items: T[];
+  nextCursor?: string;
+}
+
+// Sparse index written by the recognition Lambda once an image is finalized
+const STATUS_INDEX_NAME = 'StatusProcessedIndex';
+
+type StatusIndexItem = ImageEntity & {
+  StatusBucket: string;
+  ProcessedKey: string;
+};
+
+// The Lambda marks each day it indexes images on with an image-table item (ImageId STATUS_DAYS#<status>, CreatedAt
+// YYYY-MM-DD), so a listing goes straight to the next day that has images instead of querying empty ones
+const STATUS_DAYS_PREFIX = 'STATUS_DAYS#';
+
+// The completions feed has its own table, partitioned by UTC minute (YYYY-MM-DDTHH:MM) with completedAt#imageId
+// sort keys, so the image table's Scans never read feed items
+
+// Sorts after every completedAt#imageId key of its minute, so a finished minute is never queried again
+const END_OF_MINUTE = '~';
+
+// Entries younger than this may still be in flight from the Lambda, which stamps them before writing the image item
+// and then the entry; they are returned on a later call, so a cursor never moves past an entry not written yet
+const COMPLETION_FEED_SETTLE_MS = 15 * 1000;
+
+/**
+ * Turn a completions cursor into a feed sort key: feed cursors are kept, timestamps are read as UTC
+ */
+function toFeedCursor(since: string): string {
+  if (since.includes('#') || since.endsWith(END_OF_MINUTE)) {
+    return since;
+  }
+
+  // The Lambda's keys have no zone designator, so a bare timestamp is UTC rather than the server's local time
+  const hasZone = /(Z|[+-]\d{2}:?\d{2})$/i.test(since) || !since.includes('T');
+  const time = new Date(hasZone ? since : `${since}Z`);
+  if (isNaN(time.getTime())) {
+    throw new Error(`Invalid completions cursor: ${since}`);
+  }
+  return toFeedTimestamp(time);
+}
+
+// Feed keys are UTC timestamps without the trailing Z
+function toFeedTimestamp(time: Date): string {
+  return time.toISOString().slice(0, 23);
+}
+
+interface CompletionFeedItem {
+  FeedMinute: string;
+  CompletedKey: string;
+  imageId: string;
+  completionStatus: string;
+  primaryLabel: string;
+}
+
 // Type for DynamoDB raw item response
 interface DynamoDBImageItem {
   ImageId?: string;
@@ -94,6 +203,8 @@ interface DynamoDBImageItem {
   ProcessedAt?: string;
   Status?: string;
   Labels?: Label[];
+  labelsPacked?: string;
+  derivatives?: Record<string, ImageDerivative>;
   S3Bucket?: string;
   ETag?: string;
   VersionId?: string;
@@ -107,9 +218,17 @@ export class DynamoDBService {
   private readonly dynamoClient: DynamoDBClient;
   private readonly docClient: DynamoDBDocumentClient;
   private readonly tableName: string;
+  private readonly completionFeedTableName: string;
+  private readonly statusIndexShards: number;
 
   constructor(private readonly configService: ConfigService) {
     this.tableName = this.configService.get<string>('AWS_DYNAMODB_TABLE_NAME') || 'image-recognition-dev-table';
+    this.completionFeedTableName =
+      this.configService.get<string>('COMPLETION_FEED_TABLE_NAME') || 'image-recognition-dev-completion-feed';
+    this.statusIndexShards = Math.max(
+      1,
+      parseInt(this.configService.get<string>('AWS_DYNAMODB_STATUS_INDEX_SHARDS') ?? '', 10) || 4,
+    );
 
     const region = this.configService.get<string>('AWS_REGION') || 'us-east-1';
     const accessKeyId = this.configService.get<string>('AWS_ACCESS_KEY_ID');
@@ -189,7 +308,7 @@ export class DynamoDBService {
         return null;
       }
 
-      return response.Item as ImageEntity;
+      return withDecodedLabels(response.Item) as ImageEntity;
     } catch (error: unknown) {
       const errorMessage = getErrorMessage(error);
       this.logger.error(`Failed to get image metadata: ${errorMessage}`);
@@ -244,7 +363,13 @@ export class DynamoDBService {
             }
 
             // Handle labels array
-            const labels = Array.isArray(item.labels) ? item.labels : Array.isArray(item.Labels) ? item.Labels : [];
+            const labels = Array.isArray(item.labels)
+              ? item.labels
+              : Array.isArray(item.Labels)
+                ? item.Labels
+                : typeof item.labelsPacked === 'string'
+                  ? decodePackedLabels(item.labelsPacked)
+                  : [];
 
             return {
               ImageId: item.ImageId || '',
@@ -258,6 +383,7 @@ export class DynamoDBService {
               status: (item.status as ImageEntity['status']) || (item.Status as ImageEntity['status']) || 'uploading',
               labels,
               dimensions: item.dimensions,
+              derivatives: item.derivatives,
             };
           } catch (itemError) {
             this.logger.error(`Error processing item ${index}: ${getErrorMessage(itemError)}`);
@@ -310,6 +436,187 @@ export class DynamoDBService {
     }
   }
 
+  /**
+   * Get the newest images with a status from the sharded status/time index, one bounded Query per shard and marked day
+   *
+   * A page reads at most `maxDays` days with images. If it fills no further, its cursor is the last day read, and the
+   * next page resumes at the day before it; without a cursor there is nothing older.
+   */
+  async queryImagesByStatus(
+    status: ImageEntity['status'],
+    limit: number = 10,
+    cursor?: string,
+    maxDays: number = 30,
+  ): Promise<CursorPage<ImageEntity>> {
+    try {
+      this.logger.log(`Querying images by status: ${status}, limit ${limit}`);
+
+      // The cursor is either the ProcessedKey (processedAt#imageId) of the last item returned, or a day (YYYY-MM-DD)
+      // whose images were all returned; every key still to come sorts below it, and so does every day still to read
+      const days = await this.queryStatusDays(status, cursor, maxDays);
+
+      const items: StatusIndexItem[] = [];
+      let lastDay: string | undefined;
+      for (const dayKey of days.days) {
+        const remaining = limit - items.length;
+
+        const shardResponses = await Promise.all(
+          Array.from({ length: this.statusIndexShards }, (_, shard) => {
+            const params: QueryCommandInput = {
+              TableName: this.tableName,
+              IndexName: STATUS_INDEX_NAME,
+              KeyConditionExpression: cursor
+                ? 'StatusBucket = :bucket AND ProcessedKey < :cursor'
+                : 'StatusBucket = :bucket',
+              ExpressionAttributeValues: {
+                ':bucket': `${status}#${dayKey}#${shard}`,
+                ...(cursor && { ':cursor': cursor }),
+              },
+              ScanIndexForward: false,
+              Limit: remaining,
+            };
+            return this.docClient.send(new QueryCommand(params));
+          }),
+        );
+
+        // Each shard is already newest-first, so the newest `remaining` overall are among these
+        const dayItems = shardResponses
+          .flatMap((response) => (response.Items || []) as StatusIndexItem[])
+          .sort((a, b) => (a.ProcessedKey < b.ProcessedKey ? 1 : a.ProcessedKey > b.ProcessedKey ? -1 : 0))
+          .slice(0, remaining);
+
+        items.push(...dayItems);
+        lastDay = dayKey;
+        if (items.length >= limit) {
+          break;
+        }
+      }
+
+      this.logger.log(`Retrieved ${items.length} images with status: ${status}`);
+
+      let nextCursor: string | undefined;
+      if (items.length >= limit) {
+        nextCursor = items[items.length - 1].ProcessedKey;
+      } else if (days.hasMore) {
+        nextCursor = lastDay;
+      }
+
+      return {
+        items: items.map((item) => withDecodedLabels(item)),
+        nextCursor,
+      };
+    } catch (error: unknown) {
+      const errorMessage = getErrorMessage(error);
+      this.logger.error(`Failed to query images by status: ${errorMessage}`);
+      throw new Error(`DynamoDB query failed: ${errorMessage}`);
+    }
+  }
+
+  /**
+   * Days marked as having images with a status, newest first, below a status-index cursor
+   */
+  private async queryStatusDays(
+    status: ImageEntity['status'],
+    cursor: string | undefined,
+    maxDays: number,
+  ): Promise<{ days: string[]; hasMore: boolean }> {
+    const params: QueryCommandInput = {
+      TableName: this.tableName,
+      KeyConditionExpression: cursor ? 'ImageId = :marker AND CreatedAt < :cursor' : 'ImageId = :marker',
+      ExpressionAttributeValues: {
+        ':marker': `${STATUS_DAYS_PREFIX}${status}`,
+        ...(cursor && { ':cursor': cursor }),
+      },
+      ProjectionExpression: 'CreatedAt',
+      ScanIndexForward: false,
+      Limit: maxDays,
+    };
+    const response = await this.docClient.send(new QueryCommand(params));
+
+    return {
+      days: ((response.Items || []) as { CreatedAt: string }[]).map((item) => item.CreatedAt),
+      hasMore: response.LastEvaluatedKey !== undefined,
+    };
+  }
+
+  /**
+   * Get images that finished since a cursor from the per-minute completions feed, one Query per minute partition
+   */
+  async queryCompletionFeed(
+    since: string,
+    limit: number = 100,
+    maxMinutes: number = 60,
+  ): Promise<CursorPage<CompletionFeedEntry>> {
+    try {
+      this.logger.log(`Querying completion feed since ${since}, limit ${limit}`);
+
+      const items: CompletionFeedItem[] = [];
+      let cursor = toFeedCursor(since);
+      // Only entries old enough that nothing earlier can still be written are read
+      const settled = toFeedTimestamp(new Date(Date.now() - COMPLETION_FEED_SETTLE_MS));
+      const settledMinute = settled.slice(0, 16);
+      // Feed cursors and timestamps both start with their minute; a finished minute's cursor starts at the next one
+      const minute = new Date(`${cursor.slice(0, 16)}:00.000Z`);
+      if (cursor.endsWith(END_OF_MINUTE)) {
+        minute.setUTCMinutes(minute.getUTCMinutes() + 1);
+      }
+
+      for (let scanned = 0; scanned < maxMinutes && items.length < limit && cursor < settled; scanned++) {
+        const minuteKey = minute.toISOString().slice(0, 16);
+        if (minuteKey > settledMinute) {
+          break;
+        }
+
+        // BETWEEN is inclusive, so the entry the cursor points at comes back and is dropped
+        const params: QueryCommandInput = {
+          TableName: this.completionFeedTableName,
+          KeyConditionExpression: 'FeedMinute = :minute AND CompletedKey BETWEEN :cursor AND :settled',
+          ExpressionAttributeValues: {
+            ':minute': minuteKey,
+            ':cursor': cursor,
+            ':settled': settled,
+          },
+          Limit: limit - items.length + 1,
+        };
+
+        const response = await this.docClient.send(new QueryCommand(params));
+        const minuteItems = ((response.Items || []) as CompletionFeedItem[])
+          .filter((item) => item.CompletedKey !== cursor)
+          .slice(0, limit - items.length);
+        items.push(...minuteItems);
+
+        if (minuteItems.length > 0) {
+          cursor = minuteItems[minuteItems.length - 1].CompletedKey;
+        }
+        if (response.LastEvaluatedKey || items.length >= limit) {
+          break;
+        }
+        // The settled minute can still receive entries below the settle point; later minutes are not read yet
+        if (minuteKey < settledMinute) {
+          cursor = `${minuteKey}${END_OF_MINUTE}`;
+        }
+
+        minute.setUTCMinutes(minute.getUTCMinutes() + 1);
+      }
+
+      this.logger.log(`Retrieved ${items.length} completions`);
+
+      return {
+        items: items.map((item) => ({
+          imageId: item.imageId,
+          status: normalizeStatus(item.completionStatus),
+          primaryLabel: item.primaryLabel,
+          completedAt: item.CompletedKey.slice(0, item.CompletedKey.lastIndexOf('#')),
+        })),
+        nextCursor: cursor,
+      };
+    } catch (error: unknown) {
+      const errorMessage = getErrorMessage(error);
+      this.logger.error(`Failed to query completion feed: ${errorMessage}`);
+      throw new Error(`DynamoDB query failed: ${errorMessage}`);
+    }
+  }
+
   /**
    * Search images by label using GSI
    */
@@ -338,12 +645,13 @@ export class DynamoDBService {
       // Get all processed images to search through their labels
       const allImagesParams: ScanCommandInput = {
         TableName: this.tableName,
-        FilterExpression: '#status = :status',
+        FilterExpression: '#status IN (:status, :legacyStatus)',
         ExpressionAttributeNames: {
           '#status': 'status',
         },
         ExpressionAttributeValues: {
-          ':status': 'processed',
+          ':status': 'completed',
+          ':legacyStatus': 'processed',
         },
         Limit: 100, // Reasonable limit for scanning
       };
@@ -365,7 +673,7 @@ export class DynamoDBService {
       // Filter by label and confidence
       const filteredImages: ImageEntity[] = [];
       for (const [, item] of uniqueItems) {
-        const imageEntity = item as ImageEntity;
+        const imageEntity = withDecodedLabels(item) as ImageEntity;
 
         // Check if any label matches the search criteria
         const hasMatchingLabel = imageEntity.labels?.some((labelObj) => {
@@ -408,14 +716,15 @@ export class DynamoDBService {
       // Scan all processed images to aggregate label statistics
       const params: ScanCommandInput = {
         TableName: this.tableName,
-        FilterExpression: '#status = :status',
+        FilterExpression: '#status IN (:status, :legacyStatus)',
         ExpressionAttributeNames: {
           '#status': 'status',
         },
         ExpressionAttributeValues: {
-          ':status': 'processed',
+          ':status': 'completed',
+          ':legacyStatus': 'processed',
         },
-        ProjectionExpression: 'labels',
+        ProjectionExpression: 'labels, labelsPacked',
       };
 
       const command = new ScanCommand(params);
@@ -426,7 +735,7 @@ export class DynamoDBService {
 
       // Process all images and their labels
       (response.Items || []).forEach((item) => {
-        const entity = item as ImageEntity;
+        const entity = withDecodedLabels(item) as ImageEntity;
         if (entity.labels) {
           entity.labels.forEach((label) => {
             const labelName = getLabelName(label);
@@ -286,6 +286,14 @@ describe('S3Service', () => {
     });
   });
 
+  describe('getObjectUrl', () => {
+    it('should build the object URL from bucket and region', () => {
+      expect(service.getObjectUrl('derivatives/thumbnail/test.webp')).toBe(
+        'https://test-bucket.s3.us-east-1.amazonaws.com/derivatives/thumbnail/test.webp',
+      );
+    });
+  });
+
   describe('getImageUrl', () => {
     it('should generate signed URL with custom expiration', async () => {
       const signedUrl = 'https://signed-url.com/image.jpg';
@@ -74,7 +74,7 @@ export class S3Service {
 
       await this.s3Client.send(command);
 
-      const url = `https://${this.bucketName}.s3.${this.configService.get<string>('AWS_REGION')}.amazonaws.com/${objectKey}`;
+      const url = this.getObjectUrl(objectKey);
 
       this.logger.log(`Image uploaded successfully: ${url}`);
 
@@ -90,6 +90,13 @@ export class S3Service {
     }
   }
 
+  /**
+   * Get the unsigned object URL for a key in the images bucket
+   */
+  getObjectUrl(key: string): string {
+    return `https://${this.bucketName}.s3.${this.configService.get<string>('AWS_REGION')}.amazonaws.com/${key}`;
+  }
+
   /**
    * Get a signed URL for downloading an image
    */
@@ -81,6 +81,14 @@ resource "aws_ecs_task_definition" "main" {
           name  = "AWS_DYNAMODB_TABLE_NAME"
           value = var.dynamodb_table_name
         },
+        {
+          name  = "AWS_DYNAMODB_STATUS_INDEX_SHARDS"
+          value = tostring(var.status_index_shard_count)
+        },
+        {
+          name  = "COMPLETION_FEED_TABLE_NAME"
+          value = var.completion_feed_table_name
+        },
         {
           name  = "MAX_FILE_SIZE"
           value = "5242880"
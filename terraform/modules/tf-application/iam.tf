@@ -130,6 +130,16 @@ data "aws_iam_policy_document" "ecs_task_policy" {
     ]
   }
 
+  # Completions feed, read by GET /image/completions
+  statement {
+    sid    = "AllowCompletionFeedQuery"
+    effect = "Allow"
+    actions = [
+      "dynamodb:Query"
+    ]
+    resources = [var.completion_feed_table_arn]
+  }
+
   # Rekognition permissions
   statement {
     sid    = "AllowRekognitionAccess"
@@ -44,7 +44,10 @@ resource "aws_iam_policy" "lambda_policy" {
         Sid    = "RekognitionDetectLabels"
         Effect = "Allow"
         Action = [
-          "rekognition:DetectLabels"
+          "rekognition:DetectLabels",
+          "rekognition:DetectModerationLabels",
+          "rekognition:DetectText",
+          "rekognition:DetectFaces"
         ]
         Resource = "*"
       },
@@ -80,13 +83,23 @@ resource "aws_iam_policy" "lambda_policy" {
         Action = [
           "dynamodb:PutItem",
           "dynamodb:UpdateItem",
-          "dynamodb:GetItem"
+          "dynamodb:GetItem",
+          "dynamodb:Scan",
+          "dynamodb:DeleteItem"
         ]
         Resource = [
           var.dynamodb_table_arn,
           "${var.dynamodb_table_arn}/index/*"
         ]
       },
+      {
+        Sid    = "CompletionFeedWrite"
+        Effect = "Allow"
+        Action = [
+          "dynamodb:PutItem"
+        ]
+        Resource = var.completion_feed_table_arn
+      },
       # S3
       {
         Sid    = "S3BucketAccess"
@@ -95,6 +108,45 @@ resource "aws_iam_policy" "lambda_policy" {
           "s3:GetObject"
         ]
         Resource = "${var.s3_bucket_arn}/*"
+      },
+      {
+        Sid    = "S3DerivativeWrite"
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject"
+        ]
+        Resource = "${var.s3_bucket_arn}/${var.derivative_prefix}*"
+      },
+      {
+        Sid    = "S3LabelExportAccess"
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject",
+          "s3:GetObject",
+          "s3:DeleteObject"
+        ]
+        Resource = "${var.s3_bucket_arn}/analytics/labels/*"
+      },
+      {
+        Sid    = "S3LabelExportList"
+        Effect = "Allow"
+        Action = [
+          "s3:ListBucket"
+        ]
+        Resource = var.s3_bucket_arn
+        Condition = {
+          StringLike = {
+            "s3:prefix" = "analytics/labels/*"
+          }
+        }
+      },
+      {
+        Sid    = "S3ProfileWrite"
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject"
+        ]
+        Resource = "${var.s3_bucket_arn}/profiles/*"
       }
     ]
   })
@@ -121,13 +173,33 @@ resource "aws_lambda_function" "image_recognition" {
   handler          = "index.lambda_handler"
   runtime          = "python3.9"
   timeout          = 300
-  memory_size      = 512
+  memory_size      = var.lambda_memory_size
   source_code_hash = data.archive_file.lambda_zip.output_base64sha256
+  layers           = var.lambda_layer_arns
 
   environment {
     variables = {
-      AWS_DYNAMODB_TABLE_NAME = var.dynamodb_table_name
-      LOG_LEVEL               = "INFO"
+      AWS_DYNAMODB_TABLE_NAME          = var.dynamodb_table_name
+      AWS_DYNAMODB_STATUS_INDEX_SHARDS = tostring(var.status_index_shard_count)
+      LOG_LEVEL                        = "INFO"
+      LABEL_ENCODING                   = var.label_encoding
+      ANALYSIS_FEATURES                = join(",", var.analysis_features)
+      DERIVATIVES_ENABLED              = tostring(var.derivatives_enabled)
+      DERIVATIVE_PREFIX                = var.derivative_prefix
+      DERIVATIVE_FORMAT                = var.derivative_format
+      DERIVATIVE_SIZES                 = join(",", [for name, size in var.derivative_sizes : "${name}:${size}"])
+      CONTENT_HASH_ENABLED             = tostring(var.content_hash_enabled)
+      PROFILING_ENABLED                = tostring(var.profiling_enabled)
+      PROFILING_SAMPLE_RATE            = tostring(var.profiling_sample_rate)
+      PROFILING_THRESHOLD_MS           = tostring(var.profiling_threshold_ms)
+      PROFILING_S3_BUCKET              = var.profiling_to_s3 ? replace(var.s3_bucket_arn, "arn:aws:s3:::", "") : ""
+      LABEL_EXPORT_ENABLED             = tostring(var.label_export_enabled)
+      LABEL_EXPORT_BUCKET              = replace(var.s3_bucket_arn, "arn:aws:s3:::", "")
+      COST_ACCOUNTING_ENABLED          = tostring(var.cost_accounting_enabled)
+      REQUIRE_EXISTING_METADATA        = tostring(var.require_existing_metadata)
+      COMPLETION_FEED_ENABLED          = tostring(var.completion_feed_enabled)
+      COMPLETION_FEED_TABLE_NAME       = var.completion_feed_table_name
+      COMPLETION_FEED_TTL_HOURS        = tostring(var.completion_feed_ttl_hours)
     }
   }
 
@@ -162,5 +234,38 @@ resource "aws_lambda_event_source_mapping" "sqs_trigger" {
   batch_size                         = 10
   maximum_batching_window_in_seconds = 5
 
+  # Retry only the messages the handler lists in batchItemFailures, e.g. images still waiting for their metadata
+  function_response_types = ["ReportBatchItemFailures"]
+
   depends_on = [aws_lambda_function.image_recognition]
 }
+
+# Periodic compaction of the label export's small per-invocation files
+resource "aws_cloudwatch_event_rule" "label_export_compaction" {
+  count               = var.label_export_enabled ? 1 : 0
+  name                = "${var.project_name}-${var.environment}-label-export-compaction"
+  description         = "Compact recent label export partitions"
+  schedule_expression = var.label_export_compaction_schedule
+
+  tags = {
+    Name        = "${var.project_name}-${var.environment}-label-export-compaction"
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
+
+resource "aws_cloudwatch_event_target" "label_export_compaction" {
+  count = var.label_export_enabled ? 1 : 0
+  rule  = aws_cloudwatch_event_rule.label_export_compaction[0].name
+  arn   = aws_lambda_function.image_recognition.arn
+  input = jsonencode({ action = "compact-label-export" })
+}
+
+resource "aws_lambda_permission" "label_export_compaction" {
+  count         = var.label_export_enabled ? 1 : 0
+  statement_id  = "AllowLabelExportCompaction"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.image_recognition.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.label_export_compaction[0].arn
+}
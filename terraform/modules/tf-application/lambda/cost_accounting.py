@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import threading
+from collections import Counter
+
+logger = logging.getLogger()
+
+# Per-invocation summary of AWS calls, DynamoDB capacity and bytes moved, on unless COST_ACCOUNTING_ENABLED=false
+COST_ACCOUNTING_ENABLED = os.environ.get('COST_ACCOUNTING_ENABLED', 'true').lower() == 'true'
+
+class CostAccounting:
+    """
+    Counts the AWS calls made through attached clients, with consumed capacity and bytes transferred
+
+    Calls are counted once per API call after retries; `retries` holds the extra attempts botocore made.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = Counter()
+            self.errors = Counter()
+            self.retries = Counter()
+            self.read_capacity = Counter()
+            self.write_capacity = Counter()
+            self.bytes_sent = Counter()
+            self.bytes_received = Counter()
+
+    def attach(self, client):
+        """
+        Register the counting hooks on a boto3 client; attaching the same client twice is a no-op
+        """
+        events = client.meta.events
+        events.register('before-call', self._before_call, unique_id='cost-accounting-before-call')
+        events.register('after-call', self._after_call, unique_id='cost-accounting-after-call')
+        return client
+
+    def _before_call(self, model, params, **kwargs):
+        size = body_size(params.get('body'), params.get('headers', {}))
+        with self._lock:
+            self.bytes_sent[operation_name(model)] += size
+
+    def _after_call(self, http_response, parsed, model, **kwargs):
+        operation = operation_name(model)
+        size = int(http_response.headers.get('Content-Length', 0) or 0) if http_response is not None else 0
+        retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+
+        # UpdateItem/PutItem/Query return one entry, batch and transaction calls a list of them
+        consumed = parsed.get('ConsumedCapacity') or []
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+
+        with self._lock:
+            self.calls[operation] += 1
+            self.bytes_received[operation] += size
+            if retries:
+                self.retries[operation] += retries
+            if 'Error' in parsed:
+                self.errors[f"{operation}:{parsed['Error'].get('Code', 'Unknown')}"] += 1
+            for capacity in consumed:
+                add_capacity(self.read_capacity, self.write_capacity, operation, capacity)
+
+    def summary(self):
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'total_calls': sum(self.calls.values()),
+                'retries': dict(self.retries),
+                'errors': dict(self.errors),
+                'capacity': {
+                    'read_units': round_units(self.read_capacity),
+                    'write_units': round_units(self.write_capacity)
+                },
+                'bytes_sent': sum(self.bytes_sent.values()),
+                'bytes_received': sum(self.bytes_received.values())
+            }
+
+def operation_name(model):
+    """
+    "service.Operation" key of an operation model, e.g. "dynamodb.UpdateItem"
+    """
+    return f"{model.service_model.endpoint_prefix}.{model.name}"
+
+def body_size(body, headers):
+    """
+    Size of a serialized request body; S3 uploads arrive as file objects, which are measured without reading them
+    """
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    if hasattr(body, 'seek') and hasattr(body, 'tell'):
+        position = body.tell()
+        end = body.seek(0, os.SEEK_END)
+        body.seek(position)
+        return end - position
+    return int(headers.get('Content-Length', 0) or 0)
+
+# DynamoDB operations whose consumed capacity is read capacity; everything else consumes write capacity
+READ_OPERATIONS = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+
+def add_capacity(read_capacity, write_capacity, operation, capacity):
+    """
+    Add one ConsumedCapacity entry; with ReturnConsumedCapacity=TOTAL it includes the indexes the call updated
+    """
+    units = capacity.get('CapacityUnits', 0)
+    target = read_capacity if operation.split('.', 1)[1] in READ_OPERATIONS else write_capacity
+    target[capacity.get('TableName', 'unknown')] += units
+
+def round_units(capacity):
+    return {table_name: round(units, 2) for table_name, units in capacity.items()}
+
+def emit_summary(summary, context):
+    """
+    Log the invocation summary as one JSON line, for CloudWatch Logs Insights
+    """
+    request_id = getattr(context, 'aws_request_id', None)
+    logger.info(f"Invocation summary: {json.dumps({'request_id': request_id, **summary}, separators=(',', ':'))}")
@@ -0,0 +1,126 @@
+import logging
+import mmap
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger()
+
+# Objects larger than this are spilled to an mmap'd file in /tmp instead of the Lambda's memory
+IMAGE_BUFFER_SPILL_BYTES = int(os.environ.get('IMAGE_BUFFER_SPILL_BYTES', str(32 * 1024 * 1024)))
+
+# Size of each read from the S3 response stream
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+class ImageBuffer:
+    """
+    One image's bytes, downloaded once and shared by every stage that reads them
+
+    Stages take zero-copy memoryviews with view() and call release() when they are done; the
+    buffer (or its /tmp file) is freed as soon as the last of the expected stages releases it.
+    """
+    def __init__(self, size, stages=1, spill_bytes=None):
+        spill_bytes = IMAGE_BUFFER_SPILL_BYTES if spill_bytes is None else spill_bytes
+        self.size = size
+        self.path = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._stages = stages
+
+        if size > spill_bytes:
+            self._file = tempfile.NamedTemporaryFile(prefix='image-', suffix='.bin')
+            self._file.truncate(size)
+            self.path = self._file.name
+            self._data = mmap.mmap(self._file.fileno(), size)
+        else:
+            self._data = bytearray(size)
+        self._view = memoryview(self._data)
+
+    @property
+    def spilled(self):
+        return self.path is not None
+
+    @property
+    def closed(self):
+        return self._view is None
+
+    def view(self, start=0, end=None):
+        """
+        Read-only memoryview of the bytes (or a slice of them); release it, e.g. with `with`, when done
+        """
+        if self._view is None:
+            raise ValueError("Image buffer is already released")
+        return self._view[start:end].toreadonly()
+
+    def portable(self):
+        """
+        The bytes in a form that can be sent to another process: the spill file's path or the bytearray
+        """
+        if self._view is None:
+            raise ValueError("Image buffer is already released")
+        if self._file is not None:
+            self._data.flush()
+            return self.path
+        return self._data
+
+    def release(self):
+        """
+        Mark one stage as done; the last one frees the buffer
+        """
+        with self._lock:
+            self._stages -= 1
+            if self._stages > 0:
+                return
+        self.close()
+
+    def close(self):
+        with self._lock:
+            view, self._view = self._view, None
+        if view is None:
+            return
+
+        view.release()
+        if self._file is not None:
+            try:
+                self._data.close()
+            except BufferError:
+                # A stage still holds a view; the mapping goes when that view is collected
+                logger.warning(f"Image buffer {self.path} closed with views still exported")
+            # Closing the temporary file deletes it; the mapping stays valid until it is unmapped
+            self._file.close()
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def download(s3_client, bucket_name, object_key, stages=1, spill_bytes=None):
+    """
+    Stream an S3 object into an ImageBuffer sized from its ContentLength
+    """
+    response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+    body = response['Body']
+    size = response['ContentLength']
+
+    image = ImageBuffer(size, stages=stages, spill_bytes=spill_bytes)
+    try:
+        position = 0
+        while position < size:
+            chunk = body.read(min(DOWNLOAD_CHUNK_BYTES, size - position))
+            if not chunk:
+                break
+            image._view[position:position + len(chunk)] = chunk
+            position += len(chunk)
+
+        if position != size:
+            raise IOError(f"Read {position} of {size} bytes of s3://{bucket_name}/{object_key}")
+    except Exception:
+        image.close()
+        raise
+    finally:
+        body.close()
+
+    logger.info(f"Downloaded {size} bytes of {object_key} into {'/tmp' if image.spilled else 'memory'}")
+    return image
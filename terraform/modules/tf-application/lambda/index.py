@@ -1,10 +1,28 @@
 import json
+import io
 import boto3
 import urllib.parse
-from datetime import datetime
+from boto3.dynamodb.conditions import Attr
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import logging
 import os
+import hashlib
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from profiling import profiled, profiled_task
+import cost_accounting
+import image_buffer
+import label_export
+import orphans
+import process_pool
+
+# Pillow is not part of the Lambda runtime, it comes from a layer when derivatives are enabled
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
 
 # Configure logging
 logger = logging.getLogger()
@@ -15,6 +33,12 @@ s3_client = boto3.client('s3')
 dynamodb = boto3.resource('dynamodb')
 rekognition_client = boto3.client('rekognition')
 
+# AWS calls, DynamoDB capacity and bytes of the current invocation, logged as its summary
+invocation_costs = cost_accounting.CostAccounting()
+if cost_accounting.COST_ACCOUNTING_ENABLED:
+    for client in (s3_client, rekognition_client, dynamodb.meta.client):
+        invocation_costs.attach(client)
+
 # Environment variables
 AWS_DYNAMODB_TABLE_NAME = os.environ.get('AWS_DYNAMODB_TABLE_NAME')
 logger.info(f"AWS_DYNAMODB_TABLE_NAME env var is {AWS_DYNAMODB_TABLE_NAME}")
@@ -25,62 +49,359 @@ if not AWS_DYNAMODB_TABLE_NAME:
 
 table = dynamodb.Table(AWS_DYNAMODB_TABLE_NAME)
 
+# Label storage format: 'list' (list of Name/Confidence maps) or 'compact' (packed string)
+LABEL_ENCODING_LIST = 'list'
+LABEL_ENCODING_COMPACT = 'compact'
+LABEL_ENCODING = os.environ.get('LABEL_ENCODING', LABEL_ENCODING_LIST)
+
+# Compact format: "Name:9912|Name:8750", confidences as fixed-point hundredths
+PACKED_LABEL_SEPARATOR = '|'
+PACKED_CONFIDENCE_SEPARATOR = ':'
+
+# Sparse StatusProcessedIndex keys, spread over shards so one day's writes don't land on a single partition
+STATUS_INDEX_SHARDS = max(1, int(os.environ.get('AWS_DYNAMODB_STATUS_INDEX_SHARDS', '4')))
+STATUS_INDEX_SEPARATOR = '#'
+
+# ProcessedAt and completedAt, always UTC with microseconds, so the API can split both into UTC days and minutes
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+# Status of a recognized image, one of the API's ImageEntity status values
+STATUS_COMPLETED = 'completed'
+# Written for recognized images before the Lambda used the API's statuses
+STATUS_LEGACY_PROCESSED = 'processed'
+
+# Days that have StatusProcessedIndex entries, one item per status and day (ImageId STATUS_DAYS#<status>,
+# CreatedAt YYYY-MM-DD), so the API's listing goes straight to the next day with images
+STATUS_DAYS_PREFIX = 'STATUS_DAYS#'
+# (status, day) markers this container has written
+marked_status_days = set()
+
+# Event that adds StatusProcessedIndex keys and day markers to images recognized before they existed,
+# {"action": "backfill-status-index", "dry_run": false} writes them
+BACKFILL_STATUS_INDEX_ACTION = 'backfill-status-index'
+# Recognized images; the ones whose keys are missing, or were written under the legacy status, get new keys
+STATUS_INDEX_BACKFILL_FILTER = (
+    Attr('CreatedAt').eq('METADATA')
+    & Attr('status').is_in([STATUS_COMPLETED, STATUS_LEGACY_PROCESSED])
+    & Attr('ProcessedAt').exists()
+)
+
+# Recent-completions feed: one small item per finished image under a per-minute partition ("YYYY-MM-DDTHH:MM"),
+# so clients can Query what finished since a cursor instead of polling every image. It has its own table, so the
+# image table's Scans never read feed items
+COMPLETION_FEED_ENABLED = os.environ.get('COMPLETION_FEED_ENABLED', 'true').lower() == 'true'
+COMPLETION_FEED_TABLE_NAME = os.environ.get('COMPLETION_FEED_TABLE_NAME', 'image-recognition-api-dev-completion-feed')
+feed_table = dynamodb.Table(COMPLETION_FEED_TABLE_NAME)
+# Feed items are removed by the feed table's TTL on expiresAt
+COMPLETION_FEED_TTL_HOURS = int(os.environ.get('COMPLETION_FEED_TTL_HOURS', '24'))
+
+# Rekognition operations run per image: any of labels, moderation, text, faces
+ANALYSIS_FEATURES = [
+    feature.strip() for feature in os.environ.get('ANALYSIS_FEATURES', 'labels').split(',') if feature.strip()
+]
+
+# Rows for the columnar label export, flushed once per invocation
+label_export_buffer = label_export.LabelExportBuffer()
+
+# Event that finds orphan image items, {"action": "cleanup-orphans", "dry_run": false} deletes them
+CLEANUP_ORPHANS_ACTION = 'cleanup-orphans'
+
+# Event sent by the EventBridge schedule to compact recent label export partitions
+COMPACT_LABEL_EXPORT_ACTION = 'compact-label-export'
+LABEL_EXPORT_COMPACT_DAYS = 2
+
+# Resized copies (thumbnail/preview) written next to the original, off unless DERIVATIVES_ENABLED=true
+DERIVATIVES_ENABLED = os.environ.get('DERIVATIVES_ENABLED', 'false').lower() == 'true'
+DERIVATIVE_PREFIX = os.environ.get('DERIVATIVE_PREFIX', 'derivatives/')
+DERIVATIVE_FORMAT = os.environ.get('DERIVATIVE_FORMAT', 'WEBP').upper()
+DERIVATIVE_QUALITY = int(os.environ.get('DERIVATIVE_QUALITY', '80'))
+# "name:max_edge" pairs, e.g. "thumbnail:256,preview:1024"
+DERIVATIVE_SIZES = [
+    (name.strip(), int(max_edge))
+    for name, max_edge in (
+        entry.split(':') for entry in os.environ.get('DERIVATIVE_SIZES', 'thumbnail:256,preview:1024').split(',') if entry
+    )
+]
+
+# SHA-256 of the original stored as contentSha256, e.g. to find duplicate uploads
+CONTENT_HASH_ENABLED = os.environ.get('CONTENT_HASH_ENABLED', 'false').lower() == 'true'
+
+# Worker processes for CPU-bound stages; unset sizes the pool to the vCPUs the memory size buys
+CPU_POOL_WORKERS = os.environ.get('CPU_POOL_WORKERS')
+
+@profiled
 def lambda_handler(event, context):
     """
     Lambda function to process image recognition from SQS messages
     """
+    if event.get('action') == COMPACT_LABEL_EXPORT_ACTION:
+        return compact_label_export()
+    if event.get('action') == CLEANUP_ORPHANS_ACTION:
+        return cleanup_orphans(event)
+    if event.get('action') == BACKFILL_STATUS_INDEX_ACTION:
+        return backfill_status_index(event)
+
+    invocation_costs.reset()
     try:
         logger.info(f"Processing {len(event['Records'])} SQS records")
         logger.info(f"Full event: {json.dumps(event)}") 
         
-        # Process each SQS record
+        # Messages to leave on the queue; with ReportBatchItemFailures SQS deletes the rest of the batch
+        batch_item_failures = []
+        
+        # Parse every SQS record first, so all of the batch's S3 records can be in flight at once
+        messages = []
         for record in event['Records']:
-            # Parse message body directly - no SNS envelope with raw delivery
-            try:
-                # Try parsing as direct S3 event (raw delivery)
-                s3_event = json.loads(record['body'])
-                logger.info("Processing message with raw delivery format")
-            except (KeyError, json.JSONDecodeError) as e:
-                # Fallback to SNS format if needed
-                try:
-                    sns_message = json.loads(record['body'])
-                    s3_event = json.loads(sns_message.get('Message', '{}'))
-                    logger.info("Processing message with SNS envelope format")
-                except (KeyError, json.JSONDecodeError):
-                    logger.error(f"Could not parse message body: {record['body'][:200]}...")
-                    continue
-            
-            # Process each S3 record
-            for s3_record in s3_event['Records']:
-                bucket_name = s3_record['s3']['bucket']['name']
-                object_key = urllib.parse.unquote_plus(s3_record['s3']['object']['key'])
-                
-                logger.info(f"Processing image: {bucket_name}/{object_key}")
-                
-                # Skip if not an image file
-                if not is_image_file(object_key):
-                    logger.info(f"Skipping non-image file: {object_key}")
-                    continue
-                
-                # Analyze image with Rekognition
-                labels = analyze_image(bucket_name, object_key)
-                
-                # Store metadata in DynamoDB
-                store_image_metadata(bucket_name, object_key, s3_record, labels)
-                
-                logger.info(f"Successfully processed image: {object_key}")
+            s3_event = parse_message_body(record['body'])
+            if s3_event is not None:
+                messages.append((record, s3_event['Records']))
+        
+        errors = process_s3_records([s3_record for _, s3_records in messages for s3_record in s3_records])
+        
+        # Only messages with a failed record go back; redelivering the whole batch would process (and add feed
+        # entries for) its successful records again
+        position = 0
+        for record, s3_records in messages:
+            record_errors = [error for error in errors[position:position + len(s3_records)] if error is not None]
+            position += len(s3_records)
+            if not record_errors:
+                continue
+            failures = [error for error in record_errors if not isinstance(error, orphans.OrphanRetryError)]
+            if failures:
+                logger.error(f"Error processing message {record['messageId']}: {str(failures[0])}")
+            else:
+                logger.warning(f"Retrying message {record['messageId']}: {str(record_errors[0])}")
+            batch_item_failures.append({'itemIdentifier': record['messageId']})
+        
+        flush_label_export()
         
         return {
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'Successfully processed images',
-                'processed_count': len(event['Records'])
-            })
+                'processed_count': len(event['Records']) - len(batch_item_failures)
+            }),
+            'batchItemFailures': batch_item_failures
         }
         
     except Exception as e:
         logger.error(f"Error processing images: {str(e)}")
+        # The whole batch is redelivered, so rows of its successful records would be exported twice
+        label_export_buffer.clear()
         raise e
+    
+    finally:
+        if cost_accounting.COST_ACCOUNTING_ENABLED:
+            cost_accounting.emit_summary({'records': len(event.get('Records', [])), **invocation_costs.summary()}, context)
+
+def parse_message_body(body):
+    """
+    Parse an SQS message body into the S3 event it carries, None if it cannot be parsed
+    """
+    # Parse message body directly - no SNS envelope with raw delivery
+    try:
+        # Try parsing as direct S3 event (raw delivery)
+        s3_event = json.loads(body)
+        logger.info("Processing message with raw delivery format")
+    except (KeyError, json.JSONDecodeError) as e:
+        # Fallback to SNS format if needed
+        try:
+            sns_message = json.loads(body)
+            s3_event = json.loads(sns_message.get('Message', '{}'))
+            logger.info("Processing message with SNS envelope format")
+        except (KeyError, json.JSONDecodeError):
+            logger.error(f"Could not parse message body: {body[:200]}...")
+            return None
+    return s3_event
+
+def process_s3_records(s3_records):
+    """
+    Run process_s3_record for each record, returns the exception each one raised (or None) in order
+
+    With a CPU pool the records run side by side, so the pool renders several records' derivatives at once
+    instead of waiting on one render at a time; without one they run inline, one after another.
+    """
+    if not cpu_pool.workers:
+        errors = []
+        for s3_record in s3_records:
+            try:
+                process_s3_record(s3_record)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    futures = [record_executor.submit(profiled_task(process_s3_record), s3_record) for s3_record in s3_records]
+    return [future.exception() for future in futures]
+
+def process_s3_record(s3_record, executor=None):
+    """
+    Analyze one S3 object record and store the results, skipping non-image objects
+
+    `executor` runs the Rekognition calls, the shared analysis_executor unless the caller brings its own
+    """
+    bucket_name = s3_record['s3']['bucket']['name']
+    object_key = urllib.parse.unquote_plus(s3_record['s3']['object']['key'])
+    
+    logger.info(f"Processing image: {bucket_name}/{object_key}")
+    
+    # Skip if not an image file
+    if not is_image_file(object_key):
+        logger.info(f"Skipping non-image file: {object_key}")
+        return
+    
+    # Run the selected Rekognition analyses concurrently
+    analysis = analyze_image(bucket_name, object_key, executor=executor)
+    labels = analysis.get('labels', [])
+    
+    # Stages that read the original share one download of it
+    derivatives, content_hash = None, None
+    byte_stages = int(DERIVATIVES_ENABLED) + int(CONTENT_HASH_ENABLED)
+    if byte_stages:
+        derivatives, content_hash = run_byte_stages(bucket_name, object_key, byte_stages)
+    
+    # Store metadata in DynamoDB
+    processed_at = store_image_metadata(bucket_name, object_key, s3_record, labels, derivatives, analysis, content_hash)
+    if processed_at is None:
+        return
+    
+    if label_export.LABEL_EXPORT_ENABLED:
+        label_export_buffer.add(image_id_from_key(object_key), processed_at, s3_record['s3']['object'].get('size', 0), labels)
+    
+    logger.info(f"Successfully processed image: {object_key}")
+
+def run_byte_stages(bucket_name, object_key, stages):
+    """
+    Download the original once and run the derivative and hash stages on it, returns (derivatives, content_hash)
+    """
+    try:
+        image = image_buffer.download(s3_client, bucket_name, object_key, stages=stages)
+    except Exception as e:
+        # Like a failed derivative, a failed download leaves the labels to be stored without these stages
+        logger.error(f"Error downloading {object_key}: {str(e)}")
+        return ({} if DERIVATIVES_ENABLED else None), None
+
+    try:
+        # Render thumbnail/preview copies
+        derivatives = create_derivatives(bucket_name, object_key, image) if DERIVATIVES_ENABLED else None
+        content_hash = hash_image(image) if CONTENT_HASH_ENABLED else None
+        return derivatives, content_hash
+    finally:
+        image.close()
+
+def cleanup_orphans(event):
+    """
+    Find image items without an API-written METADATA record; deletes them only with "dry_run": false
+    """
+    dry_run = event.get('dry_run', True)
+    image_ids = orphans.cleanup_orphans(table, event.get('segments'), dry_run)
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Found orphan image items' if dry_run else 'Deleted orphan image items',
+            'dry_run': dry_run,
+            'count': len(image_ids),
+            'image_ids': image_ids[:100]
+        })
+    }
+
+def backfill_status_index(event):
+    """
+    Add completed-status index keys to recognized images that lack them; writes only with "dry_run": false
+    """
+    dry_run = event.get('dry_run', True)
+    segments = event.get('segments') or orphans.ORPHAN_CLEANUP_SEGMENTS
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        results = list(executor.map(lambda segment: backfill_status_index_segment(segment, segments, dry_run), range(segments)))
+    image_ids = sorted(image_id for found, _ in results for image_id in found)
+    days = sorted({day for _, found_days in results for day in found_days})
+
+    if not dry_run:
+        for day in days:
+            mark_status_day(STATUS_COMPLETED, day)
+
+    logger.info(f"{'Found' if dry_run else 'Backfilled'} {len(image_ids)} images without status index keys, {len(days)} days")
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Found images without status index keys' if dry_run else 'Backfilled status index keys',
+            'dry_run': dry_run,
+            'count': len(image_ids),
+            'image_ids': image_ids[:100],
+            'days': len(days)
+        })
+    }
+
+def backfill_status_index_segment(segment, total_segments, dry_run):
+    """
+    Backfill the index keys of one scan segment unless dry_run, returns the image IDs without keys and every day seen
+    """
+    found, days = [], set()
+    scan_kwargs = {
+        'FilterExpression': STATUS_INDEX_BACKFILL_FILTER,
+        'ProjectionExpression': 'ImageId, ProcessedAt, StatusBucket',
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            days.add(item['ProcessedAt'][:10])
+            if item.get('StatusBucket', '').startswith(f"{STATUS_COMPLETED}{STATUS_INDEX_SEPARATOR}"):
+                continue
+            if not dry_run:
+                status_bucket, processed_key = status_index_keys(STATUS_COMPLETED, item['ImageId'], item['ProcessedAt'])
+                try:
+                    # Skipped if the image was recognized again since the scan, that write set its own keys
+                    table.update_item(
+                        Key={'ImageId': item['ImageId'], 'CreatedAt': 'METADATA'},
+                        UpdateExpression='SET StatusBucket = :statusBucket, ProcessedKey = :processedKey',
+                        ConditionExpression='ProcessedAt = :processedAt',
+                        ExpressionAttributeValues={
+                            ':statusBucket': status_bucket,
+                            ':processedKey': processed_key,
+                            ':processedAt': item['ProcessedAt']
+                        }
+                    )
+                except table.meta.client.exceptions.ConditionalCheckFailedException:
+                    continue
+            found.append(item['ImageId'])
+
+        if 'LastEvaluatedKey' not in response:
+            return found, days
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def flush_label_export():
+    """
+    Write buffered label export rows; the export is best effort and never fails the batch
+    """
+    if not label_export.LABEL_EXPORT_ENABLED:
+        return
+    try:
+        label_export_buffer.flush(s3_client)
+    except Exception as e:
+        logger.error(f"Error exporting labels: {str(e)}")
+
+def compact_label_export():
+    """
+    Compact the label export partitions of the last LABEL_EXPORT_COMPACT_DAYS days
+    """
+    today = datetime.now().date()
+    compacted = []
+    for days_ago in range(LABEL_EXPORT_COMPACT_DAYS):
+        day = (today - timedelta(days=days_ago)).isoformat()
+        if label_export.compact_partition(s3_client, day):
+            compacted.append(day)
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Compacted label export partitions',
+            'compacted_days': compacted
+        })
+    }
 
 def is_image_file(object_key):
     """
@@ -89,46 +410,303 @@ def is_image_file(object_key):
     image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
     return any(object_key.lower().endswith(ext) for ext in image_extensions)
 
-def analyze_image(bucket_name, object_key):
+def to_decimal(value, digits=2):
+    """
+    Convert a Rekognition float to a DynamoDB-safe Decimal
+    """
+    return Decimal(str(round(value, digits)))
+
+def detect_image_labels(image):
     """
-    Analyze image using AWS Rekognition
+    Detect object and scene labels
     """
+    response = rekognition_client.detect_labels(
+        Image=image,
+        MaxLabels=10,
+        MinConfidence=75.0
+    )
+    
+    labels = []
+    for label in response['Labels']:
+        labels.append({
+            'Name': label['Name'],
+            'Confidence': to_decimal(label['Confidence'])
+        })
+    return labels
+
+def detect_image_moderation_labels(image):
+    """
+    Detect unsafe content labels
+    """
+    response = rekognition_client.detect_moderation_labels(
+        Image=image,
+        MinConfidence=60.0
+    )
+    return [
+        {
+            'Name': label['Name'],
+            'ParentName': label.get('ParentName', ''),
+            'Confidence': to_decimal(label['Confidence'])
+        }
+        for label in response['ModerationLabels']
+    ]
+
+def detect_image_text(image):
+    """
+    Detect lines of text
+    """
+    response = rekognition_client.detect_text(Image=image)
+    return [
+        {
+            'DetectedText': detection['DetectedText'],
+            'Confidence': to_decimal(detection['Confidence'])
+        }
+        for detection in response['TextDetections'] if detection['Type'] == 'LINE'
+    ]
+
+def detect_image_faces(image):
+    """
+    Detect faces and their bounding boxes
+    """
+    response = rekognition_client.detect_faces(Image=image)
+    return [
+        {
+            'Confidence': to_decimal(face['Confidence']),
+            'BoundingBox': {key: to_decimal(value, 4) for key, value in face['BoundingBox'].items()}
+        }
+        for face in response['FaceDetails']
+    ]
+
+# Analysis feature -> (Rekognition call, item attribute the result is stored in)
+ANALYSIS_OPERATIONS = {
+    'labels': (detect_image_labels, 'labels'),
+    'moderation': (detect_image_moderation_labels, 'moderationLabels'),
+    'text': (detect_image_text, 'textDetections'),
+    'faces': (detect_image_faces, 'faces')
+}
+
+def analyze_image(bucket_name, object_key, features=None, executor=None):
+    """
+    Run the selected Rekognition analyses concurrently, returns {feature: result} for the ones that succeeded
+    """
+    features = [feature for feature in (features or ANALYSIS_FEATURES) if feature in ANALYSIS_OPERATIONS]
+    image = {
+        'S3Object': {
+            'Bucket': bucket_name,
+            'Name': object_key
+        }
+    }
+
+    logger.info(f"Analyzing image with Rekognition ({', '.join(features)}): {bucket_name}/{object_key}")
+
+    # A single feature runs inline, no point paying for the thread hop
+    futures = {}
+    if len(features) > 1:
+        executor = executor or analysis_executor
+        futures = {feature: executor.submit(profiled_task(ANALYSIS_OPERATIONS[feature][0]), image) for feature in features}
+
+    results = {}
+    for feature in features:
+        try:
+            if feature in futures:
+                results[feature] = futures[feature].result()
+            else:
+                results[feature] = ANALYSIS_OPERATIONS[feature][0](image)
+        except Exception as e:
+            # One failed feature must not cost the others their results
+            logger.error(f"Error running {feature} analysis on {object_key}: {str(e)}")
+
+    if 'labels' in results:
+        logger.info(f"Detected {len(results['labels'])} labels for {object_key}")
+    return results
+
+def image_id_from_key(object_key):
+    """
+    Extract the image ID from an S3 key (format: images/img_TIMESTAMP.ext)
+    """
+    image_filename = object_key.split('/')[-1]  # Get filename from path
+    return image_filename.split('.')[0]         # Remove extension to get image ID
+
+def hash_image(image):
+    """
+    SHA-256 hex digest of a downloaded image, hashed straight from its buffer
+    """
+    try:
+        with image.view() as data:
+            return hashlib.sha256(data).hexdigest()
+    finally:
+        image.release()
+
+def render_derivatives(data, sizes, derivative_format, quality):
+    """
+    Decode the original once, then resize and encode each size; pure CPU work, run in the CPU pool
+
+    `data` is the image's bytes or the path of a file holding them, see ImageBuffer.portable()
+    """
+    image = Image.open(data if isinstance(data, str) else io.BytesIO(data))
+
+    sizes = sorted(sizes, key=lambda size: size[1], reverse=True)
+    if sizes:
+        # Let the JPEG decoder downscale by 1/2..1/8 while decoding instead of decoding full resolution
+        image.draft('RGB', (sizes[0][1], sizes[0][1]))
+    image = ImageOps.exif_transpose(image)
+
+    if derivative_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+
+    rendered = []
+    # Largest first, so each smaller size is resampled from the previous one rather than the original
+    for name, max_edge in sizes:
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=derivative_format, quality=quality)
+        rendered.append({
+            'name': name,
+            'body': buffer.getvalue(),
+            'width': image.width,
+            'height': image.height
+        })
+    return rendered
+
+def create_derivatives(bucket_name, object_key, image=None):
+    """
+    Resize the original into the configured sizes in memory and upload them under DERIVATIVE_PREFIX
+
+    Reads the original from `image`, an ImageBuffer shared with other stages, or downloads it itself
+    """
+    if Image is None:
+        logger.warning(f"Pillow is not available, skipping derivatives for {object_key}")
+        if image is not None:
+            image.release()
+        return {}
+
     try:
-        logger.info(f"Analyzing image with Rekognition: {bucket_name}/{object_key}")
-
-        response = rekognition_client.detect_labels(
-            Image={
-                'S3Object': {
-                    'Bucket': bucket_name,
-                    'Name': object_key
-                }
+        image = image or image_buffer.download(s3_client, bucket_name, object_key)
+        try:
+            # Inline the stage reads the buffer in place; worker processes get the bytearray or the /tmp file's path
+            if cpu_pool.workers:
+                data = image.portable()
+                rendered = cpu_pool.submit(
+                    render_derivatives, data, DERIVATIVE_SIZES, DERIVATIVE_FORMAT, DERIVATIVE_QUALITY
+                ).result()
+            else:
+                with image.view() as data:
+                    rendered = render_derivatives(data, DERIVATIVE_SIZES, DERIVATIVE_FORMAT, DERIVATIVE_QUALITY)
+        finally:
+            image.release()
+
+        extension = 'jpg' if DERIVATIVE_FORMAT == 'JPEG' else DERIVATIVE_FORMAT.lower()
+        content_type = f"image/{DERIVATIVE_FORMAT.lower()}"
+        image_id = image_id_from_key(object_key)
+
+        derivatives = {}
+        for derivative in rendered:
+            derivative_key = f"{DERIVATIVE_PREFIX}{derivative['name']}/{image_id}.{extension}"
+
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=derivative_key,
+                Body=derivative['body'],
+                ContentType=content_type
+            )
+
+            derivatives[derivative['name']] = {
+                'key': derivative_key,
+                'size': len(derivative['body']),
+                'width': derivative['width'],
+                'height': derivative['height']
+            }
+
+        logger.info(f"Created {len(derivatives)} derivatives for {object_key}")
+        return derivatives
+
+    except Exception as e:
+        logger.error(f"Error creating derivatives for {object_key}: {str(e)}")
+        return {}
+
+def encode_labels(labels):
+    """
+    Pack labels into a single string attribute with fixed-point confidences
+    """
+    packed = []
+    for label in labels:
+        name = label['Name'].replace(PACKED_LABEL_SEPARATOR, '/')
+        confidence = int((Decimal(str(label['Confidence'])) * 100).to_integral_value())
+        packed.append(f"{name}{PACKED_CONFIDENCE_SEPARATOR}{confidence}")
+    return PACKED_LABEL_SEPARATOR.join(packed)
+
+def decode_labels(item):
+    """
+    Read labels from an image item in either the list or the compact format
+    """
+    packed = item.get('labelsPacked')
+    if packed is None:
+        return item.get('labels', [])
+
+    labels = []
+    for entry in packed.split(PACKED_LABEL_SEPARATOR) if packed else []:
+        name, confidence = entry.rsplit(PACKED_CONFIDENCE_SEPARATOR, 1)
+        labels.append({
+            'Name': name,
+            'Confidence': Decimal(confidence) / 100
+        })
+    return labels
+
+def status_index_keys(status, image_id, processed_at):
+    """
+    Build the StatusProcessedIndex partition (status#day#shard) and sort (processedAt#imageId) keys
+    """
+    shard = zlib.crc32(image_id.encode('utf-8')) % STATUS_INDEX_SHARDS
+    status_bucket = STATUS_INDEX_SEPARATOR.join([status, processed_at[:10], str(shard)])
+    processed_key = STATUS_INDEX_SEPARATOR.join([processed_at, image_id])
+    return status_bucket, processed_key
+
+def mark_status_day(status, day):
+    """
+    Record that `day` has images with `status` in StatusProcessedIndex; written once per day by each container
+    """
+    if (status, day) in marked_status_days:
+        return
+    table.put_item(Item={'ImageId': f"{STATUS_DAYS_PREFIX}{status}", 'CreatedAt': day}, ReturnConsumedCapacity='TOTAL')
+    marked_status_days.add((status, day))
+
+def completion_feed_keys(completed_at, image_id):
+    """
+    Build the feed partition (minute) and sort (completedAt#imageId) keys of a completion
+    """
+    return completed_at[:16], STATUS_INDEX_SEPARATOR.join([completed_at, image_id])
+
+def append_completion(image_id, status, primary_label, completed_at=None):
+    """
+    Add a completion to the recent-completions feed; best effort, the image item is already updated
+    """
+    # Stamped in UTC before the writes, so readers only have to allow for their latency
+    completed_at = completed_at or datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+    feed_minute, feed_key = completion_feed_keys(completed_at, image_id)
+    try:
+        feed_table.put_item(
+            Item={
+                'FeedMinute': feed_minute,
+                'CompletedKey': feed_key,
+                'imageId': image_id,
+                'completionStatus': status,
+                'primaryLabel': primary_label,
+                'expiresAt': int(time.time()) + COMPLETION_FEED_TTL_HOURS * 3600
             },
-            MaxLabels=10,
-            MinConfidence=75.0
+            ReturnConsumedCapacity='TOTAL'
         )
-        
-        labels = []
-        for label in response['Labels']:
-            labels.append({
-                'Name': label['Name'],
-                'Confidence': Decimal(str(round(label['Confidence'], 2)))
-            })
-        
-        logger.info(f"Detected {len(labels)} labels for {object_key}")
-        return labels
-        
     except Exception as e:
-        logger.error(f"Error analyzing image {object_key}: {str(e)}")
-        return []
+        logger.error(f"Error appending {image_id} to the completion feed: {str(e)}")
 
-def store_image_metadata(bucket_name, object_key, s3_record, labels):
+def store_image_metadata(bucket_name, object_key, s3_record, labels, derivatives=None, analysis=None, content_hash=None):
     """
-    Update existing image metadata with recognition results
+    Update existing image metadata with recognition results, other analysis results and any derivatives
     """
     try:
-        # Extract image ID from S3 key (format: images/img_TIMESTAMP.ext)
-        image_filename = object_key.split('/')[-1]  # Get filename from path
-        image_id = image_filename.split('.')[0]     # Remove extension to get image ID
+        image_id = image_id_from_key(object_key)
         
         # Get object metadata
         s3_object = s3_record['s3']['object']
@@ -138,30 +716,96 @@ def store_image_metadata(bucket_name, object_key, s3_record, labels):
         # Extract primary label for GSI
         primary_label = labels[0]['Name'] if labels else 'unknown'
         
-        # Update the existing metadata record
+        # Write labels in the configured format and drop the other one, so each item holds exactly one
+        if LABEL_ENCODING == LABEL_ENCODING_COMPACT:
+            label_attribute, label_value, stale_label_attribute = 'labelsPacked', encode_labels(labels), 'labels'
+        else:
+            label_attribute, label_value, stale_label_attribute = 'labels', labels, 'labelsPacked'
+
+        status = STATUS_COMPLETED
+        # One clock for the item and its feed entry
+        processed_at = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        status_bucket, processed_key = status_index_keys(status, image_id, processed_at)
+        # Before the item gets its keys, so a listing never skips a day that has them
+        mark_status_day(status, processed_at[:10])
+
+        set_expression = ('SET #status = :status, #labels = :labels, #labelValue = :labelValue, #processedAt = :processedAt, '
+                          '#statusBucket = :statusBucket, #processedKey = :processedKey')
+        expression_attribute_names = {
+            '#status': 'status',
+            '#labels': label_attribute,
+            '#staleLabels': stale_label_attribute,
+            '#labelValue': 'LabelValue',
+            '#processedAt': 'ProcessedAt',
+            '#statusBucket': 'StatusBucket',
+            '#processedKey': 'ProcessedKey'
+        }
+        expression_attribute_values = {
+            ':status': status,
+            ':labels': label_value,
+            ':labelValue': primary_label,
+            ':processedAt': processed_at,
+            ':statusBucket': status_bucket,
+            ':processedKey': processed_key
+        }
+
+        # Results of the non-label analyses, failed ones are left as they were
+        for feature, result in (analysis or {}).items():
+            if feature == 'labels':
+                continue
+            attribute = ANALYSIS_OPERATIONS[feature][1]
+            set_expression += f", #{attribute} = :{attribute}"
+            expression_attribute_names[f"#{attribute}"] = attribute
+            expression_attribute_values[f":{attribute}"] = result
+
+        # Derivative keys go in the same write as the labels
+        if derivatives:
+            set_expression += ', #derivatives = :derivatives'
+            expression_attribute_names['#derivatives'] = 'derivatives'
+            expression_attribute_values[':derivatives'] = derivatives
+
+        if content_hash:
+            set_expression += ', #contentSha256 = :contentSha256'
+            expression_attribute_names['#contentSha256'] = 'contentSha256'
+            expression_attribute_values[':contentSha256'] = content_hash
+
+        # Update the existing metadata record, without creating one the API never wrote
+        condition = {'ConditionExpression': 'attribute_exists(ImageId)'} if orphans.REQUIRE_EXISTING_METADATA else {}
         response = table.update_item(
             Key={
                 'ImageId': image_id,
                 'CreatedAt': 'METADATA'
             },
-            UpdateExpression='SET #status = :status, #labels = :labels, #labelValue = :labelValue, #processedAt = :processedAt',
-            ExpressionAttributeNames={
-                '#status': 'status',
-                '#labels': 'labels',
-                '#labelValue': 'LabelValue',
-                '#processedAt': 'ProcessedAt'
-            },
-            ExpressionAttributeValues={
-                ':status': 'processed',
-                ':labels': labels,
-                ':labelValue': primary_label,
-                ':processedAt': datetime.now().isoformat()
-            },
-            ReturnValues='UPDATED_NEW'
+            UpdateExpression=f"{set_expression} REMOVE #staleLabels",
+            ExpressionAttributeNames=expression_attribute_names,
+            ExpressionAttributeValues=expression_attribute_values,
+            ReturnValues='UPDATED_NEW',
+            ReturnConsumedCapacity='TOTAL',
+            **condition
         )
         
         logger.info(f"Updated metadata for {image_id} with {len(labels)} labels")
         
+        if COMPLETION_FEED_ENABLED:
+            append_completion(image_id, status, primary_label, processed_at)
+        return processed_at
+        
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        # Raises OrphanRetryError while the API may still write the item, otherwise returns None
+        orphans.handle_orphan(image_id, bucket_name, object_key, s3_record)
+        return None
+        
     except Exception as e:
         logger.error(f"Error updating metadata for {object_key}: {str(e)}")
         raise e
+
+# Started last so the forked workers see every function above; only derivatives use it so far
+cpu_pool = (
+    process_pool.create_pool(int(CPU_POOL_WORKERS) if CPU_POOL_WORKERS else None)
+    if DERIVATIVES_ENABLED else process_pool.InlineExecutor()
+)
+# Twice the pool's workers, so one record's download and Rekognition calls overlap another's render
+RECORD_THREADS = max(1, 2 * cpu_pool.workers)
+record_executor = ThreadPoolExecutor(max_workers=RECORD_THREADS)
+# Shared across warm invocations; every record thread can run all of its image's operations side by side
+analysis_executor = ThreadPoolExecutor(max_workers=RECORD_THREADS * len(ANALYSIS_OPERATIONS))
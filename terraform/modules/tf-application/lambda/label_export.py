@@ -0,0 +1,143 @@
+import io
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+# pyarrow is not part of the Lambda runtime, it comes from a layer when the export is enabled
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+logger = logging.getLogger()
+
+# Processed results appended as Parquet under <prefix>date=YYYY-MM-DD/, off unless LABEL_EXPORT_ENABLED=true
+LABEL_EXPORT_ENABLED = os.environ.get('LABEL_EXPORT_ENABLED', 'false').lower() == 'true'
+LABEL_EXPORT_BUCKET = os.environ.get('LABEL_EXPORT_BUCKET', '')
+LABEL_EXPORT_PREFIX = os.environ.get('LABEL_EXPORT_PREFIX', 'analytics/labels/')
+
+# Partitions with at least this many files are merged into one by compact_partition
+LABEL_EXPORT_COMPACT_MIN_FILES = int(os.environ.get('LABEL_EXPORT_COMPACT_MIN_FILES', '8'))
+
+# One row per image and label; images without labels get a single row with a null label
+EXPORT_SCHEMA = pa.schema([
+    ('image_id', pa.string()),
+    ('processed_at', pa.timestamp('us')),
+    ('size', pa.int64()),
+    ('label', pa.string()),
+    ('confidence', pa.float32())
+]) if pa is not None else None
+
+def partition_prefix(day):
+    """
+    S3 prefix of one date partition, Hive style so Athena/Spark pick up `date` as a column
+    """
+    return f"{LABEL_EXPORT_PREFIX}date={day}/"
+
+class LabelExportBuffer:
+    """
+    Thread-safe row buffer written out as one Parquet file per date partition on flush
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, image_id, processed_at, size, labels):
+        processed = datetime.fromisoformat(processed_at)
+        rows = [
+            (image_id, processed, size, label['Name'], float(label['Confidence']))
+            for label in labels
+        ] or [(image_id, processed, size, None, None)]
+
+        with self._lock:
+            self._rows.extend(rows)
+
+    def clear(self):
+        with self._lock:
+            self._rows = []
+
+    def flush(self, s3_client, bucket_name=None):
+        """
+        Write buffered rows to S3 and empty the buffer, returns the keys written
+        """
+        with self._lock:
+            rows, self._rows = self._rows, []
+
+        if not rows:
+            return []
+        if pa is None:
+            logger.warning(f"pyarrow is not available, dropping {len(rows)} label export rows")
+            return []
+
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[1].date().isoformat(), []).append(row)
+
+        keys = []
+        for day, day_rows in sorted(by_day.items()):
+            key = f"{partition_prefix(day)}part-{datetime.now().strftime('%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet"
+            s3_client.put_object(
+                Bucket=bucket_name or LABEL_EXPORT_BUCKET,
+                Key=key,
+                Body=write_parquet(rows_to_table(day_rows))
+            )
+            keys.append(key)
+
+        logger.info(f"Exported {len(rows)} label rows to {len(keys)} files")
+        return keys
+
+def rows_to_table(rows):
+    columns = list(zip(*rows))
+    return pa.Table.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, EXPORT_SCHEMA)],
+        schema=EXPORT_SCHEMA
+    )
+
+def write_parquet(table):
+    buffer = io.BytesIO()
+    # Dictionary-encoded labels and zstd keep a day of rows at a few MB
+    pq.write_table(table, buffer, compression='zstd', use_dictionary=['image_id', 'label'])
+    return buffer.getvalue()
+
+def compact_partition(s3_client, day, bucket_name=None, min_files=None):
+    """
+    Merge the files of one date partition into a single file sorted by processed_at, returns its key
+    """
+    bucket_name = bucket_name or LABEL_EXPORT_BUCKET
+    min_files = min_files or LABEL_EXPORT_COMPACT_MIN_FILES
+    if pa is None:
+        logger.warning("pyarrow is not available, skipping label export compaction")
+        return None
+
+    keys = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=partition_prefix(day)):
+        keys.extend(obj['Key'] for obj in page.get('Contents', []) if obj['Key'].endswith('.parquet'))
+
+    if len(keys) < min_files:
+        return None
+
+    tables = [
+        pq.read_table(io.BytesIO(s3_client.get_object(Bucket=bucket_name, Key=key)['Body'].read()))
+        for key in keys
+    ]
+    table = pa.concat_tables(tables).sort_by('processed_at')
+
+    compacted_key = f"{partition_prefix(day)}compacted-{uuid.uuid4().hex[:8]}.parquet"
+    s3_client.put_object(Bucket=bucket_name, Key=compacted_key, Body=write_parquet(table))
+
+    # Delete only after the merged file exists; readers may briefly see rows twice, never lose them
+    for start in range(0, len(keys), 1000):
+        s3_client.delete_objects(
+            Bucket=bucket_name,
+            Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+        )
+
+    logger.info(f"Compacted {len(keys)} files ({table.num_rows} rows) into {compacted_key}")
+    return compacted_key
@@ -0,0 +1,28 @@
+import json
+import os
+import time
+
+METRIC_NAMESPACE = 'ImageRecognition'
+
+def emit_metric(values, properties=None, unit='Count'):
+    """
+    Publish metrics in CloudWatch embedded metric format: one JSON line on stdout, no API call needed
+
+    `values` maps metric names to values, all in `unit`, with FunctionName as the dimension; `properties`
+    are extra fields on the line, searchable in Logs Insights but not metrics.
+    """
+    line = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRIC_NAMESPACE,
+                'Dimensions': [['FunctionName']],
+                'Metrics': [{'Name': name, 'Unit': unit} for name in values]
+            }]
+        },
+        'FunctionName': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+        **(properties or {}),
+        **values
+    }
+    # Straight to stdout: CloudWatch only parses the line when it is bare JSON, without the log formatter's prefix
+    print(json.dumps(line), flush=True)
@@ -0,0 +1,88 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from boto3.dynamodb.conditions import Attr
+
+from metrics import emit_metric
+
+logger = logging.getLogger()
+
+# Refuse to create image items the API never wrote, on unless REQUIRE_EXISTING_METADATA=false
+REQUIRE_EXISTING_METADATA = os.environ.get('REQUIRE_EXISTING_METADATA', 'true').lower() == 'true'
+
+# The API uploads to S3 before it writes the METADATA item; events younger than this are retried, not quarantined
+ORPHAN_GRACE_SECONDS = int(os.environ.get('ORPHAN_GRACE_SECONDS', '300'))
+
+# Parallel scan segments used by the orphan cleanup
+ORPHAN_CLEANUP_SEGMENTS = int(os.environ.get('ORPHAN_CLEANUP_SEGMENTS', '8'))
+
+# Every item the API creates has an s3Key; METADATA items without one were created by the Lambda's own update
+ORPHAN_FILTER = Attr('CreatedAt').eq('METADATA') & Attr('s3Key').not_exists()
+
+class OrphanRetryError(Exception):
+    """
+    The image has no METADATA item yet, but its upload is recent enough that the API may still write it
+    """
+
+def event_age_seconds(s3_record):
+    """
+    Seconds since the S3 event, None when the record carries no eventTime
+    """
+    event_time = s3_record.get('eventTime')
+    if not event_time:
+        return None
+    # fromisoformat only accepts the trailing Z from Python 3.11
+    happened = datetime.fromisoformat(event_time.replace('Z', '+00:00'))
+    return (datetime.now(timezone.utc) - happened).total_seconds()
+
+def handle_orphan(image_id, bucket_name, object_key, s3_record):
+    """
+    Retry a recent orphan through SQS, quarantine an old one as a metric and a log record
+    """
+    age = event_age_seconds(s3_record)
+    if age is not None and age < ORPHAN_GRACE_SECONDS:
+        raise OrphanRetryError(f"No metadata for {image_id} yet, {object_key} uploaded {age:.0f}s ago")
+
+    emit_metric({'OrphanImages': 1}, {'imageId': image_id, 'bucket': bucket_name, 'objectKey': object_key})
+    logger.warning(f"Quarantined orphan image {image_id}: no METADATA item for {bucket_name}/{object_key}")
+
+def scan_segment(table, segment, total_segments, dry_run):
+    """
+    Find the orphans of one scan segment and delete them unless dry_run, returns their image IDs
+    """
+    found = []
+    scan_kwargs = {
+        'FilterExpression': ORPHAN_FILTER,
+        'ProjectionExpression': 'ImageId, CreatedAt',
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+
+    while True:
+        response = table.scan(**scan_kwargs)
+        for key in response.get('Items', []):
+            if not dry_run:
+                try:
+                    # Re-checked on delete, in case the API wrote the item after the scan read it
+                    table.delete_item(Key=key, ConditionExpression=ORPHAN_FILTER)
+                except table.meta.client.exceptions.ConditionalCheckFailedException:
+                    continue
+            found.append(key['ImageId'])
+
+        if 'LastEvaluatedKey' not in response:
+            return found
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def cleanup_orphans(table, segments=None, dry_run=True):
+    """
+    Find (and unless dry_run, delete) orphan image items with a parallel scan, returns their image IDs
+    """
+    segments = segments or ORPHAN_CLEANUP_SEGMENTS
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        results = executor.map(lambda segment: scan_segment(table, segment, segments, dry_run), range(segments))
+        image_ids = sorted(image_id for found in results for image_id in found)
+
+    logger.info(f"{'Found' if dry_run else 'Deleted'} {len(image_ids)} orphan image items in {segments} segments")
+    return image_ids
@@ -0,0 +1,253 @@
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+
+logger = logging.getLogger()
+
+# Lambda allocates one full vCPU per 1,769 MB of memory, up to 6 at 10,240 MB
+LAMBDA_MB_PER_VCPU = 1769
+
+def available_vcpus():
+    """
+    vCPUs this process can actually use; inside Lambda derived from the memory size, not /proc
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    memory_size = os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
+    if memory_size:
+        # Lambda reports at least 2 cores even when the CPU share is a fraction of one
+        cpus = min(cpus, max(1, math.ceil(int(memory_size) / LAMBDA_MB_PER_VCPU)))
+    return cpus
+
+def _worker_loop(connection):
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        function, args = task
+        try:
+            connection.send((True, function(*args)))
+        except Exception as e:
+            connection.send((False, (e, traceback.format_exc())))
+
+def _spawner_loop(connection):
+    # Forked before the parent had other threads, so no lock is held in here and none in the workers it forks
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+
+        parent_connection, child_connection = multiprocessing.Pipe()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            connection.close()
+            parent_connection.close()
+            try:
+                _worker_loop(child_connection)
+            finally:
+                os._exit(0)
+
+        child_connection.close()
+        connection.send(pid)
+        reduction.send_handle(connection, parent_connection.fileno(), os.getppid())
+        parent_connection.close()
+
+def _noop():
+    return None
+
+class WorkerProcess:
+    """
+    A worker forked by the spawner, which reaps it; enough of multiprocessing.Process to watch and stop it
+    """
+    def __init__(self, pid, name):
+        self.pid = pid
+        self.name = name
+
+    def is_alive(self):
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+    def join(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_alive() and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.01)
+
+    def kill(self):
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+class InlineExecutor:
+    """
+    Runs submitted work in the calling thread, for single-vCPU configurations
+    """
+    workers = 0
+
+    def submit(self, function, *args):
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self):
+        pass
+
+class PipeProcessPool:
+    """
+    Process pool over multiprocessing.Pipe only, since Lambda has no /dev/shm for Pool/Queue semaphores
+
+    Each worker process has a feeder thread in the parent that takes tasks from a shared in-process
+    queue, so idle workers pick up the next task. Functions and arguments must be picklable and
+    module-level; the workers are forked, so they see every module loaded before the pool started.
+    A worker that dies is replaced by its feeder, so one crash doesn't break every later task.
+
+    Workers are forked by a spawner process, itself forked when the pool starts. Forking straight from
+    a feeder thread would copy in any lock another thread (logging, boto3, the record executors) held
+    at that moment, and the new worker would deadlock on it.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self._tasks = queue.Queue()
+        self._processes = [None] * workers
+        self._feeders = []
+        self._context = multiprocessing.get_context('fork')
+
+        self._spawner_connection, child_connection = self._context.Pipe()
+        self._spawner_lock = threading.Lock()
+        self._spawner = self._context.Process(
+            target=_spawner_loop, args=(child_connection,), name='cpu-pool-spawner', daemon=True
+        )
+        self._spawner.start()
+        child_connection.close()
+
+        for i in range(workers):
+            connection = self._start_worker(i)
+            feeder = threading.Thread(target=self._feed, args=(i, connection), name=f"cpu-pool-feeder-{i}", daemon=True)
+            feeder.start()
+            self._feeders.append(feeder)
+
+    def _start_worker(self, slot):
+        # Feeders restart workers concurrently; each request/reply must stay paired
+        with self._spawner_lock:
+            self._spawner_connection.send('start')
+            pid = self._spawner_connection.recv()
+            connection = Connection(reduction.recv_handle(self._spawner_connection))
+        self._processes[slot] = WorkerProcess(pid, f"cpu-pool-{slot}")
+        return connection
+
+    def _restart_worker(self, slot, connection):
+        connection.close()
+        process = self._processes[slot]
+        process.join(timeout=1)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        logger.warning(f"CPU pool worker {process.name} (pid {process.pid}) exited, starting a new one")
+        return self._start_worker(slot)
+
+    def submit(self, function, *args):
+        future = Future()
+        self._tasks.put((future, function, args))
+        return future
+
+    def warm(self):
+        """
+        Round-trip a no-op through every worker so the first real task doesn't pay for process start-up
+        """
+        for future in [self.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def _feed(self, slot, connection):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                connection.close()
+                return
+
+            future, function, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                try:
+                    connection.send((function, args))
+                except (BrokenPipeError, ConnectionResetError):
+                    # The worker died since its last task, this one never reached it
+                    connection = self._restart_worker(slot, connection)
+                    connection.send((function, args))
+            except (BrokenPipeError, ConnectionResetError) as e:
+                # Its replacement died before taking the task
+                connection = self._restart_worker(slot, connection)
+                future.set_exception(e)
+                continue
+            except Exception as e:
+                # Pickling failed before anything was sent, the worker is still usable
+                future.set_exception(e)
+                continue
+
+            try:
+                ok, result = connection.recv()
+            except Exception as e:
+                # The worker died while running the task, or its reply couldn't be read back, which leaves the
+                # pipe out of step with it; fail only this task and carry on with a new worker
+                connection = self._restart_worker(slot, connection)
+                future.set_exception(e)
+                continue
+
+            if ok:
+                future.set_result(result)
+            else:
+                error, remote_traceback = result
+                logger.error(f"Error in CPU pool task {getattr(function, '__name__', function)}: {remote_traceback}")
+                future.set_exception(error)
+
+    def shutdown(self):
+        for _ in self._feeders:
+            self._tasks.put(None)
+        for feeder in self._feeders:
+            feeder.join()
+        for process in self._processes:
+            process.join(timeout=5)
+        self._spawner_connection.send(None)
+        self._spawner_connection.close()
+        self._spawner.join(timeout=5)
+
+def create_pool(workers=None):
+    """
+    Start and warm a pool sized to the available vCPUs, or an inline executor when there is only one
+    """
+    workers = available_vcpus() if workers is None else workers
+    if workers <= 1:
+        logger.info("CPU pool disabled: running CPU stages inline")
+        return InlineExecutor()
+
+    pool = PipeProcessPool(workers)
+    pool.warm()
+    logger.info(f"CPU pool started with {workers} worker processes")
+    return pool
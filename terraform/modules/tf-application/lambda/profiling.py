@@ -0,0 +1,291 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+
+import boto3
+
+logger = logging.getLogger()
+
+# Off unless PROFILING_ENABLED=true; when off the handler is returned unwrapped
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+
+# Fraction of invocations run under cProfile + tracemalloc, always reported
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0.01'))
+
+# Every other invocation runs under the stack sampler and is reported only above this duration (0 disables)
+PROFILING_THRESHOLD_MS = float(os.environ.get('PROFILING_THRESHOLD_MS', '0'))
+PROFILING_INTERVAL_MS = float(os.environ.get('PROFILING_INTERVAL_MS', '5'))
+
+PROFILING_TOP_N = int(os.environ.get('PROFILING_TOP_N', '15'))
+
+# Optional copy of each summary in S3, key: <prefix><YYYY-MM-DD>/<request id>.json
+PROFILING_S3_BUCKET = os.environ.get('PROFILING_S3_BUCKET', '')
+PROFILING_S3_PREFIX = os.environ.get('PROFILING_S3_PREFIX', 'profiles/')
+
+_s3_client = None
+
+# Standard library frames; a thread whose whole stack lies here is an idle pool or runtime thread
+STDLIB_DIR = os.path.dirname(threading.__file__)
+
+# cProfile runs of the sampled invocation in progress, None outside one
+_active_profiles = None
+_active_profiles_lock = threading.Lock()
+
+def frame_label(filename, line, function):
+    """
+    Short "function (dir/file.py:line)" label for a code location
+    """
+    short_name = '/'.join(filename.split('/')[-2:])
+    return f"{function} ({short_name}:{line})"
+
+def is_library_frame(filename):
+    return filename.startswith(STDLIB_DIR) and 'site-packages' not in filename
+
+def is_idle(frame):
+    """
+    Whether a thread is only waiting in the standard library, e.g. an executor thread with no task
+    """
+    while frame is not None:
+        if not is_library_frame(frame.f_code.co_filename):
+            return False
+        frame = frame.f_back
+    return True
+
+class StackSampler:
+    """
+    Samples the stacks of all busy threads from a background thread; cheap enough to leave on for every invocation
+
+    Times are summed over threads, so work spread over the record and analysis executors adds up.
+    """
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self.samples = 0
+        self.inclusive = Counter()
+        self.exclusive = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id and not is_idle(frame):
+                    self._record(frame)
+
+    def _record(self, frame):
+        self.exclusive[frame_label(frame.f_code.co_filename, frame.f_code.co_firstlineno, frame.f_code.co_name)] += 1
+
+        # Count each function once per thread and sample, however deep it recurses
+        seen = set()
+        while frame is not None:
+            label = frame_label(frame.f_code.co_filename, frame.f_code.co_firstlineno, frame.f_code.co_name)
+            if label not in seen:
+                seen.add(label)
+                self.inclusive[label] += 1
+            frame = frame.f_back
+
+    def summary(self, top_n):
+        interval_ms = self.interval_seconds * 1000
+        return {
+            'samples': self.samples,
+            'interval_ms': interval_ms,
+            'top': [
+                {
+                    'function': label,
+                    'ms': round(count * interval_ms, 1),
+                    'self_ms': round(self.exclusive[label] * interval_ms, 1)
+                }
+                for label, count in self.inclusive.most_common(top_n)
+            ]
+        }
+
+class PeakSnapshotter:
+    """
+    Snapshots tracemalloc from a background thread whenever traced memory reaches a new high
+
+    A snapshot taken after the handler returns only shows what is still alive; this one shows what was alive at the peak.
+    """
+    def __init__(self, interval_seconds):
+        self.interval_seconds = interval_seconds
+        self.snapshot = None
+        self.snapshot_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        # Memory can still peak after the last poll
+        self._take_if_higher()
+        return self.snapshot
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self._take_if_higher()
+
+    def _take_if_higher(self):
+        current_bytes = tracemalloc.get_traced_memory()[0]
+        if self.snapshot is None or current_bytes > self.snapshot_bytes:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_bytes = current_bytes
+
+def profiled_task(task):
+    """
+    Run an executor task under its own cProfile during a sampled invocation, merged into the invocation's profile
+
+    cProfile only sees the thread that enables it, and executor threads outlive any one invocation.
+    """
+    @wraps(task)
+    def wrapper(*args, **kwargs):
+        # Inline on the handler's thread the invocation's profiler already sees it
+        if _active_profiles is None or sys.getprofile() is not None:
+            return task(*args, **kwargs)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return task(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with _active_profiles_lock:
+                if _active_profiles is not None:
+                    _active_profiles.append(profiler)
+
+    return wrapper
+
+def cprofile_summary(profilers, top_n):
+    """
+    Top functions by cumulative time over all the profiled threads
+    """
+    stats = pstats.Stats(*profilers).stats
+    ordered = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            'function': frame_label(filename, line, function),
+            'calls': total_calls,
+            'tottime_ms': round(total_time * 1000, 2),
+            'cumtime_ms': round(cumulative_time * 1000, 2)
+        }
+        for (filename, line, function), (_, total_calls, total_time, cumulative_time, _) in ordered[:top_n]
+    ]
+
+def tracemalloc_summary(snapshot, snapshot_bytes, peak_bytes, top_n):
+    """
+    Peak traced memory and the largest allocation sites in the snapshot closest to it
+    """
+    # Leave out what tracemalloc itself allocated while snapshotting
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    return {
+        'peak_kb': round(peak_bytes / 1024, 1),
+        'snapshot_kb': round(snapshot_bytes / 1024, 1),
+        'top': [
+            {
+                'site': f"{'/'.join(stat.traceback[0].filename.split('/')[-2:])}:{stat.traceback[0].lineno}",
+                'size_kb': round(stat.size / 1024, 1),
+                'count': stat.count
+            }
+            for stat in snapshot.statistics('lineno')[:top_n]
+        ]
+    }
+
+def emit_profile(summary, context):
+    """
+    Log the profile summary as one JSON line and copy it to S3 if configured
+    """
+    request_id = getattr(context, 'aws_request_id', None) or str(uuid.uuid4())
+    summary = {'request_id': request_id, **summary}
+    body = json.dumps(summary, separators=(',', ':'))
+    logger.info(f"Profile summary: {body}")
+
+    if not PROFILING_S3_BUCKET:
+        return
+
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3')
+
+    key = f"{PROFILING_S3_PREFIX}{datetime.now().strftime('%Y-%m-%d')}/{request_id}.json"
+    _s3_client.put_object(Bucket=PROFILING_S3_BUCKET, Key=key, Body=body, ContentType='application/json')
+
+def profiled(handler):
+    """
+    Wrap a Lambda handler with sampled cProfile/tracemalloc profiling and slow-invocation stack sampling
+    """
+    if not PROFILING_ENABLED:
+        return handler
+
+    @wraps(handler)
+    def wrapper(event, context):
+        sampled = random.random() < PROFILING_SAMPLE_RATE
+        if not sampled and PROFILING_THRESHOLD_MS <= 0:
+            return handler(event, context)
+
+        global _active_profiles
+        profiler = sampler = snapshotter = None
+        if sampled:
+            tracemalloc.start()
+            snapshotter = PeakSnapshotter(PROFILING_INTERVAL_MS / 1000)
+            snapshotter.start()
+            profiler = cProfile.Profile()
+            _active_profiles = [profiler]
+            profiler.enable()
+        else:
+            sampler = StackSampler(PROFILING_INTERVAL_MS / 1000)
+            sampler.start()
+
+        started = time.perf_counter()
+        try:
+            return handler(event, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+
+            # Profiling must never fail or mask the outcome of the invocation
+            try:
+                if profiler is not None:
+                    profiler.disable()
+                    with _active_profiles_lock:
+                        profilers, _active_profiles = _active_profiles, None
+                    peak_bytes = tracemalloc.get_traced_memory()[1]
+                    snapshot = snapshotter.stop()
+                    tracemalloc.stop()
+                    emit_profile({
+                        'mode': 'sampled',
+                        'duration_ms': round(duration_ms, 1),
+                        'functions': cprofile_summary(profilers, PROFILING_TOP_N),
+                        'memory': tracemalloc_summary(snapshot, snapshotter.snapshot_bytes, peak_bytes, PROFILING_TOP_N)
+                    }, context)
+                else:
+                    sampler.stop()
+                    if duration_ms >= PROFILING_THRESHOLD_MS:
+                        emit_profile({
+                            'mode': 'slow',
+                            'duration_ms': round(duration_ms, 1),
+                            'threshold_ms': PROFILING_THRESHOLD_MS,
+                            'stacks': sampler.summary(PROFILING_TOP_N)
+                        }, context)
+            except Exception as e:
+                logger.error(f"Error writing profile summary: {str(e)}")
+
+    return wrapper
@@ -0,0 +1,238 @@
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+import cost_accounting
+import index
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Environment variables
+SQS_QUEUE_URL = os.environ.get('SQS_QUEUE_URL')
+WORKER_POLLERS = int(os.environ.get('WORKER_POLLERS', '2'))
+WORKER_THREADS = int(os.environ.get('WORKER_THREADS', '8'))
+# Pollers block once this many received messages wait for a worker thread
+WORKER_QUEUE_SIZE = int(os.environ.get('WORKER_QUEUE_SIZE', '20'))
+# Should match the queue's visibility timeout; messages still in flight after half of it are extended
+WORKER_VISIBILITY_TIMEOUT = int(os.environ.get('WORKER_VISIBILITY_TIMEOUT', '300'))
+
+# SQS long-poll and batch limits
+RECEIVE_WAIT_TIME_SECONDS = 20
+RECEIVE_MAX_MESSAGES = 10
+SQS_BATCH_SIZE = 10
+HOUSEKEEPING_INTERVAL_SECONDS = 1.0
+# Label export rows are written at this interval rather than per batch
+LABEL_EXPORT_FLUSH_SECONDS = 60
+
+class SqsWorker:
+    """
+    Long-running SQS consumer running the Lambda's parse/analyze/store steps outside Lambda
+    """
+    def __init__(self, queue_url, sqs_client=None, pollers=WORKER_POLLERS, threads=WORKER_THREADS,
+                 queue_size=WORKER_QUEUE_SIZE, visibility_timeout=WORKER_VISIBILITY_TIMEOUT,
+                 wait_time_seconds=RECEIVE_WAIT_TIME_SECONDS):
+        self.queue_url = queue_url
+        self.sqs_client = sqs_client or boto3.client('sqs')
+        self.pollers = pollers
+        self.threads = threads
+        self.visibility_timeout = visibility_timeout
+        self.wait_time_seconds = wait_time_seconds
+
+        self.stopping = threading.Event()
+        self.processed = 0
+        self.failed = 0
+
+        # Sized so every worker thread can run all of its image's Rekognition calls at once
+        self.analysis_executor = ThreadPoolExecutor(
+            max_workers=threads * len(index.ANALYSIS_OPERATIONS), thread_name_prefix='analysis'
+        )
+
+        self._work = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        # Receipt handle -> time its visibility was last set, for every message received and not yet settled
+        self._in_flight = {}
+        self._to_delete = []
+
+    def stop(self, *args):
+        """
+        Stop polling, let running messages finish and hand queued ones back to SQS
+        """
+        if not self.stopping.is_set():
+            logger.info("Worker stopping")
+            self.stopping.set()
+
+    def run(self):
+        """
+        Poll and process until stop() is called, then drain and return
+        """
+        pollers = [threading.Thread(target=self._poll, name=f"poller-{i}") for i in range(self.pollers)]
+        workers = [threading.Thread(target=self._work_loop, name=f"worker-{i}") for i in range(self.threads)]
+        for thread in pollers + workers:
+            thread.start()
+
+        logger.info(f"Worker started with {self.pollers} pollers and {self.threads} threads on {self.queue_url}")
+
+        export_flushed_at = time.monotonic()
+        while not self.stopping.wait(HOUSEKEEPING_INTERVAL_SECONDS):
+            self._flush_deletes()
+            self._extend_visibility()
+            if time.monotonic() - export_flushed_at >= LABEL_EXPORT_FLUSH_SECONDS:
+                index.flush_label_export()
+                export_flushed_at = time.monotonic()
+
+        for thread in pollers + workers:
+            thread.join()
+
+        self._release_queued()
+        self._flush_deletes()
+        self.analysis_executor.shutdown()
+        index.flush_label_export()
+        logger.info(f"Worker stopped: {self.processed} messages processed, {self.failed} failed")
+        if cost_accounting.COST_ACCOUNTING_ENABLED:
+            # The worker never resets the counters, so this covers its whole run
+            cost_accounting.emit_summary({'messages': self.processed + self.failed, **index.invocation_costs.summary()}, None)
+
+    def _poll(self):
+        while not self.stopping.is_set():
+            try:
+                response = self.sqs_client.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=RECEIVE_MAX_MESSAGES,
+                    WaitTimeSeconds=self.wait_time_seconds,
+                    VisibilityTimeout=self.visibility_timeout
+                )
+            except Exception as e:
+                logger.error(f"Error receiving messages: {str(e)}")
+                self.stopping.wait(1.0)
+                continue
+
+            for message in response.get('Messages', []):
+                with self._lock:
+                    self._in_flight[message['ReceiptHandle']] = time.monotonic()
+                self._enqueue(message)
+
+    def _enqueue(self, message):
+        # Blocking here is the backpressure: no new receives while the workers are saturated
+        while True:
+            try:
+                self._work.put(message, timeout=HOUSEKEEPING_INTERVAL_SECONDS)
+                return
+            except queue.Full:
+                if self.stopping.is_set():
+                    self._release([message])
+                    return
+
+    def _work_loop(self):
+        while not self.stopping.is_set():
+            try:
+                message = self._work.get(timeout=HOUSEKEEPING_INTERVAL_SECONDS)
+            except queue.Empty:
+                continue
+            self._process(message)
+
+    def _process(self, message):
+        try:
+            s3_event = index.parse_message_body(message['Body'])
+            for s3_record in (s3_event or {}).get('Records', []):
+                index.process_s3_record(s3_record, executor=self.analysis_executor)
+        except Exception as e:
+            # Left in flight: SQS redelivers it after the visibility timeout and the DLQ catches repeats
+            logger.error(f"Error processing message {message['MessageId']}: {str(e)}")
+            with self._lock:
+                self._in_flight.pop(message['ReceiptHandle'], None)
+                self.failed += 1
+            return
+
+        with self._lock:
+            self._in_flight.pop(message['ReceiptHandle'], None)
+            self._to_delete.append(message['ReceiptHandle'])
+            self.processed += 1
+            flush = len(self._to_delete) >= SQS_BATCH_SIZE
+        if flush:
+            self._flush_deletes()
+
+    def _flush_deletes(self):
+        with self._lock:
+            receipt_handles, self._to_delete = self._to_delete, []
+
+        for start in range(0, len(receipt_handles), SQS_BATCH_SIZE):
+            batch = receipt_handles[start:start + SQS_BATCH_SIZE]
+            try:
+                response = self.sqs_client.delete_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[{'Id': str(i), 'ReceiptHandle': handle} for i, handle in enumerate(batch)]
+                )
+                for failure in response.get('Failed', []):
+                    logger.error(f"Error deleting message: {failure.get('Code')} {failure.get('Message', '')}")
+            except Exception as e:
+                logger.error(f"Error deleting {len(batch)} messages: {str(e)}")
+
+    def _extend_visibility(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                handle for handle, extended_at in self._in_flight.items()
+                if now - extended_at >= self.visibility_timeout / 2
+            ]
+            for handle in due:
+                self._in_flight[handle] = now
+
+        self._change_visibility(due, self.visibility_timeout)
+
+    def _release_queued(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self._work.get_nowait())
+            except queue.Empty:
+                break
+        self._release(messages)
+
+    def _release(self, messages):
+        """
+        Make messages visible again right away instead of after the visibility timeout
+        """
+        with self._lock:
+            for message in messages:
+                self._in_flight.pop(message['ReceiptHandle'], None)
+        self._change_visibility([message['ReceiptHandle'] for message in messages], 0)
+
+    def _change_visibility(self, receipt_handles, visibility_timeout):
+        for start in range(0, len(receipt_handles), SQS_BATCH_SIZE):
+            batch = receipt_handles[start:start + SQS_BATCH_SIZE]
+            try:
+                self.sqs_client.change_message_visibility_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {'Id': str(i), 'ReceiptHandle': handle, 'VisibilityTimeout': visibility_timeout}
+                        for i, handle in enumerate(batch)
+                    ]
+                )
+            except Exception as e:
+                logger.error(f"Error changing visibility of {len(batch)} messages: {str(e)}")
+
+def main():
+    """
+    Entry point for running the worker as a container, e.g. an ECS service
+    """
+    # Outside Lambda nothing installs a log handler for us
+    logging.basicConfig(format='%(asctime)s %(levelname)s %(threadName)s %(message)s')
+
+    if not SQS_QUEUE_URL:
+        raise SystemExit("SQS_QUEUE_URL environment variable is not set")
+
+    worker = SqsWorker(SQS_QUEUE_URL)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+if __name__ == '__main__':
+    main()
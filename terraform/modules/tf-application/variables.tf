@@ -61,6 +61,16 @@ variable "dynamodb_table_arn" {
   description = "DynamoDB table ARN from tf-environment module"
 }
 
+variable "completion_feed_table_name" {
+  type        = string
+  description = "Completion feed DynamoDB table name from tf-environment module"
+}
+
+variable "completion_feed_table_arn" {
+  type        = string
+  description = "Completion feed DynamoDB table ARN from tf-environment module"
+}
+
 variable "lambda_security_group_id" {
   type        = string
   description = "Lambda security group ID from tf-environment module"
@@ -101,3 +111,161 @@ variable "security_group_ids" {
   type        = list(string)
   default     = []
 }
+
+variable "lambda_memory_size" {
+  type        = number
+  description = "Memory for the recognition Lambda in MB; CPU scales with it (one vCPU per 1,769 MB) and sizes its CPU pool"
+  default     = 512
+
+  validation {
+    condition     = var.lambda_memory_size >= 128 && var.lambda_memory_size <= 10240
+    error_message = "Lambda memory size must be between 128 and 10240 MB."
+  }
+}
+
+variable "label_encoding" {
+  type        = string
+  description = "How the recognition Lambda stores labels: list (Name/Confidence maps) or compact (packed string)"
+  default     = "list"
+
+  validation {
+    condition     = contains(["list", "compact"], var.label_encoding)
+    error_message = "Label encoding must be list or compact."
+  }
+}
+
+variable "status_index_shard_count" {
+  type        = number
+  description = "Number of shards per status and day in the StatusProcessedIndex partition key"
+  default     = 4
+
+  validation {
+    condition     = var.status_index_shard_count >= 1
+    error_message = "Status index shard count must be at least 1."
+  }
+}
+
+variable "analysis_features" {
+  type        = list(string)
+  description = "Rekognition analyses the recognition Lambda runs concurrently per image: labels, moderation, text, faces"
+  default     = ["labels"]
+
+  validation {
+    condition     = length(var.analysis_features) > 0 && alltrue([for feature in var.analysis_features : contains(["labels", "moderation", "text", "faces"], feature)])
+    error_message = "Analysis features must be a non-empty subset of labels, moderation, text and faces."
+  }
+}
+
+variable "derivatives_enabled" {
+  type        = bool
+  description = "Whether the recognition Lambda writes thumbnail/preview copies of each image (needs a Pillow layer)"
+  default     = false
+}
+
+variable "derivative_sizes" {
+  type        = map(number)
+  description = "Derivative name to maximum edge length in pixels"
+  default = {
+    thumbnail = 256
+    preview   = 1024
+  }
+}
+
+variable "derivative_format" {
+  type        = string
+  description = "Image format of the derivatives: WEBP or JPEG"
+  default     = "WEBP"
+
+  validation {
+    condition     = contains(["WEBP", "JPEG"], var.derivative_format)
+    error_message = "Derivative format must be WEBP or JPEG."
+  }
+}
+
+variable "derivative_prefix" {
+  type        = string
+  description = "S3 key prefix the derivatives are written under, outside the images/ notification prefix"
+  default     = "derivatives/"
+}
+
+variable "content_hash_enabled" {
+  type        = bool
+  description = "Whether the recognition Lambda stores the SHA-256 of each original as contentSha256"
+  default     = false
+}
+
+variable "lambda_layer_arns" {
+  type        = list(string)
+  description = "Lambda layer ARNs for the recognition function, e.g. a Pillow layer when derivatives are enabled"
+  default     = []
+}
+
+variable "profiling_enabled" {
+  type        = bool
+  description = "Whether the recognition Lambda profiles sampled and slow invocations"
+  default     = false
+}
+
+variable "profiling_sample_rate" {
+  type        = number
+  description = "Fraction of invocations profiled with cProfile and tracemalloc when profiling is enabled"
+  default     = 0.01
+
+  validation {
+    condition     = var.profiling_sample_rate >= 0 && var.profiling_sample_rate <= 1
+    error_message = "Profiling sample rate must be between 0 and 1."
+  }
+}
+
+variable "profiling_threshold_ms" {
+  type        = number
+  description = "Invocations slower than this are reported with a stack-sampler profile (0 disables)"
+  default     = 0
+}
+
+variable "profiling_to_s3" {
+  type        = bool
+  description = "Whether profile summaries are also written to the images bucket under profiles/"
+  default     = false
+}
+
+variable "label_export_enabled" {
+  type        = bool
+  description = "Whether the recognition Lambda appends processed labels to a Parquet dataset under analytics/labels/ (needs a pyarrow layer)"
+  default     = false
+}
+
+variable "label_export_compaction_schedule" {
+  type        = string
+  description = "EventBridge schedule expression for compacting recent label export partitions"
+  default     = "rate(1 hour)"
+}
+
+variable "cost_accounting_enabled" {
+  type        = bool
+  description = "Whether the recognition Lambda logs an invocation summary of AWS calls, DynamoDB capacity units and bytes transferred"
+  default     = true
+}
+
+variable "require_existing_metadata" {
+  type        = bool
+  description = "Whether the recognition Lambda only updates images whose METADATA item exists, quarantining orphans instead of creating partial items"
+  default     = true
+}
+
+variable "completion_feed_enabled" {
+  type        = bool
+  description = "Whether the recognition Lambda appends each finished image to the per-minute recent-completions feed"
+  default     = true
+}
+
+variable "completion_feed_ttl_hours" {
+  type        = number
+  description = "Hours a completion feed item is kept before the table's TTL removes it"
+  default     = 24
+
+  validation {
+    condition     = var.completion_feed_ttl_hours >= 1
+    error_message = "Completion feed TTL must be at least 1 hour."
+  }
+}
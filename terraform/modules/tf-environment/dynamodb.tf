@@ -45,6 +45,25 @@ resource "aws_dynamodb_table" "image_recognition_table" {
     projection_type = "ALL"
   }
 
+  # Sparse index written by the recognition Lambda: StatusBucket is status#day#shard,
+  # ProcessedKey is processedAt#imageId, so listings are bounded Queries instead of Scans
+  attribute {
+    name = "StatusBucket"
+    type = "S"
+  }
+
+  attribute {
+    name = "ProcessedKey"
+    type = "S"
+  }
+
+  global_secondary_index {
+    name            = "StatusProcessedIndex"
+    hash_key        = "StatusBucket"
+    range_key       = "ProcessedKey"
+    projection_type = "ALL"
+  }
+
   # Enable server-side encryption
   server_side_encryption {
     enabled = true
@@ -63,3 +82,41 @@ resource "aws_dynamodb_table" "image_recognition_table" {
     Environment = var.environment
   }
 }
+
+# Recent-completions feed written by the recognition Lambda: one small item per finished image,
+# partitioned by UTC minute. Kept out of the image table so its Scans don't read feed items.
+resource "aws_dynamodb_table" "completion_feed_table" {
+  name         = "${var.project_name}-${var.environment}-completion-feed"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "FeedMinute"
+  range_key    = "CompletedKey"
+
+  # YYYY-MM-DDTHH:MM (UTC)
+  attribute {
+    name = "FeedMinute"
+    type = "S"
+  }
+
+  # completedAt#imageId
+  attribute {
+    name = "CompletedKey"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = true
+  }
+
+  deletion_protection_enabled = false
+
+  tags = {
+    Name        = "${var.project_name}-${var.environment}-completion-feed"
+    Project     = var.project_name
+    Environment = var.environment
+  }
+}
@@ -33,6 +33,16 @@ output "dynamodb_table_arn" {
   value       = aws_dynamodb_table.image_recognition_table.arn
 }
 
+output "completion_feed_table_name" {
+  description = "Name of the DynamoDB table for the recent-completions feed"
+  value       = aws_dynamodb_table.completion_feed_table.name
+}
+
+output "completion_feed_table_arn" {
+  description = "ARN of the DynamoDB table for the recent-completions feed"
+  value       = aws_dynamodb_table.completion_feed_table.arn
+}
+
 
 output "vpc_id" {
   value       = aws_vpc.this.id
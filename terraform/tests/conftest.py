@@ -0,0 +1,6 @@
+pytest_plugins = [
+    "tests.fixtures.terraform_outputs",
+    "tests.fixtures.terraform_plan",
+    "tests.fixtures.moto_server",
+    "tests.fixtures.lambda_handler",
+]
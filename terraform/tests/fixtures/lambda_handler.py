@@ -0,0 +1,115 @@
+import pytest
+import boto3
+from types import ModuleType
+from typing import Callable
+from tests.utils.lambda_loader import load_lambda_module
+from tests.utils.aws_standin import AwsStandIn
+
+
+@pytest.fixture(scope="session")
+def lambda_module() -> ModuleType:
+    return load_lambda_module()
+
+
+@pytest.fixture(scope="session")
+def lambda_submodule() -> Callable[[str], ModuleType]:
+    """
+    Loader for the handler's helper modules, e.g. lambda_submodule("worker")
+    """
+    return load_lambda_module
+
+
+@pytest.fixture
+def completion_feed_table(lambda_module, aws_region, expected_resource_names, namespaced, monkeypatch):
+    """
+    Completion feed table shaped like dynamodb.tf, wired into the handler in place of the real one
+    """
+    dynamodb = boto3.resource("dynamodb", region_name=aws_region)
+    table = dynamodb.create_table(
+        TableName=namespaced(expected_resource_names["completion_feed_table"]),
+        KeySchema=[
+            {"AttributeName": "FeedMinute", "KeyType": "HASH"},
+            {"AttributeName": "CompletedKey", "KeyType": "RANGE"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "FeedMinute", "AttributeType": "S"},
+            {"AttributeName": "CompletedKey", "AttributeType": "S"}
+        ],
+        BillingMode="PAY_PER_REQUEST"
+    )
+
+    monkeypatch.setattr(lambda_module, "feed_table", table)
+    return table
+
+
+@pytest.fixture
+def image_table(lambda_module, aws_region, expected_resource_names, namespaced, monkeypatch, completion_feed_table):
+    """
+    Image table shaped like dynamodb.tf, wired into the handler in place of the real one
+    """
+    dynamodb = boto3.resource("dynamodb", region_name=aws_region)
+    table = dynamodb.create_table(
+        TableName=namespaced(expected_resource_names["dynamodb_table"]),
+        KeySchema=[
+            {"AttributeName": "ImageId", "KeyType": "HASH"},
+            {"AttributeName": "CreatedAt", "KeyType": "RANGE"}
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "ImageId", "AttributeType": "S"},
+            {"AttributeName": "CreatedAt", "AttributeType": "S"},
+            {"AttributeName": "StatusBucket", "AttributeType": "S"},
+            {"AttributeName": "ProcessedKey", "AttributeType": "S"}
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "StatusProcessedIndex",
+                "KeySchema": [
+                    {"AttributeName": "StatusBucket", "KeyType": "HASH"},
+                    {"AttributeName": "ProcessedKey", "KeyType": "RANGE"}
+                ],
+                "Projection": {"ProjectionType": "ALL"}
+            }
+        ],
+        BillingMode="PAY_PER_REQUEST"
+    )
+
+    monkeypatch.setattr(lambda_module, "table", table)
+    # A new table has no day markers, whatever earlier tests wrote
+    monkeypatch.setattr(lambda_module, "marked_status_days", set())
+    return table
+
+
+@pytest.fixture
+def image_bucket(lambda_module, aws_region, expected_resource_names, namespaced, monkeypatch) -> str:
+    """
+    Images bucket wired into the handler in place of the real one, returns its name
+    """
+    s3_client = boto3.client("s3", region_name=aws_region)
+    bucket_name = namespaced(expected_resource_names["s3_bucket"], max_length=63)
+    s3_client.create_bucket(Bucket=bucket_name)
+
+    monkeypatch.setattr(lambda_module, "s3_client", s3_client)
+    return bucket_name
+
+
+@pytest.fixture
+def aws_standin(lambda_module, expected_resource_names, monkeypatch) -> AwsStandIn:
+    """
+    Fixture-backed Rekognition, S3 and DynamoDB clients wired into the handler, with no faults configured
+    """
+    standin = AwsStandIn(seed=0)
+    monkeypatch.setattr(lambda_module, "rekognition_client", standin.client("rekognition"))
+    monkeypatch.setattr(lambda_module, "s3_client", standin.client("s3"))
+    monkeypatch.setattr(lambda_module, "table", standin.table(expected_resource_names["dynamodb_table"]))
+    monkeypatch.setattr(lambda_module, "feed_table", standin.table(expected_resource_names["completion_feed_table"]))
+    monkeypatch.setattr(lambda_module, "marked_status_days", set())
+    return standin
+
+
+def s3_record(object_key: str, bucket_name: str = "image-recognition-api-dev-images-000000000000", size: int = 204800):
+    return {
+        "s3": {
+            "bucket": {"name": bucket_name},
+            "object": {"key": object_key, "size": size, "eTag": "0123456789abcdef"}
+        }
+    }
@@ -0,0 +1,112 @@
+import pytest
+import hashlib
+import socket
+from contextlib import ExitStack
+from typing import Callable, Iterator, Optional
+from moto import mock_dynamodb, mock_ec2, mock_ecs, mock_elbv2, mock_iam, mock_lambda, mock_s3, mock_sns, mock_sqs
+from moto.server import ThreadedMotoServer
+
+
+# Per-test moto mocks used in the default (serial) mode, by service name
+MOTO_MOCKS = {
+    "dynamodb": mock_dynamodb,
+    "ec2": mock_ec2,
+    "ecs": mock_ecs,
+    "elbv2": mock_elbv2,
+    "iam": mock_iam,
+    "lambda": mock_lambda,
+    "s3": mock_s3,
+    "sns": mock_sns,
+    "sqs": mock_sqs,
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--moto-server",
+        action="store_true",
+        default=False,
+        help="Run moto-backed tests against one local moto server per worker instead of per-test mocks"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "moto(*services): AWS services emulated by moto for this test")
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def moto_server_mode(request) -> bool:
+    return request.config.getoption("--moto-server")
+
+
+@pytest.fixture(scope="session")
+def moto_endpoint_url(moto_server_mode: bool) -> Iterator[Optional[str]]:
+    """
+    Start one moto server for this session (one per xdist worker) and point every boto3 client at it
+    """
+    if not moto_server_mode:
+        yield None
+        return
+
+    port = _free_port()
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    endpoint_url = f"http://127.0.0.1:{port}"
+
+    env = pytest.MonkeyPatch()
+    env.setenv("AWS_ENDPOINT_URL", endpoint_url)
+    env.setenv("AWS_ACCESS_KEY_ID", "testing")
+    env.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    env.setenv("AWS_SECURITY_TOKEN", "testing")
+    env.setenv("AWS_SESSION_TOKEN", "testing")
+    env.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    yield endpoint_url
+
+    env.undo()
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def moto_services(request, moto_server_mode: bool) -> Iterator[None]:
+    marker = request.node.get_closest_marker("moto")
+    if marker is None:
+        yield
+        return
+
+    if moto_server_mode:
+        # State lives for the whole worker session, tests stay apart through resource_namespace
+        request.getfixturevalue("moto_endpoint_url")
+        yield
+        return
+
+    with ExitStack() as stack:
+        for service in marker.args:
+            stack.enter_context(MOTO_MOCKS[service]())
+        yield
+
+
+@pytest.fixture
+def resource_namespace(request, moto_server_mode: bool) -> str:
+    if not moto_server_mode:
+        return ""
+    return "-" + hashlib.sha1(request.node.nodeid.encode()).hexdigest()[:8]
+
+
+@pytest.fixture
+def namespaced(resource_namespace: str) -> Callable[..., str]:
+    """
+    Make a resource name unique to this test on a shared moto server, keeping within max_length
+    """
+    def _namespaced(name: str, max_length: Optional[int] = None) -> str:
+        if max_length is not None:
+            name = name[:max_length - len(resource_namespace)].rstrip("-")
+        return f"{name}{resource_namespace}"
+
+    return _namespaced
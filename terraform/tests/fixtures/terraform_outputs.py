@@ -1,9 +1,196 @@
 import pytest
 import os
 import json
+import hashlib
 import subprocess
 from typing import Dict, Any, Optional
 
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+
+# Local-backend files whose content changes whenever `terraform output` could change
+TERRAFORM_STATE_FILES = (
+    "terraform.tfstate",
+    os.path.join(".terraform", "terraform.tfstate"),
+)
+
+# Written by `terraform init`: the configured backend, and the selected workspace
+BACKEND_STATE_FILE = os.path.join(".terraform", "terraform.tfstate")
+WORKSPACE_FILE = os.path.join(".terraform", "environment")
+
+OUTPUTS_CACHE_DIR = os.getenv(
+    "TF_OUTPUTS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "terraform-outputs")
+)
+
+
+def mock_outputs(environment: str) -> Dict[str, Any]:
+    return {
+        "s3_bucket_name": f"image-recognition-api-{environment}-images-000000000000",
+        "dynamodb_table_name": f"image-recognition-api-{environment}-table",
+        "sns_topic_arn": f"arn:aws:sns:us-east-1:000000000000:image-recognition-api-{environment}-image-processing",
+        "sqs_queue_arn": f"arn:aws:sqs:us-east-1:000000000000:image-recognition-api-{environment}-image-processing",
+        "ecs_cluster_name": f"image-recognition-api-{environment}-cluster",
+        "alb_dns_name": f"image-recognition-api-{environment}-alb-000000000.us-east-1.elb.amazonaws.com"
+    }
+
+
+def backend_config(terraform_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Backend recorded by `terraform init`, None before init or when the state cannot be read
+    """
+    try:
+        with open(os.path.join(terraform_dir, BACKEND_STATE_FILE), "r") as f:
+            return json.load(f).get("backend")
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def current_workspace(terraform_dir: str) -> str:
+    workspace = os.getenv("TF_WORKSPACE")
+    if workspace:
+        return workspace
+    try:
+        with open(os.path.join(terraform_dir, WORKSPACE_FILE), "r") as f:
+            return f.read().strip() or "default"
+    except OSError:
+        return "default"
+
+
+def s3_state_key(config: Dict[str, Any], workspace: str) -> str:
+    """
+    Object key the S3 backend stores the workspace's state under
+    """
+    if workspace == "default":
+        return config["key"]
+    return f"{config.get('workspace_key_prefix') or 'env:'}/{workspace}/{config['key']}"
+
+
+def remote_state_fingerprint(backend: Dict[str, Any], workspace: str) -> Optional[str]:
+    """
+    ETag of the S3 state object, which changes on every apply; None for other backends or when it cannot be read
+    """
+    if backend.get("type") != "s3":
+        return None
+
+    config = backend.get("config") or {}
+    try:
+        key = s3_state_key(config, workspace)
+        s3_client = boto3.client("s3", region_name=config.get("region"))
+        head = s3_client.head_object(Bucket=config["bucket"], Key=key)
+    except (KeyError, BotoCoreError, ClientError):
+        return None
+    return f"s3://{config['bucket']}/{key}:{head['ETag']}"
+
+
+def local_state_fingerprint(terraform_dir: str) -> Optional[str]:
+    """
+    Hash the content and mtime of the local state files in terraform_dir, None if there are none
+    """
+    digest = hashlib.sha256()
+    found = False
+
+    for state_file in TERRAFORM_STATE_FILES:
+        path = os.path.join(terraform_dir, state_file)
+        if not os.path.isfile(path):
+            continue
+
+        stat = os.stat(path)
+        digest.update(f"{state_file}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+        found = True
+
+    return digest.hexdigest() if found else None
+
+
+def state_fingerprint(terraform_dir: str) -> Optional[str]:
+    """
+    Value that changes whenever `terraform output` could change, None when there is nothing to key a cache on
+
+    With a remote backend the local files only change on `terraform init`, so the remote state is checked instead.
+    """
+    backend = backend_config(terraform_dir)
+    if backend is not None and backend.get("type", "local") != "local":
+        return remote_state_fingerprint(backend, current_workspace(terraform_dir))
+    return local_state_fingerprint(terraform_dir)
+
+
+def _cache_path(terraform_dir: str, cache_dir: str) -> str:
+    dir_key = hashlib.sha256(os.path.abspath(terraform_dir).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{dir_key}.json")
+
+
+def _load_cached_outputs(cache_path: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if cached.get("fingerprint") != fingerprint:
+        return None
+    return cached.get("outputs")
+
+
+def _store_cached_outputs(cache_path: str, terraform_dir: str, fingerprint: str, outputs: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+    # Write to a temporary file first so concurrent sessions never read a partial cache
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "terraform_dir": os.path.abspath(terraform_dir),
+            "fingerprint": fingerprint,
+            "outputs": outputs
+        }, f)
+    os.replace(tmp_path, cache_path)
+
+
+def read_terraform_outputs(terraform_dir: str, cache_dir: str = OUTPUTS_CACHE_DIR) -> Dict[str, Any]:
+    """
+    Return `terraform output -json` values for terraform_dir, reusing the disk cache until the state changes
+    """
+    fingerprint = state_fingerprint(terraform_dir)
+    cache_path = _cache_path(terraform_dir, cache_dir)
+
+    if fingerprint is not None:
+        cached_outputs = _load_cached_outputs(cache_path, fingerprint)
+        if cached_outputs is not None:
+            return cached_outputs
+
+    result = subprocess.run(
+        ["terraform", "output", "-json"],
+        cwd=terraform_dir,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    outputs = json.loads(result.stdout)
+
+    extracted_outputs = {}
+    for key, value in outputs.items():
+        extracted_outputs[key] = value.get("value")
+
+    # Without a state fingerprint there is nothing to invalidate the cache with
+    if fingerprint is not None:
+        _store_cached_outputs(cache_path, terraform_dir, fingerprint, extracted_outputs)
+
+    return extracted_outputs
+
+
+def load_terraform_outputs(terraform_dir: str, environment: str, cache_dir: str = OUTPUTS_CACHE_DIR) -> Dict[str, Any]:
+    """
+    Outputs of terraform_dir, or mock outputs for the environment when the directory doesn't exist
+    """
+    if not os.path.isdir(terraform_dir):
+        # Use mock outputs if real outputs aren't available
+        return mock_outputs(environment)
+
+    return read_terraform_outputs(terraform_dir, cache_dir=cache_dir)
+
 
 @pytest.fixture(scope="session")
 def terraform_environment() -> str:
@@ -24,48 +211,13 @@ def project_name() -> str:
 def terraform_outputs(terraform_environment: str) -> Dict[str, Any]:
     terraform_dir = f"../tf-{terraform_environment}"
 
-    if not os.path.isdir(terraform_dir):
-        # Use mock outputs if real outputs aren't available
-        return {
-            "s3_bucket_name": f"image-recognition-api-{terraform_environment}-images-000000000000",
-            "dynamodb_table_name": f"image-recognition-api-{terraform_environment}-table",
-            "sns_topic_arn": f"arn:aws:sns:us-east-1:000000000000:image-recognition-api-{terraform_environment}-image-processing",
-            "sqs_queue_arn": f"arn:aws:sqs:us-east-1:000000000000:image-recognition-api-{terraform_environment}-image-processing",
-            "ecs_cluster_name": f"image-recognition-api-{terraform_environment}-cluster",
-            "alb_dns_name": f"image-recognition-api-{terraform_environment}-alb-000000000.us-east-1.elb.amazonaws.com"
-        }
-    
     try:
-        # Check if terraform command is available
-        subprocess.run(["terraform", "--version"], capture_output=True, check=True)
-        
-        result = subprocess.run(
-            ["terraform", "output", "-json"],
-            cwd=terraform_dir,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        outputs = json.loads(result.stdout)
-        
-        extracted_outputs = {}
-        for key, value in outputs.items():
-            extracted_outputs[key] = value.get("value")
-        
-        return extracted_outputs
-    
+        return load_terraform_outputs(terraform_dir, terraform_environment)
+
     except subprocess.CalledProcessError as e:
         pytest.skip(f"Failed to get Terraform outputs: {e}")
         # Return mock values as fallback
-        return {
-            "s3_bucket_name": f"image-recognition-api-{terraform_environment}-images-000000000000",
-            "dynamodb_table_name": f"image-recognition-api-{terraform_environment}-table",
-            "sns_topic_arn": f"arn:aws:sns:us-east-1:000000000000:image-recognition-api-{terraform_environment}-image-processing",
-            "sqs_queue_arn": f"arn:aws:sqs:us-east-1:000000000000:image-recognition-api-{terraform_environment}-image-processing",
-            "ecs_cluster_name": f"image-recognition-api-{terraform_environment}-cluster",
-            "alb_dns_name": f"image-recognition-api-{terraform_environment}-alb-000000000.us-east-1.elb.amazonaws.com"
-        }
+        return mock_outputs(terraform_environment)
     except json.JSONDecodeError as e:
         pytest.skip(f"Failed to parse Terraform outputs JSON: {e}")
         return {}
@@ -82,6 +234,7 @@ def expected_resource_names(terraform_environment: str, project_name: str) -> Di
     return {
         "s3_bucket": f"{project_name}-{terraform_environment}-images",
         "dynamodb_table": f"{project_name}-{terraform_environment}-table",
+        "completion_feed_table": f"{project_name}-{terraform_environment}-completion-feed",
         "sns_topic": f"{project_name}-{terraform_environment}-image-processing",
         "sqs_queue": f"{project_name}-{terraform_environment}-image-processing",
         "lambda_function": f"{project_name}-{terraform_environment}-image-recognition",
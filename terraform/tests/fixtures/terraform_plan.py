@@ -0,0 +1,29 @@
+import pytest
+import os
+import subprocess
+from tests.utils.plan_analyzer import TerraformPlan
+
+
+# Committed `terraform show -json` output, one file per environment
+PLANS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plans")
+
+
+@pytest.fixture(scope="session")
+def terraform_plan(terraform_environment: str) -> TerraformPlan:
+    plan_json = os.getenv("TF_PLAN_JSON")
+    if plan_json:
+        return TerraformPlan.from_file(plan_json)
+
+    plan_file = os.getenv("TF_PLAN_FILE")
+    if plan_file:
+        try:
+            return TerraformPlan.from_plan_file(plan_file, f"../tf-{terraform_environment}")
+        except subprocess.CalledProcessError as e:
+            pytest.skip(f"Failed to read Terraform plan: {e}")
+        except FileNotFoundError:
+            pytest.skip("Terraform command not found")
+
+    fixture_path = os.path.join(PLANS_DIR, f"tf-{terraform_environment}.json")
+    if not os.path.isfile(fixture_path):
+        pytest.skip(f"No plan fixture for environment {terraform_environment}")
+    return TerraformPlan.from_file(fixture_path)
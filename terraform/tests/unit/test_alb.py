@@ -1,6 +1,5 @@
 import pytest
 import boto3
-from moto import mock_elbv2, mock_ec2
 from tests.utils.aws_helpers import AWSResourceHelper
 
 
@@ -20,9 +19,8 @@ class TestApplicationLoadBalancer:
         assert "alb_dns_name" in terraform_outputs
         assert terraform_outputs["alb_dns_name"] is not None
         
-    @mock_elbv2
-    @mock_ec2
-    def test_alb_configuration(self, terraform_environment, aws_region):
+    @pytest.mark.moto("elbv2", "ec2")
+    def test_alb_configuration(self, terraform_environment, aws_region, namespaced):
         elbv2_client = boto3.client('elbv2', region_name=aws_region)
         ec2_client = boto3.client('ec2', region_name=aws_region)
         
@@ -42,7 +40,7 @@ class TestApplicationLoadBalancer:
         
         subnet_ids = [subnet1_response['Subnet']['SubnetId'], subnet2_response['Subnet']['SubnetId']]
         
-        alb_name = f"image-recognition-api-{terraform_environment}-alb"
+        alb_name = namespaced(f"image-recognition-api-{terraform_environment}-alb", max_length=32)
         alb_response = elbv2_client.create_load_balancer(
             Name=alb_name,
             Subnets=subnet_ids,
@@ -53,7 +51,7 @@ class TestApplicationLoadBalancer:
         
         alb_arn = alb_response['LoadBalancers'][0]['LoadBalancerArn']
         
-        tg_name = f"image-recognition-api-{terraform_environment}-tg"
+        tg_name = namespaced(f"image-recognition-api-{terraform_environment}-tg", max_length=32)
         tg_response = elbv2_client.create_target_group(
             Name=tg_name,
             Protocol='HTTP',
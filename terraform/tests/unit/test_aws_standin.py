@@ -0,0 +1,91 @@
+import pytest
+import time
+from botocore.exceptions import ClientError
+from tests.utils.aws_standin import AwsStandIn, FaultProfile
+from tests.utils.pipeline_simulator import s3_event_body
+
+
+BUCKET_NAME = "image-recognition-api-dev-images-000000000000"
+
+
+def sqs_event(*object_keys: str) -> dict:
+    return {"Records": [{"messageId": object_key, "body": s3_event_body(BUCKET_NAME, object_key)} for object_key in object_keys]}
+
+
+def outcomes(standin: AwsStandIn, calls: int) -> list:
+    rekognition = standin.client("rekognition")
+    results = []
+    for _ in range(calls):
+        try:
+            rekognition.detect_labels(Image={"S3Object": {"Bucket": BUCKET_NAME, "Name": "images/img_1.jpg"}})
+            results.append("ok")
+        except ClientError as e:
+            results.append(e.response["Error"]["Code"])
+    return results
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestAwsStandIn:
+    def test_serves_fixtures_through_the_handler(self, lambda_module, aws_standin):
+        aws_standin.labels["images/img_2.jpg"] = [{"Name": "Dog", "Confidence": 96.5}, {"Name": "Blur", "Confidence": 40.0}]
+
+        response = lambda_module.lambda_handler(sqs_event("images/img_1.jpg", "images/img_2.jpg"), None)
+
+        assert response["statusCode"] == 200
+        updates = [params for operation, params in aws_standin.requests if operation == "dynamodb.UpdateItem"]
+        assert [update["Key"]["ImageId"]["S"] for update in updates] == ["img_1", "img_2"]
+        # MinConfidence is applied like the real service
+        assert updates[1]["ExpressionAttributeValues"][":labelValue"] == {"S": "Dog"}
+        assert updates[1]["ExpressionAttributeValues"][":labels"]["L"][0]["M"]["Confidence"] == {"N": "96.5"}
+
+    def test_serves_objects(self, lambda_module, aws_standin):
+        aws_standin.objects[(BUCKET_NAME, "images/img 1.jpg")] = b"\xff\xd8jpeg"
+
+        response = lambda_module.s3_client.get_object(Bucket=BUCKET_NAME, Key="images/img 1.jpg")
+
+        assert response["Body"].read() == b"\xff\xd8jpeg"
+        with pytest.raises(ClientError, match="NoSuchKey"):
+            lambda_module.s3_client.get_object(Bucket=BUCKET_NAME, Key="images/missing.jpg")
+
+    def test_injected_faults_are_reproducible(self):
+        profile = FaultProfile(throttle_rate=0.3, error_rate=0.2, error_code="InternalServerError")
+        runs = []
+        for _ in range(2):
+            standin = AwsStandIn(seed=7)
+            standin.set_fault("rekognition.DetectLabels", profile)
+            runs.append(outcomes(standin, 40))
+
+        assert runs[0] == runs[1]
+        assert {"ok", "ThrottlingException", "InternalServerError"} == set(runs[0])
+
+    def test_latency_is_injected(self):
+        standin = AwsStandIn()
+        standin.set_fault("rekognition.DetectLabels", FaultProfile(latency_ms=50.0))
+
+        started = time.monotonic()
+        outcomes(standin, 2)
+
+        assert time.monotonic() - started >= 0.1
+
+    def test_throttles_go_through_sdk_retries(self):
+        standin = AwsStandIn(max_attempts=2)
+        standin.set_fault("rekognition.DetectLabels", FaultProfile(throttle_rate=1.0))
+
+        assert outcomes(standin, 1) == ["ThrottlingException"]
+        assert standin.calls["rekognition.DetectLabels"] == 2
+
+    def test_dynamodb_failure_fails_its_message(self, lambda_module, aws_standin):
+        aws_standin.set_fault("dynamodb.UpdateItem", FaultProfile(throttle_rate=1.0))
+
+        response = lambda_module.lambda_handler(sqs_event("images/img_1.jpg"), None)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "images/img_1.jpg"}]
+
+    def test_rekognition_failure_still_stores_the_image(self, lambda_module, aws_standin):
+        aws_standin.set_fault("rekognition.DetectLabels", FaultProfile(error_rate=1.0))
+
+        lambda_module.lambda_handler(sqs_event("images/img_1.jpg"), None)
+
+        [(_, update)] = [request for request in aws_standin.requests if request[0] == "dynamodb.UpdateItem"]
+        assert update["ExpressionAttributeValues"][":labelValue"] == {"S": "unknown"}
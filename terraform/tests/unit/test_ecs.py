@@ -1,6 +1,5 @@
 import pytest
 import boto3
-from moto import mock_ecs, mock_ec2
 from tests.utils.aws_helpers import AWSResourceHelper
 
 
@@ -20,9 +19,8 @@ class TestECSInfrastructure:
         assert "ecs_cluster_name" in terraform_outputs
         assert terraform_outputs["ecs_cluster_name"] is not None
         
-    @mock_ecs
-    @mock_ec2
-    def test_ecs_cluster_configuration(self, terraform_environment, aws_region):
+    @pytest.mark.moto("ecs", "ec2")
+    def test_ecs_cluster_configuration(self, terraform_environment, aws_region, namespaced):
         ecs_client = boto3.client('ecs', region_name=aws_region)
         ec2_client = boto3.client('ec2', region_name=aws_region)
         helper = AWSResourceHelper(environment=terraform_environment, region=aws_region)
@@ -30,7 +28,7 @@ class TestECSInfrastructure:
         vpc_response = ec2_client.create_vpc(CidrBlock="10.0.0.0/16")
         vpc_id = vpc_response['Vpc']['VpcId']
         
-        cluster_name = f"image-recognition-api-{terraform_environment}-cluster"
+        cluster_name = namespaced(f"image-recognition-api-{terraform_environment}-cluster")
         ecs_client.create_cluster(
             clusterName=cluster_name,
             capacityProviders=['FARGATE'],
@@ -87,4 +85,5 @@ class TestECSInfrastructure:
         assert expected_container["essential"] is True
         assert expected_container["portMappings"][0]["containerPort"] == 3000
         assert "awslogs" in expected_container["logConfiguration"]["logDriver"]
-        assert "health" in expected_container["healthCheck"]["command"][0].lower()
+        assert expected_container["healthCheck"]["command"][0] == "CMD-SHELL"
+        assert "/health" in expected_container["healthCheck"]["command"][1]
@@ -0,0 +1,79 @@
+import pytest
+import boto3
+import json
+import logging
+from botocore.stub import Stubber
+from tests.fixtures.lambda_handler import s3_record
+from tests.utils.pipeline_simulator import s3_event_body
+
+
+BUCKET_NAME = "image-recognition-api-dev-images-000000000000"
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestCostAccounting:
+    @pytest.fixture
+    def accounting(self, lambda_submodule):
+        return lambda_submodule("cost_accounting").CostAccounting()
+
+    def test_counts_consumed_capacity_from_stubbed_responses(self, accounting, aws_region):
+        client = accounting.attach(boto3.client("dynamodb", region_name=aws_region))
+        stubber = Stubber(client)
+        stubber.add_response("update_item", {"ConsumedCapacity": {"TableName": "images", "CapacityUnits": 3.0}})
+        stubber.add_response("query", {"Items": [], "ConsumedCapacity": {"TableName": "images", "CapacityUnits": 0.5}})
+        stubber.add_client_error("update_item", service_error_code="ProvisionedThroughputExceededException")
+
+        with stubber:
+            client.update_item(TableName="images", Key={"ImageId": {"S": "img_1"}}, ReturnConsumedCapacity="TOTAL")
+            client.query(TableName="images", KeyConditionExpression="ImageId = :id",
+                         ExpressionAttributeValues={":id": {"S": "img_1"}}, ReturnConsumedCapacity="TOTAL")
+            with pytest.raises(client.exceptions.ProvisionedThroughputExceededException):
+                client.update_item(TableName="images", Key={"ImageId": {"S": "img_2"}})
+
+        summary = accounting.summary()
+        assert summary["calls"] == {"dynamodb.UpdateItem": 2, "dynamodb.Query": 1}
+        assert summary["capacity"] == {"read_units": {"images": 0.5}, "write_units": {"images": 3.0}}
+        assert summary["errors"] == {"dynamodb.UpdateItem:ProvisionedThroughputExceededException": 1}
+
+    def test_attach_is_idempotent_and_reset_clears(self, accounting, aws_region):
+        client = accounting.attach(accounting.attach(boto3.client("dynamodb", region_name=aws_region)))
+        with Stubber(client) as stubber:
+            stubber.add_response("describe_limits", {})
+            client.describe_limits()
+
+        assert accounting.summary()["total_calls"] == 1
+        accounting.reset()
+        assert accounting.summary()["total_calls"] == 0
+
+    @pytest.mark.moto("s3")
+    def test_counts_bytes_transferred(self, accounting, lambda_module, image_bucket):
+        client = accounting.attach(lambda_module.s3_client)
+
+        client.put_object(Bucket=image_bucket, Key="images/img_1.jpg", Body=b"x" * 5000)
+        client.get_object(Bucket=image_bucket, Key="images/img_1.jpg")["Body"].read()
+
+        summary = accounting.summary()
+        assert summary["calls"] == {"s3.PutObject": 1, "s3.GetObject": 1}
+        assert summary["bytes_sent"] >= 5000
+        assert summary["bytes_received"] >= 5000
+
+    def test_handler_logs_invocation_summary(self, lambda_module, aws_standin, caplog):
+        for client in (lambda_module.rekognition_client, lambda_module.table.meta.client):
+            lambda_module.invocation_costs.attach(client)
+        event = {"Records": [{"body": s3_event_body(BUCKET_NAME, key)} for key in ("images/img_1.jpg", "images/img_2.jpg")]}
+
+        with caplog.at_level(logging.INFO):
+            lambda_module.lambda_handler(event, None)
+
+        lines = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Invocation summary: ")]
+        summary = json.loads(lines[-1][len("Invocation summary: "):])
+        assert summary["records"] == 2
+        # One metadata update and one completion feed item per image, and one marker for the day they share
+        assert summary["calls"] == {"rekognition.DetectLabels": 2, "dynamodb.UpdateItem": 2, "dynamodb.PutItem": 3}
+        table_names = {
+            params["TableName"] for operation, params in aws_standin.requests if operation.startswith("dynamodb.")
+        }
+        assert set(summary["capacity"]["write_units"]) == table_names
+        assert len(table_names) == 2
+        assert all(units >= 1.0 for units in summary["capacity"]["write_units"].values())
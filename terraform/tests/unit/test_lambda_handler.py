@@ -0,0 +1,375 @@
+import pytest
+import io
+import json
+import threading
+import time
+from boto3.dynamodb.conditions import Key
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+from tests.fixtures.lambda_handler import s3_record
+from tests.utils.pipeline_simulator import s3_event_body
+
+
+LABELS = [
+    {"Name": "Person", "Confidence": Decimal("99.12")},
+    {"Name": "Outdoors", "Confidence": Decimal("87.5")},
+]
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestLabelEncoding:
+    def test_compact_labels_round_trip(self, lambda_module):
+        packed = lambda_module.encode_labels(LABELS)
+
+        assert packed == "Person:9912|Outdoors:8750"
+        assert lambda_module.decode_labels({"labelsPacked": packed}) == LABELS
+
+    def test_decode_reads_list_format(self, lambda_module):
+        assert lambda_module.decode_labels({"labels": LABELS}) == LABELS
+        assert lambda_module.decode_labels({"labelsPacked": ""}) == []
+        assert lambda_module.decode_labels({}) == []
+
+    @pytest.mark.moto("dynamodb")
+    @pytest.mark.parametrize("encoding", ["list", "compact"])
+    def test_store_switches_label_format(self, lambda_module, image_table, monkeypatch, encoding):
+        image_table.put_item(Item={"ImageId": "img_1", "CreatedAt": "METADATA", "labelsPacked": "Stale:5000"})
+        monkeypatch.setattr(lambda_module, "LABEL_ENCODING", encoding)
+
+        lambda_module.store_image_metadata("bucket", "images/img_1.jpg", s3_record("images/img_1.jpg"), LABELS)
+
+        item = image_table.get_item(Key={"ImageId": "img_1", "CreatedAt": "METADATA"})["Item"]
+        assert lambda_module.decode_labels(item) == LABELS
+        assert item["LabelValue"] == "Person"
+        assert ("labels" in item) != ("labelsPacked" in item)
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestStatusIndex:
+    def test_status_index_keys(self, lambda_module):
+        status_bucket, processed_key = lambda_module.status_index_keys("completed", "img_1", "2025-09-04T12:00:00.000001")
+        status, day, shard = status_bucket.split("#")
+
+        assert status == "completed"
+        assert day == "2025-09-04"
+        assert 0 <= int(shard) < lambda_module.STATUS_INDEX_SHARDS
+        assert processed_key == "2025-09-04T12:00:00.000001#img_1"
+        # Shards must be stable across processes, unlike hash()
+        assert lambda_module.status_index_keys("completed", "img_1", "2025-09-04T13:00:00")[0] == status_bucket
+
+    @pytest.mark.moto("dynamodb")
+    def test_processed_images_are_queryable_newest_first(self, lambda_module, image_table, monkeypatch):
+        monkeypatch.setattr(lambda_module, "STATUS_INDEX_SHARDS", 1)
+        for image_id in ("img_1", "img_2", "img_3"):
+            image_table.put_item(Item={"ImageId": image_id, "CreatedAt": "METADATA", "status": "uploading"})
+            lambda_module.store_image_metadata("bucket", f"images/{image_id}.jpg", s3_record(f"images/{image_id}.jpg"), LABELS)
+
+        item = image_table.get_item(Key={"ImageId": "img_3", "CreatedAt": "METADATA"})["Item"]
+        newest = image_table.query(
+            IndexName="StatusProcessedIndex",
+            KeyConditionExpression=Key("StatusBucket").eq(item["StatusBucket"]),
+            ScanIndexForward=False
+        )["Items"]
+
+        assert [image["ImageId"] for image in newest] == ["img_3", "img_2", "img_1"]
+
+        # The sort key of the last item seen is the cursor for the next page
+        older = image_table.query(
+            IndexName="StatusProcessedIndex",
+            KeyConditionExpression=Key("StatusBucket").eq(item["StatusBucket"]) & Key("ProcessedKey").lt(newest[0]["ProcessedKey"]),
+            ScanIndexForward=False
+        )["Items"]
+
+        assert [image["ImageId"] for image in older] == ["img_2", "img_1"]
+
+    @pytest.mark.moto("dynamodb")
+    def test_backfill_adds_keys_to_images_recognized_before_the_index(self, lambda_module, image_table, monkeypatch):
+        monkeypatch.setattr(lambda_module, "STATUS_INDEX_SHARDS", 1)
+        image_table.put_item(Item={"ImageId": "img_1", "CreatedAt": "METADATA", "status": "processed", "ProcessedAt": "2025-09-01T10:00:00"})
+        image_table.put_item(Item={
+            "ImageId": "img_2", "CreatedAt": "METADATA", "status": "processed", "ProcessedAt": "2025-09-02T10:00:00",
+            "StatusBucket": "processed#2025-09-02#0", "ProcessedKey": "2025-09-02T10:00:00#img_2"
+        })
+        image_table.put_item(Item={"ImageId": "img_3", "CreatedAt": "METADATA", "status": "uploading"})
+        image_table.put_item(Item={"ImageId": "img_4", "CreatedAt": "METADATA", "status": "uploading"})
+        lambda_module.store_image_metadata("bucket", "images/img_4.jpg", s3_record("images/img_4.jpg"), LABELS)
+        # Indexed before days were marked: it keeps its keys, but its day still needs a marker
+        image_table.put_item(Item={
+            "ImageId": "img_5", "CreatedAt": "METADATA", "status": "completed", "ProcessedAt": "2025-08-30T10:00:00",
+            "StatusBucket": "completed#2025-08-30#0", "ProcessedKey": "2025-08-30T10:00:00#img_5"
+        })
+        today = image_table.get_item(Key={"ImageId": "img_4", "CreatedAt": "METADATA"})["Item"]["ProcessedAt"][:10]
+
+        def marked_days() -> list:
+            return [row["CreatedAt"] for row in image_table.query(KeyConditionExpression=Key("ImageId").eq("STATUS_DAYS#completed"))["Items"]]
+
+        dry_run = json.loads(lambda_module.lambda_handler({"action": "backfill-status-index", "segments": 1}, None)["body"])
+
+        assert dry_run["image_ids"] == ["img_1", "img_2"]
+        assert dry_run["days"] == 4
+        assert "StatusBucket" not in image_table.get_item(Key={"ImageId": "img_1", "CreatedAt": "METADATA"})["Item"]
+        assert marked_days() == [today]
+
+        lambda_module.lambda_handler({"action": "backfill-status-index", "dry_run": False, "segments": 1}, None)
+
+        indexed = image_table.query(
+            IndexName="StatusProcessedIndex",
+            KeyConditionExpression=Key("StatusBucket").eq("completed#2025-09-02#0")
+        )["Items"]
+        assert [image["ImageId"] for image in indexed] == ["img_2"]
+        item = image_table.get_item(Key={"ImageId": "img_1", "CreatedAt": "METADATA"})["Item"]
+        assert (item["StatusBucket"], item["ProcessedKey"]) == ("completed#2025-09-01#0", "2025-09-01T10:00:00#img_1")
+        assert "StatusBucket" not in image_table.get_item(Key={"ImageId": "img_3", "CreatedAt": "METADATA"})["Item"]
+        assert marked_days() == ["2025-08-30", "2025-09-01", "2025-09-02", today]
+
+
+@pytest.fixture
+def far_from_utc(monkeypatch):
+    """
+    Local time 14 hours ahead of UTC, so a local clock lands on the wrong day for most of it
+    """
+    monkeypatch.setenv("TZ", "Pacific/Kiritimati")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestCompletionFeed:
+    def test_feed_keys_are_sharded_by_minute(self, lambda_module):
+        minute, key = lambda_module.completion_feed_keys("2025-09-04T12:07:59.123456", "img_1")
+
+        assert minute == "2025-09-04T12:07"
+        assert key == "2025-09-04T12:07:59.123456#img_1"
+
+    @pytest.mark.moto("dynamodb")
+    def test_store_appends_completion(self, lambda_module, image_table, completion_feed_table, far_from_utc):
+        image_table.put_item(Item={"ImageId": "img_1", "CreatedAt": "METADATA", "status": "uploading"})
+
+        lambda_module.store_image_metadata("bucket", "images/img_1.jpg", s3_record("images/img_1.jpg"), LABELS)
+
+        item = image_table.get_item(Key={"ImageId": "img_1", "CreatedAt": "METADATA"})["Item"]
+        assert item["status"] == "completed"
+        assert item["StatusBucket"].startswith("completed#")
+        # Scans of the image table never read feed items; besides the image it holds only the day's marker
+        assert [(row["ImageId"], row["CreatedAt"]) for row in image_table.scan()["Items"] if row["ImageId"] != "img_1"] == [
+            ("STATUS_DAYS#completed", item["ProcessedAt"][:10])
+        ]
+
+        [entry] = completion_feed_table.scan()["Items"]
+        assert (entry["imageId"], entry["completionStatus"], entry["primaryLabel"]) == ("img_1", "completed", "Person")
+        assert entry["expiresAt"] > time.time()
+        # The item and its feed entry share one UTC timestamp
+        assert entry["CompletedKey"] == f"{item['ProcessedAt']}#img_1"
+        assert item["ProcessedKey"] == entry["CompletedKey"]
+        completed_at = datetime.fromisoformat(item["ProcessedAt"]).replace(tzinfo=timezone.utc)
+        assert abs((datetime.now(timezone.utc) - completed_at).total_seconds()) < 60
+        assert item["StatusBucket"].split("#")[1] == item["ProcessedAt"][:10]
+        assert entry["FeedMinute"] == entry["CompletedKey"][:16]
+
+    @pytest.mark.moto("dynamodb")
+    def test_failed_record_does_not_redeliver_the_batch(self, lambda_module, image_table, completion_feed_table, monkeypatch):
+        for i in (1, 2, 3):
+            image_table.put_item(Item={"ImageId": f"img_{i}", "CreatedAt": "METADATA", "status": "uploading"})
+        failing = {"images/img_2.jpg"}
+
+        def analyze_image(bucket_name, object_key, **kwargs):
+            if object_key in failing:
+                raise RuntimeError("Rekognition unavailable")
+            return {"labels": LABELS}
+
+        monkeypatch.setattr(lambda_module, "analyze_image", analyze_image)
+        messages = [
+            {"messageId": f"msg-{i}", "body": json.dumps({"Records": [s3_record(f"images/img_{i}.jpg")]})} for i in (1, 2, 3)
+        ]
+
+        response = lambda_module.lambda_handler({"Records": messages}, None)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "msg-2"}]
+        assert json.loads(response["body"])["processed_count"] == 2
+
+        # SQS redelivers only the failed message, so the others keep a single feed entry
+        failing.clear()
+        lambda_module.lambda_handler({"Records": [messages[1]]}, None)
+
+        assert sorted(entry["imageId"] for entry in completion_feed_table.scan()["Items"]) == ["img_1", "img_2", "img_3"]
+
+    @pytest.mark.moto("dynamodb")
+    def test_completions_since_cursor_in_one_query(self, lambda_module, completion_feed_table):
+        for second, image_id in enumerate(("img_1", "img_2", "img_3")):
+            lambda_module.append_completion(image_id, "completed", "Person", f"2025-09-04T12:07:0{second}.000000")
+
+        minute, cursor = lambda_module.completion_feed_keys("2025-09-04T12:07:00.000000", "img_1")
+        completions = completion_feed_table.query(
+            KeyConditionExpression=Key("FeedMinute").eq(minute) & Key("CompletedKey").gt(cursor)
+        )["Items"]
+
+        assert [entry["imageId"] for entry in completions] == ["img_2", "img_3"]
+
+
+class TrackingPool:
+    """
+    CPU pool stand-in that runs each task in the submitting thread and records how many overlapped
+    """
+    workers = 2
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def submit(self, function, *args):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        future = Future()
+        try:
+            time.sleep(self.delay)
+            future.set_result(function(*args))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        return future
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestDerivatives:
+    @pytest.fixture
+    def original_key(self, image_bucket, lambda_module) -> str:
+        image_module = pytest.importorskip("PIL.Image")
+        buffer = io.BytesIO()
+        image_module.new("RGB", (2000, 1500), (200, 120, 40)).save(buffer, format="JPEG")
+        lambda_module.s3_client.put_object(Bucket=image_bucket, Key="images/img_1.jpg", Body=buffer.getvalue())
+        return "images/img_1.jpg"
+
+    @pytest.mark.moto("s3")
+    def test_create_derivatives_uploads_each_size(self, lambda_module, image_bucket, original_key, monkeypatch):
+        monkeypatch.setattr(lambda_module, "DERIVATIVE_SIZES", [("thumbnail", 256), ("preview", 1024)])
+
+        derivatives = lambda_module.create_derivatives(image_bucket, original_key)
+
+        assert derivatives["preview"]["key"] == "derivatives/preview/img_1.webp"
+        assert (derivatives["preview"]["width"], derivatives["preview"]["height"]) == (1024, 768)
+        assert (derivatives["thumbnail"]["width"], derivatives["thumbnail"]["height"]) == (256, 192)
+
+        for derivative in derivatives.values():
+            stored = lambda_module.s3_client.get_object(Bucket=image_bucket, Key=derivative["key"])
+            assert stored["ContentType"] == "image/webp"
+            assert stored["ContentLength"] == derivative["size"]
+
+    @pytest.mark.moto("s3")
+    def test_create_derivatives_without_pillow(self, lambda_module, image_bucket, monkeypatch):
+        monkeypatch.setattr(lambda_module, "Image", None)
+
+        assert lambda_module.create_derivatives(image_bucket, "images/img_1.jpg") == {}
+
+    def test_handler_renders_records_side_by_side(self, lambda_module, aws_standin, monkeypatch):
+        image_module = pytest.importorskip("PIL.Image")
+        buffer = io.BytesIO()
+        image_module.new("RGB", (800, 600), (200, 120, 40)).save(buffer, format="JPEG")
+        bucket_name = "image-recognition-api-dev-images-000000000000"
+        object_keys = [f"images/img_{i}.jpg" for i in range(4)]
+        for object_key in object_keys:
+            aws_standin.objects[(bucket_name, object_key)] = buffer.getvalue()
+
+        pool = TrackingPool(delay=0.2)
+        monkeypatch.setattr(lambda_module, "DERIVATIVES_ENABLED", True)
+        monkeypatch.setattr(lambda_module, "cpu_pool", pool)
+        monkeypatch.setattr(lambda_module, "record_executor", ThreadPoolExecutor(max_workers=4))
+
+        response = lambda_module.lambda_handler(
+            {"Records": [{"body": s3_event_body(bucket_name, object_key)} for object_key in object_keys]}, None
+        )
+
+        assert json.loads(response["body"])["processed_count"] == 4
+        # Every record's render is submitted before any result is awaited
+        assert pool.max_in_flight > 1
+        assert aws_standin.calls["s3.PutObject"] == 2 * len(object_keys)
+
+    @pytest.mark.moto("dynamodb")
+    def test_store_writes_derivatives_with_labels(self, lambda_module, image_table):
+        derivatives = {"thumbnail": {"key": "derivatives/thumbnail/img_1.webp", "size": 5120, "width": 256, "height": 192}}
+        image_table.put_item(Item={"ImageId": "img_1", "CreatedAt": "METADATA", "status": "uploading"})
+
+        lambda_module.store_image_metadata("bucket", "images/img_1.jpg", s3_record("images/img_1.jpg"), LABELS, derivatives)
+
+        item = image_table.get_item(Key={"ImageId": "img_1", "CreatedAt": "METADATA"})["Item"]
+        assert item["derivatives"] == derivatives
+        assert item["LabelValue"] == "Person"
+
+
+class SlowRekognition:
+    """
+    Rekognition stand-in where every call takes `delay` seconds and `failing` operations raise
+    """
+    def __init__(self, delay: float = 0.0, failing: tuple = ()):
+        self.delay = delay
+        self.failing = failing
+
+    def _call(self, operation: str, response: dict) -> dict:
+        time.sleep(self.delay)
+        if operation in self.failing:
+            raise RuntimeError(f"{operation} throttled")
+        return response
+
+    def detect_labels(self, **kwargs):
+        return self._call("detect_labels", {"Labels": [{"Name": "Person", "Confidence": 99.123}]})
+
+    def detect_moderation_labels(self, **kwargs):
+        return self._call("detect_moderation_labels", {"ModerationLabels": [{"Name": "Violence", "ParentName": "", "Confidence": 61.5}]})
+
+    def detect_text(self, **kwargs):
+        return self._call("detect_text", {"TextDetections": [
+            {"DetectedText": "EXIT", "Type": "LINE", "Confidence": 98.4},
+            {"DetectedText": "EXIT", "Type": "WORD", "Confidence": 98.4}
+        ]})
+
+    def detect_faces(self, **kwargs):
+        return self._call("detect_faces", {"FaceDetails": [
+            {"Confidence": 99.9, "BoundingBox": {"Width": 0.21234, "Height": 0.3, "Left": 0.4, "Top": 0.1}}
+        ]})
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestAnalysisFanOut:
+    FEATURES = ["labels", "moderation", "text", "faces"]
+
+    def test_features_run_concurrently(self, lambda_module, monkeypatch):
+        monkeypatch.setattr(lambda_module, "rekognition_client", SlowRekognition(delay=0.2))
+
+        started = time.monotonic()
+        results = lambda_module.analyze_image("bucket", "images/img_1.jpg", self.FEATURES)
+        elapsed = time.monotonic() - started
+
+        assert set(results) == set(self.FEATURES)
+        assert elapsed < 0.5
+        assert results["labels"] == [{"Name": "Person", "Confidence": Decimal("99.12")}]
+        assert results["text"] == [{"DetectedText": "EXIT", "Confidence": Decimal("98.4")}]
+        assert results["faces"][0]["BoundingBox"]["Width"] == Decimal("0.2123")
+
+    def test_failed_feature_keeps_the_others(self, lambda_module, monkeypatch):
+        monkeypatch.setattr(lambda_module, "rekognition_client", SlowRekognition(failing=("detect_text",)))
+
+        results = lambda_module.analyze_image("bucket", "images/img_1.jpg", self.FEATURES)
+
+        assert set(results) == {"labels", "moderation", "faces"}
+
+    @pytest.mark.moto("dynamodb")
+    def test_store_writes_each_analysis(self, lambda_module, image_table, monkeypatch):
+        monkeypatch.setattr(lambda_module, "rekognition_client", SlowRekognition(failing=("detect_faces",)))
+        analysis = lambda_module.analyze_image("bucket", "images/img_1.jpg", self.FEATURES)
+        image_table.put_item(Item={"ImageId": "img_1", "CreatedAt": "METADATA", "status": "uploading"})
+
+        lambda_module.store_image_metadata("bucket", "images/img_1.jpg", s3_record("images/img_1.jpg"), analysis["labels"], analysis=analysis)
+
+        item = image_table.get_item(Key={"ImageId": "img_1", "CreatedAt": "METADATA"})["Item"]
+        assert item["moderationLabels"][0]["Name"] == "Violence"
+        assert item["textDetections"] == [{"DetectedText": "EXIT", "Confidence": Decimal("98.4")}]
+        assert "faces" not in item
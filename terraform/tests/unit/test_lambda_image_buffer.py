@@ -0,0 +1,88 @@
+import pytest
+import hashlib
+import io
+import os
+from tests.fixtures.lambda_handler import s3_record
+
+
+PAYLOAD = bytes(range(256)) * 4096
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestImageBuffer:
+    @pytest.fixture
+    def stored_object(self, lambda_module, image_bucket) -> str:
+        lambda_module.s3_client.put_object(Bucket=image_bucket, Key="images/img_1.jpg", Body=PAYLOAD)
+        return "images/img_1.jpg"
+
+    @pytest.mark.moto("s3")
+    def test_download_fills_memory_buffer(self, lambda_module, lambda_submodule, image_bucket, stored_object):
+        image = lambda_submodule("image_buffer").download(lambda_module.s3_client, image_bucket, stored_object)
+
+        assert not image.spilled
+        assert image.size == len(PAYLOAD)
+        with image.view(256, 512) as view:
+            assert view.readonly
+            assert view.tobytes() == PAYLOAD[256:512]
+        image.release()
+        assert image.closed
+
+    @pytest.mark.moto("s3")
+    def test_large_download_spills_to_tmp(self, lambda_module, lambda_submodule, image_bucket, stored_object):
+        image = lambda_submodule("image_buffer").download(lambda_module.s3_client, image_bucket, stored_object, spill_bytes=1024)
+
+        assert image.spilled
+        assert os.path.getsize(image.path) == len(PAYLOAD)
+        with image.view() as view:
+            assert hashlib.sha256(view).hexdigest() == hashlib.sha256(PAYLOAD).hexdigest()
+
+        path = image.path
+        image.close()
+        assert not os.path.exists(path)
+
+    def test_freed_after_last_stage(self, lambda_submodule):
+        image = lambda_submodule("image_buffer").ImageBuffer(16, stages=2)
+
+        image.release()
+        assert not image.closed
+        image.release()
+        assert image.closed
+        with pytest.raises(ValueError):
+            image.view()
+
+    def test_portable_form_crosses_processes(self, lambda_submodule):
+        image_buffer = lambda_submodule("image_buffer")
+        in_memory = image_buffer.ImageBuffer(4)
+        spilled = image_buffer.ImageBuffer(4, spill_bytes=0)
+
+        assert isinstance(in_memory.portable(), bytearray)
+        assert spilled.portable() == spilled.path
+
+        in_memory.close()
+        spilled.close()
+
+    @pytest.mark.moto("s3", "dynamodb")
+    def test_stages_share_one_download(self, lambda_module, image_bucket, image_table, monkeypatch):
+        image_module = pytest.importorskip("PIL.Image")
+        buffer = io.BytesIO()
+        image_module.new("RGB", (800, 600), (30, 60, 90)).save(buffer, format="JPEG")
+        lambda_module.s3_client.put_object(Bucket=image_bucket, Key="images/img_1.jpg", Body=buffer.getvalue())
+        image_table.put_item(Item={"ImageId": "img_1", "CreatedAt": "METADATA", "status": "uploading"})
+
+        monkeypatch.setattr(lambda_module, "DERIVATIVES_ENABLED", True)
+        monkeypatch.setattr(lambda_module, "CONTENT_HASH_ENABLED", True)
+        monkeypatch.setattr(lambda_module, "DERIVATIVE_SIZES", [("thumbnail", 256)])
+        monkeypatch.setattr(lambda_module, "analyze_image", lambda bucket_name, object_key, **kwargs: {"labels": []})
+
+        downloads = []
+        lambda_module.s3_client.meta.events.register(
+            "before-call.s3.GetObject", lambda **kwargs: downloads.append(kwargs["params"])
+        )
+
+        lambda_module.process_s3_record(s3_record("images/img_1.jpg", image_bucket))
+
+        item = image_table.get_item(Key={"ImageId": "img_1", "CreatedAt": "METADATA"})["Item"]
+        assert len(downloads) == 1
+        assert item["contentSha256"] == hashlib.sha256(buffer.getvalue()).hexdigest()
+        assert item["derivatives"]["thumbnail"]["width"] == 256
@@ -0,0 +1,100 @@
+import pytest
+import io
+from datetime import datetime
+from decimal import Decimal
+from tests.utils.aws_standin import FaultProfile
+from tests.utils.pipeline_simulator import s3_event_body
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+LABELS = [
+    {"Name": "Person", "Confidence": Decimal("99.12")},
+    {"Name": "Outdoors", "Confidence": Decimal("87.5")},
+]
+
+
+def list_keys(s3_client, bucket_name: str, prefix: str = "analytics/labels/") -> list:
+    return sorted(obj["Key"] for obj in s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix).get("Contents", []))
+
+
+def read_rows(s3_client, bucket_name: str, key: str) -> list:
+    body = s3_client.get_object(Bucket=bucket_name, Key=key)["Body"].read()
+    return pq.read_table(io.BytesIO(body)).to_pylist()
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+@pytest.mark.moto("s3")
+class TestLabelExport:
+    @pytest.fixture
+    def enabled(self, lambda_submodule, lambda_module, monkeypatch):
+        label_export = lambda_submodule("label_export")
+        monkeypatch.setattr(label_export, "LABEL_EXPORT_ENABLED", True)
+        lambda_module.label_export_buffer.clear()
+        yield label_export
+        lambda_module.label_export_buffer.clear()
+
+    def test_flush_writes_one_file_per_day(self, enabled, lambda_module, image_bucket):
+        buffer = enabled.LabelExportBuffer()
+        buffer.add("img_1", "2025-09-04T23:59:00.000001", 2048, LABELS)
+        buffer.add("img_2", "2025-09-05T00:01:00", 4096, [])
+
+        keys = buffer.flush(lambda_module.s3_client, image_bucket)
+
+        assert len(buffer) == 0
+        assert [key.split("/")[2] for key in keys] == ["date=2025-09-04", "date=2025-09-05"]
+        assert read_rows(lambda_module.s3_client, image_bucket, keys[0]) == [
+            {"image_id": "img_1", "processed_at": datetime(2025, 9, 4, 23, 59, 0, 1), "size": 2048, "label": "Person", "confidence": pytest.approx(99.12)},
+            {"image_id": "img_1", "processed_at": datetime(2025, 9, 4, 23, 59, 0, 1), "size": 2048, "label": "Outdoors", "confidence": 87.5},
+        ]
+        assert read_rows(lambda_module.s3_client, image_bucket, keys[1])[0]["label"] is None
+
+    def test_handler_exports_once_per_batch(self, enabled, lambda_module, aws_standin, image_bucket, monkeypatch):
+        monkeypatch.setattr(enabled, "LABEL_EXPORT_BUCKET", image_bucket)
+        event = {"Records": [{"body": s3_event_body(image_bucket, f"images/img_{i}.jpg")} for i in range(3)]}
+
+        lambda_module.lambda_handler(event, None)
+
+        [key] = list_keys(lambda_module.s3_client, image_bucket)
+        rows = read_rows(lambda_module.s3_client, image_bucket, key)
+        assert sorted({row["image_id"] for row in rows}) == ["img_0", "img_1", "img_2"]
+
+    def test_failed_record_exports_nothing(self, enabled, lambda_module, aws_standin, image_bucket):
+        aws_standin.set_fault("dynamodb.UpdateItem", FaultProfile(error_rate=1.0))
+        event = {"Records": [{"messageId": "msg-1", "body": s3_event_body(image_bucket, "images/img_1.jpg")}]}
+
+        response = lambda_module.lambda_handler(event, None)
+
+        assert response["batchItemFailures"] == [{"itemIdentifier": "msg-1"}]
+
+        assert len(lambda_module.label_export_buffer) == 0
+        assert list_keys(lambda_module.s3_client, image_bucket) == []
+
+    def test_compaction_merges_small_files(self, enabled, lambda_module, image_bucket):
+        for i in range(4):
+            buffer = enabled.LabelExportBuffer()
+            buffer.add(f"img_{i}", f"2025-09-04T1{3 - i}:00:00", 1024, LABELS[:1])
+            buffer.flush(lambda_module.s3_client, image_bucket)
+
+        assert enabled.compact_partition(lambda_module.s3_client, "2025-09-04", image_bucket, min_files=5) is None
+
+        compacted_key = enabled.compact_partition(lambda_module.s3_client, "2025-09-04", image_bucket, min_files=4)
+
+        assert list_keys(lambda_module.s3_client, image_bucket) == [compacted_key]
+        rows = read_rows(lambda_module.s3_client, image_bucket, compacted_key)
+        assert [row["image_id"] for row in rows] == ["img_3", "img_2", "img_1", "img_0"]
+
+    def test_scheduled_event_compacts_recent_partitions(self, enabled, lambda_module, image_bucket, monkeypatch):
+        monkeypatch.setattr(enabled, "LABEL_EXPORT_BUCKET", image_bucket)
+        monkeypatch.setattr(enabled, "LABEL_EXPORT_COMPACT_MIN_FILES", 2)
+        today = datetime.now().isoformat()
+        for i in range(2):
+            buffer = enabled.LabelExportBuffer()
+            buffer.add(f"img_{i}", today, 1024, LABELS)
+            buffer.flush(lambda_module.s3_client)
+
+        response = lambda_module.lambda_handler({"action": "compact-label-export"}, None)
+
+        assert today[:10] in response["body"]
+        assert len(list_keys(lambda_module.s3_client, image_bucket)) == 1
@@ -0,0 +1,20 @@
+import pytest
+import json
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestMetrics:
+    def test_emits_one_embedded_metric_line(self, lambda_submodule, monkeypatch, capsys):
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "image-recognition")
+
+        lambda_submodule("metrics").emit_metric({"ReadUnits": 2.5, "WriteUnits": 4}, {"request_id": "req-1"}, unit="None")
+
+        [line] = capsys.readouterr().out.splitlines()
+        metric = json.loads(line)
+        [directive] = metric["_aws"]["CloudWatchMetrics"]
+        assert directive["Namespace"] == "ImageRecognition"
+        assert directive["Dimensions"] == [["FunctionName"]]
+        assert directive["Metrics"] == [{"Name": "ReadUnits", "Unit": "None"}, {"Name": "WriteUnits", "Unit": "None"}]
+        assert (metric["FunctionName"], metric["ReadUnits"], metric["WriteUnits"]) == ("image-recognition", 2.5, 4)
+        assert metric["request_id"] == "req-1"
@@ -0,0 +1,175 @@
+import pytest
+import io
+import logging
+import os
+import signal
+import threading
+import time
+
+
+# Held by whichever thread is logging; a worker forked while another thread holds it never gets it
+EMIT_LOCK = threading.Lock()
+
+
+class SlowHandler(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        with EMIT_LOCK:
+            time.sleep(0.002)
+
+
+class Unreadable:
+    """
+    Pickles in the worker but cannot be rebuilt in the parent
+    """
+    def __reduce__(self):
+        return (refuse_to_load, ())
+
+
+def refuse_to_load() -> None:
+    raise ValueError("cannot rebuild result")
+
+
+def unreadable_result() -> Unreadable:
+    return Unreadable()
+
+
+def log_and_return(value: int) -> int:
+    logging.getLogger("cpu-pool-test").warning("rendering %s", value)
+    return value
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestProcessPool:
+    @pytest.fixture
+    def pool(self, lambda_submodule, lambda_module):
+        # lambda_module first, so the forked workers can resolve index functions
+        pool = lambda_submodule("process_pool").PipeProcessPool(2)
+        yield pool
+        pool.shutdown()
+
+    @pytest.mark.parametrize("memory_size, vcpus", [("512", 1), ("1769", 1), ("3008", 2), ("10240", 6)])
+    def test_vcpus_follow_lambda_memory_size(self, lambda_submodule, monkeypatch, memory_size, vcpus):
+        monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", memory_size)
+
+        assert lambda_submodule("process_pool").available_vcpus() == vcpus
+
+    def test_single_vcpu_runs_inline(self, lambda_submodule):
+        process_pool = lambda_submodule("process_pool")
+        executor = process_pool.create_pool(workers=1)
+
+        assert isinstance(executor, process_pool.InlineExecutor)
+        assert executor.submit(os.getpid).result() == os.getpid()
+        with pytest.raises(ValueError):
+            executor.submit(int, "not a number").result()
+
+    def test_tasks_run_in_worker_processes(self, pool):
+        pool.warm()
+        pids = {future.result() for future in [pool.submit(os.getpid) for _ in range(8)]}
+
+        assert os.getpid() not in pids
+        assert 1 <= len(pids) <= 2
+
+    def test_errors_propagate_and_pool_survives(self, pool):
+        with pytest.raises(ValueError):
+            pool.submit(int, "not a number").result()
+
+        assert pool.submit(int, "42").result() == 42
+
+    def test_killed_worker_is_replaced(self, pool):
+        pool.warm()
+        killed = pool._processes[0]
+        os.kill(killed.pid, signal.SIGKILL)
+        killed.join(timeout=5)
+
+        # Tasks routed to the dead worker's slot go to its replacement instead of failing
+        pids = {future.result() for future in [pool.submit(os.getpid) for _ in range(8)]}
+
+        assert killed.pid not in pids
+        assert all(process.is_alive() for process in pool._processes)
+
+    def test_worker_restarts_while_other_threads_log(self, lambda_submodule):
+        test_logger = logging.getLogger("cpu-pool-test")
+        test_logger.addHandler(SlowHandler())
+        test_logger.propagate = False
+        pool = lambda_submodule("process_pool").PipeProcessPool(2)
+        stop = threading.Event()
+
+        def keep_logging() -> None:
+            while not stop.is_set():
+                test_logger.warning("record thread")
+
+        loggers = [threading.Thread(target=keep_logging, daemon=True) for _ in range(4)]
+        try:
+            for thread in loggers:
+                thread.start()
+            pool.warm()
+            killed = pool._processes[0]
+            os.kill(killed.pid, signal.SIGKILL)
+            killed.join(timeout=5)
+
+            # The replacement logs through the same handler, so it must not start with the lock held
+            futures = [pool.submit(log_and_return, i) for i in range(8)]
+
+            assert [future.result(timeout=10) for future in futures] == list(range(8))
+        except BaseException:
+            # A deadlocked worker would otherwise hang shutdown
+            for process in pool._processes:
+                process.kill()
+            raise
+        finally:
+            stop.set()
+            for thread in loggers:
+                thread.join()
+            pool.shutdown()
+            test_logger.handlers.clear()
+            test_logger.propagate = True
+
+    def test_task_that_kills_its_worker_fails_alone(self, pool):
+        pool.warm()
+
+        with pytest.raises(EOFError):
+            pool.submit(os._exit, 1).result()
+
+        assert [future.result() for future in [pool.submit(pow, i, 2) for i in range(8)]] == [i * i for i in range(8)]
+
+    def test_unreadable_result_replaces_its_worker(self, lambda_submodule):
+        pool = lambda_submodule("process_pool").PipeProcessPool(1)
+        try:
+            pool.warm()
+            worker_pid = pool._processes[0].pid
+
+            with pytest.raises(ValueError, match="cannot rebuild result"):
+                pool.submit(unreadable_result).result()
+
+            assert pool._processes[0].pid != worker_pid
+            assert [future.result() for future in [pool.submit(pow, i, 2) for i in range(4)]] == [0, 1, 4, 9]
+        finally:
+            pool.shutdown()
+
+    def test_submit_from_many_threads(self, pool):
+        results = {}
+
+        def submit(i: int) -> None:
+            results[i] = pool.submit(pow, i, 2).result()
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {i: i * i for i in range(16)}
+
+    def test_render_derivatives_in_pool_matches_inline(self, pool, lambda_module):
+        image_module = pytest.importorskip("PIL.Image")
+        buffer = io.BytesIO()
+        image_module.new("RGB", (1600, 1200), (10, 200, 90)).save(buffer, format="JPEG")
+        args = (buffer.getvalue(), [("thumbnail", 256), ("preview", 800)], "JPEG", 80)
+
+        in_pool = pool.submit(lambda_module.render_derivatives, *args).result()
+        inline = lambda_module.render_derivatives(*args)
+
+        assert [(d["name"], d["width"], d["height"]) for d in in_pool] == [("preview", 800, 600), ("thumbnail", 256, 192)]
+        assert [d["body"] for d in in_pool] == [d["body"] for d in inline]
@@ -0,0 +1,141 @@
+import pytest
+import json
+import logging
+import time
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from tests.utils.pipeline_simulator import s3_event_body
+
+
+def profile_summaries(caplog) -> list:
+    prefix = "Profile summary: "
+    return [json.loads(record.getMessage()[len(prefix):]) for record in caplog.records if record.getMessage().startswith(prefix)]
+
+
+def slow_step() -> None:
+    # Long enough for the 2 ms sampler to catch it even on a loaded machine
+    time.sleep(0.25)
+
+
+def slow_image_filter(object_key: str) -> bool:
+    slow_step()
+    return False
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestProfiling:
+    @pytest.fixture
+    def enabled(self, lambda_submodule, monkeypatch, caplog):
+        profiling = lambda_submodule("profiling")
+        monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+        monkeypatch.setattr(profiling, "PROFILING_SAMPLE_RATE", 0.0)
+        monkeypatch.setattr(profiling, "PROFILING_THRESHOLD_MS", 0.0)
+        caplog.set_level(logging.INFO)
+        return profiling
+
+    def test_disabled_returns_handler_unwrapped(self, lambda_submodule, monkeypatch):
+        profiling = lambda_submodule("profiling")
+        monkeypatch.setattr(profiling, "PROFILING_ENABLED", False)
+
+        def handler(event, context):
+            return event
+
+        assert profiling.profiled(handler) is handler
+
+    def test_sampled_invocation_reports_functions_and_memory(self, enabled, monkeypatch, caplog):
+        monkeypatch.setattr(enabled, "PROFILING_SAMPLE_RATE", 1.0)
+        monkeypatch.setattr(enabled, "PROFILING_INTERVAL_MS", 2.0)
+
+        def handler(event, context):
+            # Freed before returning, so only a snapshot taken while they are held shows where they came from
+            buffers = [bytearray(1024 * 1024) for _ in range(4)]
+            time.sleep(0.1)
+            return len(buffers)
+
+        assert enabled.profiled(handler)({}, None) == 4
+
+        [summary] = profile_summaries(caplog)
+        assert summary["mode"] == "sampled"
+        assert any(entry["function"].startswith("handler ") for entry in summary["functions"])
+        assert summary["memory"]["peak_kb"] >= 4096
+        assert summary["memory"]["snapshot_kb"] >= 4096
+        [top_site, *_] = summary["memory"]["top"]
+        assert top_site["site"].startswith("unit/test_lambda_profiling.py:")
+        assert top_site["size_kb"] >= 4096
+
+    def test_only_slow_invocations_are_reported(self, enabled, monkeypatch, caplog):
+        monkeypatch.setattr(enabled, "PROFILING_THRESHOLD_MS", 30.0)
+        monkeypatch.setattr(enabled, "PROFILING_INTERVAL_MS", 2.0)
+
+        enabled.profiled(lambda event, context: None)({}, None)
+        assert profile_summaries(caplog) == []
+
+        enabled.profiled(lambda event, context: slow_step())({}, None)
+
+        [summary] = profile_summaries(caplog)
+        assert summary["mode"] == "slow"
+        assert summary["duration_ms"] >= 30.0
+        assert any(entry["function"].startswith("slow_step ") for entry in summary["stacks"]["top"])
+
+    @pytest.fixture
+    def records_on_executor(self, lambda_module, monkeypatch):
+        """
+        Handler whose records run on the record executor, each spending its time in slow_step
+        """
+        executor = ThreadPoolExecutor(max_workers=2)
+        monkeypatch.setattr(lambda_module, "cpu_pool", SimpleNamespace(workers=2))
+        monkeypatch.setattr(lambda_module, "record_executor", executor)
+        monkeypatch.setattr(lambda_module, "is_image_file", slow_image_filter)
+        event = {"Records": [{"body": s3_event_body("bucket", f"images/img_{n}.jpg")} for n in range(2)]}
+        yield lambda handler: handler(event, None)
+        executor.shutdown()
+
+    def test_slow_invocation_samples_executor_threads(self, enabled, lambda_module, records_on_executor, monkeypatch, caplog):
+        monkeypatch.setattr(enabled, "PROFILING_THRESHOLD_MS", 30.0)
+        monkeypatch.setattr(enabled, "PROFILING_INTERVAL_MS", 2.0)
+
+        records_on_executor(enabled.profiled(lambda_module.lambda_handler))
+
+        [summary] = profile_summaries(caplog)
+        functions = [entry["function"] for entry in summary["stacks"]["top"]]
+        assert any(function.startswith("process_s3_record ") for function in functions)
+        assert any(function.startswith("slow_step ") for function in functions)
+
+    def test_sampled_invocation_profiles_executor_threads(self, enabled, lambda_module, records_on_executor, monkeypatch, caplog):
+        monkeypatch.setattr(enabled, "PROFILING_SAMPLE_RATE", 1.0)
+
+        records_on_executor(enabled.profiled(lambda_module.lambda_handler))
+
+        [summary] = profile_summaries(caplog)
+        slow_steps = [entry for entry in summary["functions"] if entry["function"].startswith("slow_step ")]
+        assert [entry["calls"] for entry in slow_steps] == [2]
+        assert enabled._active_profiles is None
+
+    def test_handler_errors_propagate(self, enabled, monkeypatch, caplog):
+        monkeypatch.setattr(enabled, "PROFILING_SAMPLE_RATE", 1.0)
+
+        def handler(event, context):
+            raise ValueError("bad record")
+
+        with pytest.raises(ValueError):
+            enabled.profiled(handler)({}, None)
+        assert len(profile_summaries(caplog)) == 1
+
+    @pytest.mark.moto("s3")
+    def test_summary_copied_to_s3(self, enabled, aws_region, namespaced, monkeypatch):
+        s3_client = boto3.client("s3", region_name=aws_region)
+        bucket_name = namespaced("profiles-bucket")
+        s3_client.create_bucket(Bucket=bucket_name)
+        monkeypatch.setattr(enabled, "_s3_client", s3_client)
+        monkeypatch.setattr(enabled, "PROFILING_S3_BUCKET", bucket_name)
+        monkeypatch.setattr(enabled, "PROFILING_SAMPLE_RATE", 1.0)
+
+        class Context:
+            aws_request_id = "req-1"
+
+        enabled.profiled(lambda event, context: None)({}, Context())
+
+        [key] = [obj["Key"] for obj in s3_client.list_objects_v2(Bucket=bucket_name)["Contents"]]
+        assert key.startswith("profiles/") and key.endswith("/req-1.json")
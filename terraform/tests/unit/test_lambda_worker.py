@@ -0,0 +1,149 @@
+import pytest
+import threading
+import time
+import boto3
+from collections import Counter
+from tests.utils.aws_standin import FaultProfile
+from tests.utils.pipeline_simulator import s3_event_body
+
+
+BUCKET_NAME = "image-recognition-api-dev-images-000000000000"
+
+
+class RunningWorker:
+    """
+    SqsWorker on a background thread, with the SQS calls it makes counted by operation
+    """
+    def __init__(self, worker_module, queue_url: str, sqs_client, **options):
+        self.calls = Counter()
+        self.visibility_changes = []
+        sqs_client.meta.events.register("before-parameter-build.sqs", self._count)
+        self.worker = worker_module.SqsWorker(queue_url, sqs_client=sqs_client, wait_time_seconds=1, **options)
+        self.thread = threading.Thread(target=self.worker.run)
+
+    def _count(self, model, params, **kwargs):
+        self.calls[model.name] += 1
+        if model.name == "ChangeMessageVisibilityBatch":
+            self.visibility_changes.extend(entry["VisibilityTimeout"] for entry in params["Entries"])
+
+    def __enter__(self) -> "RunningWorker":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.worker.stop()
+        self.thread.join(timeout=10)
+
+    def wait_for(self, condition, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not condition(self.worker) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert condition(self.worker)
+
+
+class TrackingRekognition:
+    """
+    Rekognition stand-in where every call takes `delay` seconds, recording how many overlapped
+    """
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _call(self, response: dict) -> dict:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return response
+
+    def detect_labels(self, **kwargs):
+        return self._call({"Labels": [{"Name": "Person", "Confidence": 99.1}]})
+
+    def detect_moderation_labels(self, **kwargs):
+        return self._call({"ModerationLabels": []})
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+@pytest.mark.moto("sqs")
+class TestSqsWorker:
+    @pytest.fixture
+    def sqs_client(self, aws_region):
+        return boto3.client("sqs", region_name=aws_region)
+
+    @pytest.fixture
+    def queue_url(self, sqs_client, expected_resource_names, namespaced) -> str:
+        return sqs_client.create_queue(QueueName=namespaced(expected_resource_names["sqs_queue"]))["QueueUrl"]
+
+    def send(self, sqs_client, queue_url: str, count: int) -> None:
+        for start in range(0, count, 10):
+            sqs_client.send_message_batch(QueueUrl=queue_url, Entries=[
+                {"Id": str(i), "MessageBody": s3_event_body(BUCKET_NAME, f"images/img_{i}.jpg")}
+                for i in range(start, min(start + 10, count))
+            ])
+
+    def messages_left(self, sqs_client, queue_url: str) -> int:
+        attributes = sqs_client.get_queue_attributes(QueueUrl=queue_url, AttributeNames=["All"])["Attributes"]
+        return int(attributes["ApproximateNumberOfMessages"]) + int(attributes["ApproximateNumberOfMessagesNotVisible"])
+
+    def test_processes_and_batch_deletes(self, lambda_submodule, aws_standin, sqs_client, queue_url):
+        self.send(sqs_client, queue_url, 25)
+
+        with RunningWorker(lambda_submodule("worker"), queue_url, sqs_client, pollers=2, threads=4) as running:
+            running.wait_for(lambda worker: worker.processed == 25)
+
+        assert self.messages_left(sqs_client, queue_url) == 0
+        assert running.calls["DeleteMessage"] == 0
+        assert 3 <= running.calls["DeleteMessageBatch"] <= 25
+        assert aws_standin.calls["dynamodb.UpdateItem"] == 25
+
+    def test_extends_visibility_of_slow_messages(self, lambda_submodule, aws_standin, sqs_client, queue_url):
+        aws_standin.set_fault("rekognition.DetectLabels", FaultProfile(latency_ms=2500))
+        self.send(sqs_client, queue_url, 1)
+
+        with RunningWorker(lambda_submodule("worker"), queue_url, sqs_client, pollers=1, threads=1, visibility_timeout=2) as running:
+            running.wait_for(lambda worker: worker.processed == 1)
+
+        assert running.visibility_changes and set(running.visibility_changes) == {2}
+        # Never redelivered while it was being worked on
+        assert aws_standin.calls["rekognition.DetectLabels"] == 1
+
+    def test_failed_messages_stay_on_the_queue(self, lambda_submodule, aws_standin, sqs_client, queue_url):
+        aws_standin.set_fault("dynamodb.UpdateItem", FaultProfile(error_rate=1.0))
+        self.send(sqs_client, queue_url, 1)
+
+        with RunningWorker(lambda_submodule("worker"), queue_url, sqs_client, pollers=1, threads=1) as running:
+            running.wait_for(lambda worker: worker.failed == 1)
+
+        assert running.calls["DeleteMessageBatch"] == 0
+        assert self.messages_left(sqs_client, queue_url) == 1
+
+    def test_stop_hands_queued_messages_back(self, lambda_submodule, aws_standin, sqs_client, queue_url):
+        aws_standin.set_fault("rekognition.DetectLabels", FaultProfile(latency_ms=500))
+        self.send(sqs_client, queue_url, 5)
+
+        with RunningWorker(lambda_submodule("worker"), queue_url, sqs_client, pollers=1, threads=1) as running:
+            running.wait_for(lambda worker: aws_standin.calls["rekognition.DetectLabels"] >= 1)
+
+        assert not running.thread.is_alive()
+        # The message being processed finishes, the queued ones are visible again right away
+        assert running.worker.processed == 1
+        assert 0 in running.visibility_changes
+        visible = sqs_client.get_queue_attributes(QueueUrl=queue_url, AttributeNames=["ApproximateNumberOfMessages"])
+        assert int(visible["Attributes"]["ApproximateNumberOfMessages"]) == 4
+
+    def test_analysis_scales_with_worker_threads(self, lambda_submodule, lambda_module, aws_standin, sqs_client, queue_url, monkeypatch):
+        rekognition = TrackingRekognition(delay=0.3)
+        monkeypatch.setattr(lambda_module, "rekognition_client", rekognition)
+        monkeypatch.setattr(lambda_module, "ANALYSIS_FEATURES", ["labels", "moderation"])
+        self.send(sqs_client, queue_url, 8)
+
+        with RunningWorker(lambda_submodule("worker"), queue_url, sqs_client, pollers=1, threads=4) as running:
+            running.wait_for(lambda worker: worker.processed == 8)
+
+        # 4 threads x 2 features, more than a fixed 4-thread executor would allow
+        assert rekognition.max_in_flight > 4
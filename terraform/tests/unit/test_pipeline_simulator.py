@@ -0,0 +1,38 @@
+import pytest
+from tests.utils.pipeline_simulator import PipelineSimulator, SimulationConfig, format_report, percentile
+
+
+@pytest.mark.unit
+@pytest.mark.lambda_func
+class TestPipelineSimulator:
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 99) == 0.0
+
+    def test_simulation_processes_every_upload(self):
+        config = SimulationConfig(
+            arrival_rate=40.0,
+            duration_seconds=2.0,
+            batch_size=5,
+            maximum_batching_window_seconds=0.2,
+            concurrency=3,
+            rekognition_latency_ms=50.0,
+            dynamodb_latency_ms=5.0,
+            time_scale=0.5
+        )
+
+        result = PipelineSimulator(config).run()
+
+        assert result.sent > 0
+        assert result.processed == result.sent
+        assert result.failed_batches == 0
+        # Every table and Rekognition call the handler makes must be stubbed, not fail into a logged error
+        assert result.errors_logged == 0
+        assert 1.0 <= result.mean_batch_size <= config.batch_size
+        assert result.queue_lag_p50 <= result.queue_lag_p99
+        assert result.latency_p99 >= result.queue_lag_p99
+        assert result.throughput > 0
+        assert "batch" in format_report([result])
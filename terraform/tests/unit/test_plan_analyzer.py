@@ -0,0 +1,76 @@
+import pytest
+from tests.utils.plan_analyzer import TerraformPlan
+
+
+PLAN = {
+    "format_version": "1.2",
+    "variables": {"environment": {"value": "dev"}},
+    "planned_values": {
+        "root_module": {
+            "resources": [
+                {
+                    "address": "data.aws_caller_identity.current",
+                    "mode": "data",
+                    "type": "aws_caller_identity",
+                    "name": "current",
+                    "values": {}
+                }
+            ],
+            "child_modules": [
+                {
+                    "address": "module.environment",
+                    "resources": [
+                        {
+                            "address": "module.environment.aws_sqs_queue.image_processing",
+                            "mode": "managed",
+                            "type": "aws_sqs_queue",
+                            "name": "image_processing",
+                            "values": {"visibility_timeout_seconds": 900}
+                        },
+                        {
+                            "address": "module.environment.aws_sqs_queue.image_processing_dlq",
+                            "mode": "managed",
+                            "type": "aws_sqs_queue",
+                            "name": "image_processing_dlq",
+                            "values": {}
+                        }
+                    ]
+                }
+            ]
+        }
+    },
+    "resource_changes": [
+        {
+            "address": "module.environment.aws_sqs_queue.image_processing",
+            "change": {"actions": ["create"], "after_unknown": {"arn": True}}
+        }
+    ]
+}
+
+
+@pytest.mark.unit
+class TestTerraformPlan:
+    def test_indexes_managed_resources_in_child_modules(self):
+        plan = TerraformPlan(PLAN)
+
+        assert len(plan) == 2
+        assert plan.variables["environment"] == "dev"
+        assert "data.aws_caller_identity.current" not in plan
+        assert [queue.name for queue in plan.by_type("aws_sqs_queue")] == ["image_processing", "image_processing_dlq"]
+
+    def test_lookup_by_name_and_address(self):
+        plan = TerraformPlan(PLAN)
+
+        queue = plan.get("aws_sqs_queue", "image_processing", module_address="module.environment")
+        assert queue is plan.by_address("module.environment.aws_sqs_queue.image_processing")
+        assert queue.values["visibility_timeout_seconds"] == 900
+        assert queue.actions == ["create"]
+        assert queue.unknown_values == {"arn": True}
+
+    def test_missing_resource_raises_key_error(self):
+        plan = TerraformPlan(PLAN)
+
+        with pytest.raises(KeyError):
+            plan.get("aws_lambda_function", "image_recognition")
+        with pytest.raises(KeyError):
+            plan.by_address("module.application.aws_lambda_function.image_recognition")
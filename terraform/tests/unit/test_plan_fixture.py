@@ -0,0 +1,56 @@
+import pytest
+import glob
+import json
+import os
+from tests.fixtures.terraform_plan import PLANS_DIR
+from tests.utils.plan_analyzer import TerraformPlan
+
+pytest.importorskip("hcl2")
+from tests.utils.hcl_config import EnvironmentConfig, plan_mismatches, policy_statement_ids  # noqa: E402
+
+
+TERRAFORM_DIR = os.path.dirname(os.path.dirname(os.path.dirname(PLANS_DIR)))
+PLAN_FIXTURES = sorted(glob.glob(os.path.join(PLANS_DIR, "tf-*.json")))
+
+
+@pytest.fixture(params=PLAN_FIXTURES, ids=lambda path: os.path.basename(path))
+def fixture_and_config(request):
+    environment_dir = os.path.join(TERRAFORM_DIR, os.path.splitext(os.path.basename(request.param))[0])
+    return TerraformPlan.from_file(request.param), EnvironmentConfig(environment_dir)
+
+
+@pytest.mark.unit
+class TestPlanFixture:
+    """
+    The committed plan stands in for `terraform plan`, so it must not drift from the HCL it was generated from
+    """
+    def test_fixture_resources_are_declared(self, fixture_and_config):
+        plan, config = fixture_and_config
+
+        undeclared = [
+            resource.address for resource in plan.resources
+            if config.module(resource.module_address).resource(resource.type, resource.name) is None
+        ]
+
+        assert undeclared == []
+
+    def test_fixture_values_match_hcl(self, fixture_and_config):
+        plan, config = fixture_and_config
+        mismatches = []
+
+        for resource in plan.resources:
+            module = config.module(resource.module_address)
+            body = module.resource(resource.type, resource.name)
+            if body is not None:
+                mismatches.extend(f"{resource.address}: {mismatch}" for mismatch in plan_mismatches(module, body, resource.values))
+
+        assert mismatches == []
+
+    def test_policy_statements_match_hcl(self, fixture_and_config):
+        plan, config = fixture_and_config
+
+        for resource in plan.by_type("aws_iam_policy"):
+            body = config.module(resource.module_address).resource(resource.type, resource.name)
+            statements = json.loads(resource.values["policy"])["Statement"]
+
+            assert [statement.get("Sid") for statement in statements] == policy_statement_ids(body["policy"])
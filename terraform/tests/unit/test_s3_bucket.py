@@ -1,6 +1,5 @@
 import pytest
 import boto3
-from moto import mock_s3
 from tests.utils.aws_helpers import AWSResourceHelper
 
 
@@ -17,16 +16,16 @@ class TestS3Bucket:
         assert terraform_outputs["s3_bucket_name"] is not None
         assert len(terraform_outputs["s3_bucket_name"]) > 0
         
-    @mock_s3
-    def test_s3_bucket_configuration(self, terraform_environment, aws_region, expected_resource_names):
+    @pytest.mark.moto("s3")
+    def test_s3_bucket_configuration(self, terraform_environment, aws_region, expected_resource_names, namespaced):
         s3_client = boto3.client('s3', region_name=aws_region)
         helper = AWSResourceHelper(environment=terraform_environment, region=aws_region)
 
-        bucket_name = f"{expected_resource_names['s3_bucket']}-test123"
-        s3_client.create_bucket(
-            Bucket=bucket_name,
-            CreateBucketConfiguration={'LocationConstraint': aws_region} if aws_region != 'us-east-1' else {}
-        )
+        bucket_name = namespaced(f"{expected_resource_names['s3_bucket']}-test123", max_length=63)
+        create_kwargs = {'Bucket': bucket_name}
+        if aws_region != 'us-east-1':
+            create_kwargs['CreateBucketConfiguration'] = {'LocationConstraint': aws_region}
+        s3_client.create_bucket(**create_kwargs)
 
         s3_client.put_bucket_versioning(
             Bucket=bucket_name,
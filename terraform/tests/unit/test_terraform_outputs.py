@@ -0,0 +1,148 @@
+import pytest
+import json
+import os
+import subprocess
+import boto3
+from tests.fixtures.terraform_outputs import load_terraform_outputs, mock_outputs, read_terraform_outputs, state_fingerprint
+
+
+TERRAFORM_OUTPUT_JSON = json.dumps({
+    "s3_bucket_name": {"value": "image-recognition-api-dev-images-abc123", "type": "string"},
+    "dynamodb_table_name": {"value": "image-recognition-api-dev-table", "type": "string"}
+})
+
+
+@pytest.fixture
+def terraform_calls(monkeypatch):
+    calls = []
+
+    def fake_run(args, **kwargs):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout=TERRAFORM_OUTPUT_JSON, stderr="")
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    return calls
+
+
+@pytest.fixture
+def terraform_dir(tmp_path):
+    env_dir = tmp_path / "tf-dev"
+    env_dir.mkdir()
+    (env_dir / "terraform.tfstate").write_text('{"serial": 1}')
+    return env_dir
+
+
+def write_backend(env_dir, backend_type, config):
+    (env_dir / ".terraform").mkdir()
+    (env_dir / ".terraform" / "terraform.tfstate").write_text(json.dumps({
+        "version": 3,
+        "backend": {"type": backend_type, "config": config}
+    }))
+
+
+@pytest.mark.unit
+class TestTerraformOutputsCache:
+    def test_outputs_are_cached_until_state_changes(self, terraform_dir, terraform_calls, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+
+        first = read_terraform_outputs(str(terraform_dir), cache_dir=cache_dir)
+        second = read_terraform_outputs(str(terraform_dir), cache_dir=cache_dir)
+
+        assert first == second
+        assert first["dynamodb_table_name"] == "image-recognition-api-dev-table"
+        assert len(terraform_calls) == 1
+
+        (terraform_dir / "terraform.tfstate").write_text('{"serial": 2}')
+        read_terraform_outputs(str(terraform_dir), cache_dir=cache_dir)
+
+        assert len(terraform_calls) == 2
+
+    def test_outputs_are_not_cached_without_state(self, tmp_path, terraform_calls):
+        env_dir = tmp_path / "tf-qa"
+        env_dir.mkdir()
+        cache_dir = tmp_path / "cache"
+
+        assert state_fingerprint(str(env_dir)) is None
+
+        read_terraform_outputs(str(env_dir), cache_dir=str(cache_dir))
+        read_terraform_outputs(str(env_dir), cache_dir=str(cache_dir))
+
+        assert len(terraform_calls) == 2
+        assert not cache_dir.exists()
+
+    def test_cache_is_keyed_by_environment_directory(self, tmp_path, terraform_calls):
+        cache_dir = str(tmp_path / "cache")
+        for env in ("tf-dev", "tf-qa"):
+            env_dir = tmp_path / env
+            env_dir.mkdir()
+            (env_dir / "terraform.tfstate").write_text('{"serial": 1}')
+            read_terraform_outputs(str(env_dir), cache_dir=cache_dir)
+
+        assert len(terraform_calls) == 2
+        assert len(os.listdir(cache_dir)) == 2
+
+    @pytest.mark.moto("s3")
+    def test_s3_backend_cache_follows_remote_state(self, tmp_path, terraform_calls):
+        env_dir = tmp_path / "tf-dev"
+        env_dir.mkdir()
+        cache_dir = str(tmp_path / "cache")
+        write_backend(env_dir, "s3", {
+            "bucket": "state-bucket",
+            "key": "state/dev/terraform.tfstate",
+            "region": "us-east-1"
+        })
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket="state-bucket")
+        s3_client.put_object(Bucket="state-bucket", Key="state/dev/terraform.tfstate", Body=b'{"serial": 1}')
+
+        read_terraform_outputs(str(env_dir), cache_dir=cache_dir)
+        read_terraform_outputs(str(env_dir), cache_dir=cache_dir)
+
+        assert len(terraform_calls) == 1
+
+        # An apply only rewrites the remote object; the local files stay the same
+        s3_client.put_object(Bucket="state-bucket", Key="state/dev/terraform.tfstate", Body=b'{"serial": 2}')
+        read_terraform_outputs(str(env_dir), cache_dir=cache_dir)
+
+        assert len(terraform_calls) == 2
+
+    @pytest.mark.moto("s3")
+    def test_s3_backend_uses_workspace_state_key(self, tmp_path, monkeypatch):
+        env_dir = tmp_path / "tf-dev"
+        env_dir.mkdir()
+        write_backend(env_dir, "s3", {"bucket": "state-bucket", "key": "terraform.tfstate", "region": "us-east-1"})
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket="state-bucket")
+        s3_client.put_object(Bucket="state-bucket", Key="env:/feature/terraform.tfstate", Body=b"{}")
+
+        assert state_fingerprint(str(env_dir)) is None
+
+        monkeypatch.setenv("TF_WORKSPACE", "feature")
+
+        assert state_fingerprint(str(env_dir)).startswith("s3://state-bucket/env:/feature/terraform.tfstate:")
+
+    def test_other_remote_backends_are_not_cached(self, tmp_path, terraform_calls):
+        env_dir = tmp_path / "tf-dev"
+        env_dir.mkdir()
+        cache_dir = tmp_path / "cache"
+        write_backend(env_dir, "remote", {"organization": "example"})
+
+        assert state_fingerprint(str(env_dir)) is None
+
+        read_terraform_outputs(str(env_dir), cache_dir=str(cache_dir))
+        read_terraform_outputs(str(env_dir), cache_dir=str(cache_dir))
+
+        assert len(terraform_calls) == 2
+        assert not cache_dir.exists()
+
+    def test_missing_environment_uses_mock_outputs(self, tmp_path, terraform_calls):
+        outputs = load_terraform_outputs(str(tmp_path / "tf-qa"), "qa", cache_dir=str(tmp_path / "cache"))
+
+        assert outputs == mock_outputs("qa")
+        assert terraform_calls == []
+
+    def test_existing_environment_runs_terraform(self, terraform_dir, terraform_calls, tmp_path):
+        outputs = load_terraform_outputs(str(terraform_dir), "dev", cache_dir=str(tmp_path / "cache"))
+
+        assert outputs["dynamodb_table_name"] == "image-recognition-api-dev-table"
+        assert len(terraform_calls) == 1
@@ -0,0 +1,238 @@
+"""
+Latency- and fault-injecting stand-in for the AWS calls the recognition Lambda makes.
+
+Clients built (or attached) through `AwsStandIn` never reach the network: a
+`before-send` hook answers Rekognition DetectLabels, DynamoDB UpdateItem/PutItem and
+S3 GetObject/PutObject from deterministic fixtures after the request has been serialized
+and signed. The response then goes through botocore's real parser and retry
+handler, so injected throttles are retried with backoff exactly as in AWS, and
+the cost of boto3 serialization stays in any timing.
+
+Every call first sleeps for a latency sampled from the operation's
+`FaultProfile`. It then fails with the throttle code at `throttle_rate`, or
+with `error_code` at `error_rate`, and otherwise returns the fixture. All
+randomness comes from one seeded generator, so a run is reproducible for a
+given seed and call order.
+
+Clients make a single attempt by default, so every injected fault surfaces. With
+max_attempts > 1 they use botocore's standard retry mode and its real jittered
+backoff, which is not covered by the seed.
+"""
+import json
+import math
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+
+
+# Error returned for throttled calls, by service
+THROTTLE_ERRORS = {
+    "rekognition": ("ThrottlingException", 400),
+    "dynamodb": ("ProvisionedThroughputExceededException", 400),
+    "s3": ("SlowDown", 503),
+}
+
+DEFAULT_LABELS = [
+    {"Name": "Person", "Confidence": 99.12},
+    {"Name": "Outdoors", "Confidence": 87.5},
+]
+
+
+@dataclass
+class FaultProfile:
+    latency_ms: float = 0.0
+    latency_jitter: float = 0.0
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    error_code: str = "InternalServerError"
+    error_status: int = 500
+
+
+class _RawResponse(BytesIO):
+    def stream(self, **kwargs):
+        contents = self.read()
+        while contents:
+            yield contents
+            contents = self.read()
+
+
+class AwsStandIn:
+    def __init__(
+        self,
+        seed: int = 0,
+        labels: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        default_labels: Optional[List[Dict[str, Any]]] = None,
+        objects: Optional[Dict[Tuple[str, str], bytes]] = None,
+        max_attempts: int = 1,
+    ):
+        self.labels = dict(labels or {})
+        self.default_labels = DEFAULT_LABELS if default_labels is None else default_labels
+        self.objects = dict(objects or {})
+        self.max_attempts = max_attempts
+        self.faults: Dict[str, FaultProfile] = {}
+        self.calls: Counter = Counter()
+        self.injected: Counter = Counter()
+        self.requests: List[Tuple[str, Dict[str, Any]]] = []
+        self._dynamodb_resources: Dict[str, Any] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def set_fault(self, operation: str, profile: FaultProfile) -> None:
+        """
+        Configure latency and faults for "service.Operation", e.g. "rekognition.DetectLabels"
+        """
+        self.faults[operation] = profile
+
+    def attach(self, client):
+        # First in line, ahead of moto's own before-send hook when a mock is active
+        client.meta.events.register_first("before-send", self._before_send)
+        return client
+
+    def client(self, service_name: str, region_name: str = "us-east-1"):
+        return self.attach(boto3.client(
+            service_name,
+            region_name=region_name,
+            endpoint_url=f"https://{service_name}.standin.local",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+            config=Config(
+                retries={"mode": "standard", "total_max_attempts": self.max_attempts},
+                s3={"addressing_style": "path"}
+            )
+        ))
+
+    def table(self, table_name: str, region_name: str = "us-east-1"):
+        """
+        DynamoDB Table resource whose calls are answered by the stand-in; tables share one client per region,
+        like the handler's
+        """
+        dynamodb = self._dynamodb_resources.get(region_name)
+        if dynamodb is None:
+            dynamodb = boto3.resource(
+                "dynamodb",
+                region_name=region_name,
+                endpoint_url="https://dynamodb.standin.local",
+                aws_access_key_id="testing",
+                aws_secret_access_key="testing",
+                config=Config(retries={"mode": "standard", "total_max_attempts": self.max_attempts})
+            )
+            self.attach(dynamodb.meta.client)
+            self._dynamodb_resources[region_name] = dynamodb
+        return dynamodb.Table(table_name)
+
+    def _before_send(self, request, event_name: str, **kwargs) -> AWSResponse:
+        _, service_id, operation_name = event_name.split(".", 2)
+        operation = f"{service_id}.{operation_name}"
+        profile = self.faults.get(operation, FaultProfile())
+
+        with self._lock:
+            self.calls[operation] += 1
+            latency_ms = self._sample_latency(profile)
+            roll = self._rng.random()
+
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000.0)
+
+        if roll < profile.throttle_rate:
+            code, status = THROTTLE_ERRORS.get(service_id, ("ThrottlingException", 400))
+            return self._inject(request, service_id, operation, code, status)
+        if roll < profile.throttle_rate + profile.error_rate:
+            return self._inject(request, service_id, operation, profile.error_code, profile.error_status)
+
+        handler = getattr(self, f"_{service_id}_{operation_name}".replace("-", "_"), None)
+        if handler is None:
+            return self._error(request, service_id, "StandInNotImplemented", 501, f"{operation} is not served by the stand-in")
+        return handler(request)
+
+    def _sample_latency(self, profile: FaultProfile) -> float:
+        if profile.latency_ms <= 0:
+            return 0.0
+        if profile.latency_jitter <= 0:
+            return profile.latency_ms
+        return self._rng.lognormvariate(0.0, profile.latency_jitter) * profile.latency_ms
+
+    def _inject(self, request, service_id: str, operation: str, code: str, status: int) -> AWSResponse:
+        with self._lock:
+            self.injected[(operation, code)] += 1
+        return self._error(request, service_id, code, status, "Injected by the stand-in")
+
+    def _json(self, request, status: int, payload: Dict[str, Any]) -> AWSResponse:
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/x-amz-json-1.1", "Content-Length": str(len(body))}
+        return AWSResponse(request.url, status, headers, _RawResponse(body))
+
+    def _error(self, request, service_id: str, code: str, status: int, message: str) -> AWSResponse:
+        if service_id != "s3":
+            return self._json(request, status, {"__type": code, "message": message})
+
+        body = f"<Error><Code>{code}</Code><Message>{message}</Message></Error>".encode("utf-8")
+        headers = {"Content-Type": "application/xml", "Content-Length": str(len(body))}
+        return AWSResponse(request.url, status, headers, _RawResponse(body))
+
+    def _record(self, operation: str, params: Dict[str, Any]) -> None:
+        with self._lock:
+            self.requests.append((operation, params))
+
+    def _rekognition_DetectLabels(self, request) -> AWSResponse:
+        params = json.loads(request.body)
+        self._record("rekognition.DetectLabels", params)
+        object_name = params["Image"].get("S3Object", {}).get("Name")
+        labels = self.labels.get(object_name, self.default_labels)
+
+        max_labels = params.get("MaxLabels", len(labels))
+        min_confidence = params.get("MinConfidence", 0.0)
+        matching = [label for label in labels if label["Confidence"] >= min_confidence][:max_labels]
+        return self._json(request, 200, {"Labels": matching, "LabelModelVersion": "3.0"})
+
+    def _dynamodb_UpdateItem(self, request) -> AWSResponse:
+        return self._dynamodb_write(request, "dynamodb.UpdateItem")
+
+    def _dynamodb_PutItem(self, request) -> AWSResponse:
+        return self._dynamodb_write(request, "dynamodb.PutItem")
+
+    def _dynamodb_write(self, request, operation: str) -> AWSResponse:
+        params = json.loads(request.body)
+        self._record(operation, params)
+        if params.get("ReturnConsumedCapacity", "NONE") == "NONE":
+            return self._json(request, 200, {})
+
+        # One write unit per started KB of request, a stand-in for the item size
+        units = float(max(1, math.ceil(len(request.body) / 1024)))
+        return self._json(request, 200, {"ConsumedCapacity": {"TableName": params["TableName"], "CapacityUnits": units}})
+
+    def _s3_PutObject(self, request) -> AWSResponse:
+        path = urllib.parse.urlsplit(request.url).path
+        bucket_name, _, key = path.lstrip("/").partition("/")
+        key = urllib.parse.unquote(key)
+        self._record("s3.PutObject", {"Bucket": bucket_name, "Key": key})
+
+        body = request.body.read() if hasattr(request.body, "read") else (request.body or b"")
+        with self._lock:
+            self.objects[(bucket_name, key)] = bytes(body)
+        return AWSResponse(request.url, 200, {"ETag": '"0123456789abcdef"', "Content-Length": "0"}, _RawResponse(b""))
+
+    def _s3_GetObject(self, request) -> AWSResponse:
+        path = urllib.parse.urlsplit(request.url).path
+        bucket_name, _, key = path.lstrip("/").partition("/")
+        key = urllib.parse.unquote(key)
+        self._record("s3.GetObject", {"Bucket": bucket_name, "Key": key})
+
+        if (bucket_name, key) not in self.objects:
+            return self._error(request, "s3", "NoSuchKey", 404, "The specified key does not exist.")
+
+        body = self.objects[(bucket_name, key)]
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(len(body)),
+            "ETag": '"0123456789abcdef"',
+        }
+        return AWSResponse(request.url, 200, headers, _RawResponse(body))
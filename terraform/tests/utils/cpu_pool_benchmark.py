@@ -0,0 +1,207 @@
+"""
+Benchmark the recognition Lambda's CPU pool against inline execution per Lambda memory size.
+
+Lambda grants one vCPU per 1,769 MB, so each memory size is emulated by pinning
+this process (and the pool's forked workers) to that many CPUs with
+sched_setaffinity and setting AWS_LAMBDA_FUNCTION_MEMORY_SIZE so the pool sizes
+itself as it would in Lambda. Memory sizes that need more CPUs than this
+machine has are capped and marked.
+
+Two workloads:
+
+- render: `render_derivatives` on a synthetic JPEG, submitted from several
+  threads like the SQS worker does
+- handler: the Lambda path itself, `lambda_handler` on SQS batches of
+  `--batch-size` records with derivatives enabled, against the AWS stand-in
+  with `--aws-latency-ms` per call
+
+Run from the terraform directory (Linux, needs Pillow):
+
+    python -m tests.utils.cpu_pool_benchmark --memory-sizes 512,1769,3538,5307,10240 --images 48
+    python -m tests.utils.cpu_pool_benchmark --workload handler --images 40 --batch-size 10
+"""
+import argparse
+import io
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from tests.utils.aws_standin import AwsStandIn, FaultProfile
+from tests.utils.lambda_loader import load_lambda_module
+from tests.utils.pipeline_simulator import s3_event_body
+
+
+BUCKET_NAME = "image-recognition-api-dev-images-000000000000"
+
+
+@dataclass
+class BenchmarkResult:
+    memory_size: int
+    vcpus: int
+    capped: bool
+    inline_seconds: float
+    pool_seconds: float
+
+    @property
+    def speedup(self) -> float:
+        return self.inline_seconds / self.pool_seconds if self.pool_seconds else 0.0
+
+
+def synthetic_jpeg(width: int, height: int) -> bytes:
+    from PIL import Image
+
+    image = Image.effect_mandelbrot((width, height), (-2.0, -1.2, 1.0, 1.2), 100).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _run(executor, handler, data: bytes, images: int, threads: int) -> float:
+    task = (data, handler.DERIVATIVE_SIZES, handler.DERIVATIVE_FORMAT, handler.DERIVATIVE_QUALITY)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as callers:
+        futures = [
+            callers.submit(lambda: executor.submit(handler.render_derivatives, *task).result())
+            for _ in range(images)
+        ]
+        for future in futures:
+            future.result()
+    return time.perf_counter() - started
+
+
+class HandlerWorkload:
+    """
+    Runs `lambda_handler` over SQS batches, with the handler's AWS clients answered by the stand-in
+    """
+    PATCHED = ("rekognition_client", "s3_client", "table", "feed_table", "DERIVATIVES_ENABLED", "cpu_pool", "record_executor")
+
+    def __init__(self, handler, data: bytes, batch_size: int, aws_latency_ms: float):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.standin = AwsStandIn()
+        for operation in ("rekognition.DetectLabels", "s3.GetObject", "s3.PutObject", "dynamodb.UpdateItem", "dynamodb.PutItem"):
+            self.standin.set_fault(operation, FaultProfile(latency_ms=aws_latency_ms))
+        self.data = data
+        self._saved = {}
+
+    def install(self) -> None:
+        self._saved = {name: getattr(self.handler, name) for name in self.PATCHED}
+        self.handler.rekognition_client = self.standin.client("rekognition")
+        self.handler.s3_client = self.standin.client("s3")
+        self.handler.table = self.standin.table("image-recognition-api-dev-table")
+        self.handler.feed_table = self.standin.table("image-recognition-api-dev-completion-feed")
+        self.handler.DERIVATIVES_ENABLED = True
+
+    def restore(self) -> None:
+        for name, value in self._saved.items():
+            setattr(self.handler, name, value)
+
+    def run(self, executor, images: int) -> float:
+        self.handler.cpu_pool = executor
+        self.handler.record_executor = ThreadPoolExecutor(max_workers=max(1, 2 * executor.workers))
+        object_keys = [f"images/img_{i}.jpg" for i in range(images)]
+        for object_key in object_keys:
+            self.standin.objects[(BUCKET_NAME, object_key)] = self.data
+
+        started = time.perf_counter()
+        try:
+            for start in range(0, images, self.batch_size):
+                response = self.handler.lambda_handler({"Records": [
+                    {"messageId": object_key, "body": s3_event_body(BUCKET_NAME, object_key)}
+                    for object_key in object_keys[start:start + self.batch_size]
+                ]}, None)
+                # Failed records are reported, not raised; timing a batch that failed would flatter it
+                if response["batchItemFailures"]:
+                    raise RuntimeError(f"Records failed: {response['batchItemFailures']}")
+        finally:
+            self.handler.record_executor.shutdown()
+        return time.perf_counter() - started
+
+
+def benchmark(memory_sizes: Sequence[int], images: int, threads: int, width: int, height: int,
+              workload: str = "render", batch_size: int = 10, aws_latency_ms: float = 100.0) -> List[BenchmarkResult]:
+    handler = load_lambda_module()
+    pool_module = load_lambda_module("process_pool")
+    data = synthetic_jpeg(width, height)
+    handler_workload = HandlerWorkload(handler, data, batch_size, aws_latency_ms) if workload == "handler" else None
+    all_cpus = sorted(os.sched_getaffinity(0))
+    results = []
+
+    def run(executor) -> float:
+        if handler_workload is not None:
+            return handler_workload.run(executor, images)
+        return _run(executor, handler, data, images, threads)
+
+    # The handler logs every record at INFO
+    root_logger = logging.getLogger()
+    log_level = root_logger.level
+    root_logger.setLevel(logging.WARNING)
+    if handler_workload is not None:
+        handler_workload.install()
+
+    try:
+        for memory_size in memory_sizes:
+            wanted = max(1, -(-memory_size // pool_module.LAMBDA_MB_PER_VCPU))
+            cpus = all_cpus[:wanted]
+            os.sched_setaffinity(0, cpus)
+            os.environ["AWS_LAMBDA_FUNCTION_MEMORY_SIZE"] = str(memory_size)
+
+            inline_seconds = run(pool_module.InlineExecutor())
+            pool = pool_module.create_pool()
+            try:
+                pool_seconds = run(pool)
+            finally:
+                pool.shutdown()
+
+            results.append(BenchmarkResult(memory_size, len(cpus), len(cpus) < wanted, inline_seconds, pool_seconds))
+    finally:
+        if handler_workload is not None:
+            handler_workload.restore()
+        root_logger.setLevel(log_level)
+        os.sched_setaffinity(0, all_cpus)
+        os.environ.pop("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", None)
+
+    return results
+
+
+def format_report(results: Sequence[BenchmarkResult], images: int) -> str:
+    lines = [
+        f"{'memory':>7} {'vcpus':>6} {'inline s':>9} {'pool s':>8} {'img/s':>7} {'speedup':>8}",
+        "-" * 50,
+    ]
+    for result in results:
+        vcpus = f"{result.vcpus}{'*' if result.capped else ''}"
+        lines.append(
+            f"{result.memory_size:>7} {vcpus:>6} {result.inline_seconds:>9.2f} {result.pool_seconds:>8.2f} "
+            f"{images / result.pool_seconds:>7.1f} {result.speedup:>7.2f}x"
+        )
+    if any(result.capped for result in results):
+        lines.append("* capped at the CPUs available on this machine")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Lambda CPU pool per memory size")
+    parser.add_argument("--workload", choices=("render", "handler"), default="render")
+    parser.add_argument("--memory-sizes", default="512,1769,3538,5307,7076,10240")
+    parser.add_argument("--images", type=int, default=48)
+    parser.add_argument("--threads", type=int, default=8, help="Threads submitting work, like the SQS worker's")
+    parser.add_argument("--batch-size", type=int, default=10, help="SQS records per invocation, handler workload")
+    parser.add_argument("--aws-latency-ms", type=float, default=100.0, help="Stand-in latency per AWS call, handler workload")
+    parser.add_argument("--width", type=int, default=3000)
+    parser.add_argument("--height", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    memory_sizes = [int(size) for size in args.memory_sizes.split(",") if size.strip()]
+    results = benchmark(
+        memory_sizes, args.images, args.threads, args.width, args.height,
+        workload=args.workload, batch_size=args.batch_size, aws_latency_ms=args.aws_latency_ms
+    )
+    print(format_report(results, args.images))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Terraform configuration read straight from the HCL, to check the committed plan fixture against it.
+
+Only values Terraform knows before apply are resolved: literals, variables
+(module arguments, the environment's terraform.tfvars and variable defaults),
+literal locals, and tostring() or string templates of those. Anything else,
+e.g. another resource's attribute or jsonencode(), resolves to UNRESOLVED and
+is left out of comparisons.
+
+Needs python-hcl2 (tests/requirements.txt).
+"""
+import glob
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import hcl2
+
+
+# Sentinel for values that are only known after apply or need more than this evaluator supports
+UNRESOLVED = object()
+
+# Resource arguments that are Terraform meta-arguments rather than provider attributes
+META_ARGUMENTS = {"count", "for_each", "depends_on", "lifecycle", "provider", "provisioner", "dynamic"}
+
+INTERPOLATION = re.compile(r"\$\{([^{}]*)\}")
+VARIABLE = re.compile(r"^var\.(\w+)$")
+LOCAL = re.compile(r"^local\.(\w+)$")
+TOSTRING = re.compile(r"^tostring\((.+)\)$")
+
+
+def _unquote(name: str) -> str:
+    return name[1:-1] if len(name) >= 2 and name.startswith('"') and name.endswith('"') else name
+
+
+def _load_dir(directory: str) -> List[Dict[str, Any]]:
+    documents = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.tf"))):
+        with open(path, "r") as f:
+            documents.append(hcl2.load(f))
+    return documents
+
+
+def is_block_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) and item.get("__is_block__") for item in value)
+
+
+def _to_string(value: Any) -> Any:
+    if value is UNRESOLVED or isinstance(value, (list, dict)) or value is None:
+        return UNRESOLVED
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class Resolver:
+    """
+    Evaluates hcl2 attribute values against known variables and locals
+    """
+    def __init__(self, variables: Optional[Dict[str, Any]] = None, local_values: Optional[Dict[str, Any]] = None):
+        self.variables: Dict[str, Any] = dict(variables or {})
+        self.locals: Dict[str, Any] = dict(local_values or {})
+
+    def resolve(self, value: Any) -> Any:
+        """
+        Python value of an HCL attribute as hcl2 returns it, or UNRESOLVED
+        """
+        if value is UNRESOLVED or value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, list):
+            items = [self.resolve(item) for item in value]
+            return UNRESOLVED if any(item is UNRESOLVED for item in items) else items
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items() if not key.startswith("__")}
+        if isinstance(value, str):
+            return self._resolve_template(_unquote(value) if value.startswith('"') else value)
+        return UNRESOLVED
+
+    def _resolve_template(self, template: str) -> Any:
+        whole = INTERPOLATION.fullmatch(template)
+        if whole:
+            # A lone interpolation keeps its type, like in Terraform
+            return self._resolve_expression(whole.group(1))
+
+        parts = []
+        position = 0
+        for match in INTERPOLATION.finditer(template):
+            parts.append(template[position:match.start()])
+            parts.append(_to_string(self._resolve_expression(match.group(1))))
+            position = match.end()
+        parts.append(template[position:])
+
+        # Nested braces, e.g. jsonencode({...}), are left in the text
+        if any(part is UNRESOLVED for part in parts) or "${" in "".join(part for part in parts if part is not UNRESOLVED):
+            return UNRESOLVED
+        return "".join(parts).replace('\\"', '"')
+
+    def _resolve_expression(self, expression: str) -> Any:
+        expression = expression.strip()
+
+        match = VARIABLE.match(expression)
+        if match:
+            return self.variables.get(match.group(1), UNRESOLVED)
+
+        match = LOCAL.match(expression)
+        if match:
+            return self.resolve(self.locals[match.group(1)]) if match.group(1) in self.locals else UNRESOLVED
+
+        match = TOSTRING.match(expression)
+        if match:
+            return _to_string(self._resolve_expression(match.group(1)))
+
+        return UNRESOLVED
+
+
+class ModuleConfig(Resolver):
+    """
+    Resources, locals and resolved input variables of one module
+    """
+    def __init__(self, module_dir: str, inputs: Dict[str, Any]):
+        super().__init__()
+        self.module_dir = module_dir
+        self.resources: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        defaults: Dict[str, Any] = {}
+
+        for document in _load_dir(module_dir):
+            for block in document.get("resource", []):
+                for resource_type, named in block.items():
+                    for name, body in named.items():
+                        self.resources[(_unquote(resource_type), _unquote(name))] = body
+            for block in document.get("locals", []):
+                self.locals.update({key: value for key, value in block.items() if not key.startswith("__")})
+            for block in document.get("variable", []):
+                for name, body in block.items():
+                    defaults[_unquote(name)] = body.get("default", UNRESOLVED)
+
+        # Defaults only hold literals, so they resolve before any variable is known
+        for name, default in defaults.items():
+            self.variables[name] = inputs[name] if name in inputs else self.resolve(default)
+
+    def resource(self, resource_type: str, name: str) -> Optional[Dict[str, Any]]:
+        return self.resources.get((resource_type, name))
+
+
+class EnvironmentConfig:
+    """
+    An environment directory (e.g. tf-dev) and the modules it calls, by plan module address
+    """
+    def __init__(self, environment_dir: str):
+        tfvars_path = os.path.join(environment_dir, "terraform.tfvars")
+        tfvars = {}
+        if os.path.isfile(tfvars_path):
+            with open(tfvars_path, "r") as f:
+                tfvars = hcl2.load(f)
+
+        root_inputs = {key: Resolver().resolve(value) for key, value in tfvars.items() if not key.startswith("__")}
+        self.root = ModuleConfig(environment_dir, root_inputs)
+        self.modules: Dict[Optional[str], ModuleConfig] = {None: self.root}
+
+        for document in _load_dir(environment_dir):
+            for block in document.get("module", []):
+                for name, body in block.items():
+                    arguments = {
+                        key: self.root.resolve(value) for key, value in body.items()
+                        if not key.startswith("__") and key not in ("source", "providers", "depends_on")
+                    }
+                    module_dir = os.path.normpath(os.path.join(environment_dir, self.root.resolve(body["source"])))
+                    self.modules[f"module.{_unquote(name)}"] = ModuleConfig(
+                        module_dir, {key: value for key, value in arguments.items() if value is not UNRESOLVED}
+                    )
+
+    def module(self, module_address: Optional[str]) -> ModuleConfig:
+        return self.modules[module_address]
+
+
+def plan_mismatches(module: Resolver, body: Dict[str, Any], values: Dict[str, Any], path: str = "") -> List[str]:
+    """
+    Differences between an HCL resource body and a plan's values for it; attributes the plan leaves out are skipped
+
+    Nested blocks match in any order, since the plan renders set-typed blocks sorted. Maps must have the same keys.
+    """
+    mismatches = []
+    for key, hcl_value in body.items():
+        if key.startswith("__") or key in META_ARGUMENTS or key not in values:
+            continue
+        plan_value = values[key]
+        where = f"{path}{key}"
+
+        if is_block_list(hcl_value):
+            if not isinstance(plan_value, list) or len(plan_value) != len(hcl_value):
+                count = len(plan_value) if isinstance(plan_value, list) else plan_value
+                mismatches.append(f"{where}: {len(hcl_value)} blocks in HCL, {count} in the plan")
+                continue
+            for index, block in enumerate(hcl_value):
+                candidates = [plan_mismatches(module, block, planned, f"{where}[{index}].") for planned in plan_value]
+                if all(candidates):
+                    mismatches.extend(candidates[index])
+        elif isinstance(hcl_value, dict):
+            if not isinstance(plan_value, dict):
+                mismatches.append(f"{where}: a map in HCL, {plan_value!r} in the plan")
+                continue
+            hcl_keys = {name for name in hcl_value if not name.startswith("__")}
+            if hcl_keys != set(plan_value):
+                mismatches.append(
+                    f"{where}: only in HCL {sorted(hcl_keys - set(plan_value))}, only in the plan {sorted(set(plan_value) - hcl_keys)}"
+                )
+                continue
+            for name, item in module.resolve(hcl_value).items():
+                if item is not UNRESOLVED and item != plan_value[name]:
+                    mismatches.append(f"{where}.{name}: {item!r} in HCL, {plan_value[name]!r} in the plan")
+        else:
+            resolved = module.resolve(hcl_value)
+            if resolved is not UNRESOLVED and resolved != plan_value:
+                mismatches.append(f"{where}: {resolved!r} in HCL, {plan_value!r} in the plan")
+    return mismatches
+
+
+def policy_statement_ids(hcl_value: Any) -> List[str]:
+    """
+    Sids of a jsonencode() policy in the order written, which this evaluator cannot otherwise resolve
+    """
+    return re.findall(r'\bSid\s*=\s*"([^"]+)"', hcl_value) if isinstance(hcl_value, str) else []
@@ -0,0 +1,23 @@
+import importlib
+import os
+import sys
+from types import ModuleType
+
+
+# Source directory that Terraform zips into the recognition Lambda
+LAMBDA_SOURCE_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "modules", "tf-application", "lambda")
+)
+
+
+def load_lambda_module(module_name: str = "index") -> ModuleType:
+    """
+    Import a module from the Lambda source directory the way the Lambda runtime would
+    """
+    # The handler creates boto3 clients at import time, which needs a region
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    if LAMBDA_SOURCE_DIR not in sys.path:
+        sys.path.insert(0, LAMBDA_SOURCE_DIR)
+
+    return importlib.import_module(module_name)
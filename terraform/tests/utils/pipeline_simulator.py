@@ -0,0 +1,467 @@
+"""
+Closed-loop simulator for the SQS -> Lambda recognition pipeline.
+
+Synthetic S3 upload events are pushed into a moto SQS queue at a target arrival
+rate, polled in batches with the event source mapping's batching semantics and
+handed to the real `lambda_handler` by N concurrent "containers". Rekognition
+and DynamoDB are replaced by stubs that sleep for a sampled latency.
+
+All times are in simulated seconds; `time_scale` is the number of wall-clock
+seconds one simulated second takes. moto's own SQS overhead (roughly 10 ms of
+CPU per received message) is comparable to real SQS latency at scales near 1.0
+and inflates results at very small scales.
+
+Run from the terraform directory:
+
+    python -m tests.utils.pipeline_simulator --batch-sizes 1,5,10 --windows 0,1,5 --concurrency 1,5,10
+"""
+import argparse
+import itertools
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import boto3
+from moto import mock_sqs
+
+from tests.utils.lambda_loader import load_lambda_module
+
+
+@dataclass
+class SimulationConfig:
+    arrival_rate: float = 20.0
+    duration_seconds: float = 60.0
+    batch_size: int = 10
+    maximum_batching_window_seconds: float = 5.0
+    concurrency: int = 5
+    function_timeout_seconds: float = 300.0
+    rekognition_latency_ms: float = 400.0
+    dynamodb_latency_ms: float = 15.0
+    analysis_features: Tuple[str, ...] = ("labels",)
+    latency_jitter: float = 0.5
+    poll_interval_seconds: float = 0.1
+    time_scale: float = 0.5
+    drain_timeout_seconds: float = 600.0
+    seed: int = 42
+
+
+@dataclass
+class SimulationResult:
+    config: SimulationConfig
+    sent: int
+    processed: int
+    failed_batches: int
+    timed_out_batches: int
+    elapsed_seconds: float
+    throughput: float
+    mean_batch_size: float
+    queue_lag_p50: float
+    queue_lag_p99: float
+    latency_p50: float
+    latency_p99: float
+    errors_logged: int
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile, 0.0 for an empty sample
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LatencyModel:
+    """
+    Log-normal latency with the given mean, slept in scaled wall-clock time
+    """
+
+    def __init__(self, mean_ms: float, jitter: float, time_scale: float, rng: random.Random):
+        self.sigma = jitter
+        self.mu = math.log(max(mean_ms, 0.001)) - jitter ** 2 / 2
+        self.time_scale = time_scale
+        self.rng = rng
+        self._lock = threading.Lock()
+
+    def sleep(self) -> None:
+        with self._lock:
+            latency_ms = self.rng.lognormvariate(self.mu, self.sigma)
+        time.sleep(latency_ms / 1000.0 * self.time_scale)
+
+
+class SimulatedRekognition:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def detect_labels(self, **kwargs) -> Dict[str, Any]:
+        self.latency.sleep()
+        return {
+            "Labels": [
+                {"Name": "Person", "Confidence": 99.12},
+                {"Name": "Outdoors", "Confidence": 87.5},
+            ]
+        }
+
+    def detect_moderation_labels(self, **kwargs) -> Dict[str, Any]:
+        self.latency.sleep()
+        return {"ModerationLabels": []}
+
+    def detect_text(self, **kwargs) -> Dict[str, Any]:
+        self.latency.sleep()
+        return {"TextDetections": [{"DetectedText": "EXIT", "Type": "LINE", "Confidence": 98.4}]}
+
+    def detect_faces(self, **kwargs) -> Dict[str, Any]:
+        self.latency.sleep()
+        return {
+            "FaceDetails": [
+                {"Confidence": 99.9, "BoundingBox": {"Width": 0.2, "Height": 0.3, "Left": 0.4, "Top": 0.1}}
+            ]
+        }
+
+
+class SimulatedTable:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def update_item(self, **kwargs) -> Dict[str, Any]:
+        self.latency.sleep()
+        return {"Attributes": {}}
+
+    def put_item(self, **kwargs) -> Dict[str, Any]:
+        self.latency.sleep()
+        return {}
+
+
+class ErrorCounter(logging.Handler):
+    """
+    Counts the error records the handler logs; stub gaps show up here instead of in the throughput numbers
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+        self.first_message: Optional[str] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+        if self.first_message is None:
+            self.first_message = record.getMessage()
+
+
+def s3_event_body(bucket_name: str, object_key: str, size: int = 204800) -> str:
+    """
+    Raw-delivery S3 ObjectCreated notification as it arrives on the queue
+    """
+    return json.dumps({
+        "Records": [
+            {
+                "eventSource": "aws:s3",
+                "eventName": "ObjectCreated:Put",
+                "s3": {
+                    "bucket": {"name": bucket_name},
+                    "object": {"key": object_key, "size": size, "eTag": uuid.uuid4().hex}
+                }
+            }
+        ]
+    })
+
+
+class PipelineSimulator:
+    def __init__(self, config: SimulationConfig, sqs_client=None, handler_module=None):
+        self.config = config
+        self.sqs_client = sqs_client
+        self.handler_module = handler_module
+
+        self._lock = threading.Lock()
+        self._sent_at: Dict[str, float] = {}
+        self._completed: Dict[str, float] = {}
+        self._queue_lags: List[float] = []
+        self._batch_sizes: List[int] = []
+        self._failed_batches = 0
+        self._timed_out_batches = 0
+        self._producer_done = threading.Event()
+        self._stop = threading.Event()
+
+    def _to_wall(self, seconds: float) -> float:
+        return seconds * self.config.time_scale
+
+    def _to_sim(self, seconds: float) -> float:
+        return seconds / self.config.time_scale
+
+    def run(self) -> SimulationResult:
+        if self.sqs_client is not None:
+            return self._run(self.sqs_client)
+
+        with mock_sqs():
+            return self._run(boto3.client("sqs", region_name="us-east-1"))
+
+    def _run(self, sqs_client) -> SimulationResult:
+        handler = self.handler_module or load_lambda_module()
+        rng = random.Random(self.config.seed)
+        original_clients = (handler.rekognition_client, handler.table, handler.feed_table)
+        original_features = handler.ANALYSIS_FEATURES
+        handler_logger = logging.getLogger()
+        original_level = handler_logger.level
+        errors = ErrorCounter()
+
+        queue_url = sqs_client.create_queue(QueueName=f"pipeline-sim-{uuid.uuid4().hex[:8]}")["QueueUrl"]
+
+        handler.rekognition_client = SimulatedRekognition(
+            LatencyModel(self.config.rekognition_latency_ms, self.config.latency_jitter, self.config.time_scale, rng)
+        )
+        handler.table = SimulatedTable(
+            LatencyModel(self.config.dynamodb_latency_ms, self.config.latency_jitter, self.config.time_scale, rng)
+        )
+        handler.feed_table = SimulatedTable(
+            LatencyModel(self.config.dynamodb_latency_ms, self.config.latency_jitter, self.config.time_scale, rng)
+        )
+        handler.ANALYSIS_FEATURES = list(self.config.analysis_features)
+        handler_logger.setLevel(logging.WARNING)
+        handler_logger.addHandler(errors)
+
+        try:
+            started = time.monotonic()
+            producer = threading.Thread(target=self._produce, args=(sqs_client, queue_url, rng), daemon=True)
+            containers = [
+                threading.Thread(target=self._container, args=(sqs_client, queue_url, handler), daemon=True)
+                for _ in range(self.config.concurrency)
+            ]
+
+            producer.start()
+            for container in containers:
+                container.start()
+
+            producer.join()
+            drain_deadline = time.monotonic() + self._to_wall(self.config.drain_timeout_seconds)
+            while self._outstanding() > 0 and time.monotonic() < drain_deadline:
+                time.sleep(0.01)
+
+            self._stop.set()
+            for container in containers:
+                container.join()
+            elapsed = self._to_sim(time.monotonic() - started)
+        finally:
+            handler.rekognition_client, handler.table, handler.feed_table = original_clients
+            handler.ANALYSIS_FEATURES = original_features
+            handler_logger.setLevel(original_level)
+            handler_logger.removeHandler(errors)
+            sqs_client.delete_queue(QueueUrl=queue_url)
+
+        latencies = [self._to_sim(done - self._sent_at[image_id]) for image_id, done in self._completed.items()]
+        return SimulationResult(
+            config=self.config,
+            sent=len(self._sent_at),
+            processed=len(self._completed),
+            failed_batches=self._failed_batches,
+            timed_out_batches=self._timed_out_batches,
+            elapsed_seconds=elapsed,
+            throughput=len(self._completed) / elapsed if elapsed else 0.0,
+            mean_batch_size=sum(self._batch_sizes) / len(self._batch_sizes) if self._batch_sizes else 0.0,
+            queue_lag_p50=percentile(self._queue_lags, 50),
+            queue_lag_p99=percentile(self._queue_lags, 99),
+            latency_p50=percentile(latencies, 50),
+            latency_p99=percentile(latencies, 99),
+            errors_logged=errors.count
+        )
+
+    def _outstanding(self) -> int:
+        with self._lock:
+            return len(self._sent_at) - len(self._completed)
+
+    def _produce(self, sqs_client, queue_url: str, rng: random.Random) -> None:
+        """
+        Send Poisson-distributed uploads at arrival_rate for duration_seconds
+        """
+        started = time.monotonic()
+        next_send = 0.0
+        count = 0
+
+        while True:
+            with self._lock:
+                next_send += rng.expovariate(self.config.arrival_rate)
+            if next_send > self.config.duration_seconds:
+                break
+
+            delay = started + self._to_wall(next_send) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            image_id = f"img_{count:013d}"
+            with self._lock:
+                self._sent_at[image_id] = time.monotonic()
+            sqs_client.send_message(QueueUrl=queue_url, MessageBody=s3_event_body("pipeline-sim", f"images/{image_id}.jpg"))
+            count += 1
+
+        self._producer_done.set()
+
+    def _collect_batch(self, sqs_client, queue_url: str) -> List[Dict[str, Any]]:
+        """
+        Poll until batch_size messages arrived or the batching window closed, like the event source mapping
+        """
+        deadline = time.monotonic() + self._to_wall(self.config.maximum_batching_window_seconds)
+        messages: List[Dict[str, Any]] = []
+
+        while len(messages) < self.config.batch_size and not self._stop.is_set():
+            response = sqs_client.receive_message(
+                QueueUrl=queue_url,
+                MaxNumberOfMessages=min(10, self.config.batch_size - len(messages)),
+                WaitTimeSeconds=0
+            )
+            received = response.get("Messages", [])
+            messages.extend(received)
+
+            if time.monotonic() >= deadline:
+                break
+            if not received:
+                # Stand-in for long polling: wait a poll interval instead of spinning on an empty queue
+                time.sleep(min(self._to_wall(self.config.poll_interval_seconds), max(deadline - time.monotonic(), 0)))
+
+        return messages
+
+    def _container(self, sqs_client, queue_url: str, handler) -> None:
+        while not self._stop.is_set():
+            messages = self._collect_batch(sqs_client, queue_url)
+            if not messages:
+                time.sleep(self._to_wall(self.config.poll_interval_seconds))
+                continue
+
+            invoked_at = time.monotonic()
+            image_ids = [json.loads(message["Body"])["Records"][0]["s3"]["object"]["key"].split("/")[-1].split(".")[0]
+                         for message in messages]
+            with self._lock:
+                self._batch_sizes.append(len(messages))
+                self._queue_lags.extend(self._to_sim(invoked_at - self._sent_at[image_id]) for image_id in image_ids)
+
+            event = {
+                "Records": [
+                    {
+                        "messageId": message["MessageId"],
+                        "receiptHandle": message["ReceiptHandle"],
+                        "body": message["Body"],
+                        "eventSource": "aws:sqs"
+                    }
+                    for message in messages
+                ]
+            }
+
+            try:
+                response = handler.lambda_handler(event, None)
+            except Exception:
+                with self._lock:
+                    self._failed_batches += 1
+                # Make the batch visible again right away instead of waiting out the visibility timeout
+                for message in messages:
+                    sqs_client.change_message_visibility(
+                        QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"], VisibilityTimeout=0
+                    )
+                continue
+
+            finished_at = time.monotonic()
+            # ReportBatchItemFailures: the listed messages stay on the queue, the rest are deleted
+            retried = {failure["itemIdentifier"] for failure in response.get("batchItemFailures", [])}
+            done = [(image_id, message) for image_id, message in zip(image_ids, messages)
+                    if message["MessageId"] not in retried]
+            for message in messages:
+                if message["MessageId"] in retried:
+                    sqs_client.change_message_visibility(
+                        QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"], VisibilityTimeout=0
+                    )
+            if done:
+                sqs_client.delete_message_batch(
+                    QueueUrl=queue_url,
+                    Entries=[
+                        {"Id": str(index), "ReceiptHandle": message["ReceiptHandle"]}
+                        for index, (_, message) in enumerate(done)
+                    ]
+                )
+
+            with self._lock:
+                if self._to_sim(finished_at - invoked_at) > self.config.function_timeout_seconds:
+                    self._timed_out_batches += 1
+                for image_id, _ in done:
+                    self._completed.setdefault(image_id, finished_at)
+
+
+def run_sweep(base_config: SimulationConfig,
+              batch_sizes: Sequence[int],
+              windows: Sequence[float],
+              concurrencies: Sequence[int],
+              handler_module=None) -> List[SimulationResult]:
+    results = []
+    for batch_size, window, concurrency in itertools.product(batch_sizes, windows, concurrencies):
+        config = replace(
+            base_config,
+            batch_size=batch_size,
+            maximum_batching_window_seconds=window,
+            concurrency=concurrency
+        )
+        results.append(PipelineSimulator(config, handler_module=handler_module).run())
+    return results
+
+
+def format_report(results: Sequence[SimulationResult]) -> str:
+    header = (
+        f"{'batch':>5} {'window':>6} {'conc':>4} {'sent':>6} {'done':>6} {'fail':>4} {'thru/s':>8} "
+        f"{'avg batch':>9} {'lag p50':>8} {'lag p99':>8} {'e2e p50':>8} {'e2e p99':>8} {'errors':>6}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        config = result.config
+        lines.append(
+            f"{config.batch_size:>5} {config.maximum_batching_window_seconds:>6.1f} {config.concurrency:>4} "
+            f"{result.sent:>6} {result.processed:>6} {result.failed_batches + result.timed_out_batches:>4} "
+            f"{result.throughput:>8.2f} {result.mean_batch_size:>9.2f} "
+            f"{result.queue_lag_p50:>8.2f} {result.queue_lag_p99:>8.2f} "
+            f"{result.latency_p50:>8.2f} {result.latency_p99:>8.2f} {result.errors_logged:>6}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_list(value: str, cast) -> List[Any]:
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    defaults = SimulationConfig()
+    parser = argparse.ArgumentParser(description="Simulate the SQS -> Lambda recognition pipeline")
+    parser.add_argument("--arrival-rate", type=float, default=defaults.arrival_rate, help="Uploads per second")
+    parser.add_argument("--duration", type=float, default=defaults.duration_seconds, help="Simulated seconds of arrivals")
+    parser.add_argument("--batch-sizes", default=str(defaults.batch_size))
+    parser.add_argument("--windows", default=str(defaults.maximum_batching_window_seconds))
+    parser.add_argument("--concurrency", default=str(defaults.concurrency))
+    parser.add_argument("--rekognition-latency-ms", type=float, default=defaults.rekognition_latency_ms)
+    parser.add_argument("--dynamodb-latency-ms", type=float, default=defaults.dynamodb_latency_ms)
+    parser.add_argument("--analysis-features", default=",".join(defaults.analysis_features))
+    parser.add_argument("--time-scale", type=float, default=defaults.time_scale)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    base_config = replace(
+        defaults,
+        arrival_rate=args.arrival_rate,
+        duration_seconds=args.duration,
+        rekognition_latency_ms=args.rekognition_latency_ms,
+        dynamodb_latency_ms=args.dynamodb_latency_ms,
+        analysis_features=tuple(_parse_list(args.analysis_features, str.strip)),
+        time_scale=args.time_scale,
+        seed=args.seed
+    )
+    results = run_sweep(
+        base_config,
+        _parse_list(args.batch_sizes, int),
+        _parse_list(args.windows, float),
+        _parse_list(args.concurrency, int)
+    )
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
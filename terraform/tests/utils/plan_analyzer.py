@@ -0,0 +1,122 @@
+import json
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Iterator
+
+
+@dataclass
+class PlanResource:
+    address: str
+    type: str
+    name: str
+    module_address: Optional[str] = None
+    values: Dict[str, Any] = field(default_factory=dict)
+    unknown_values: Dict[str, Any] = field(default_factory=dict)
+    actions: List[str] = field(default_factory=list)
+
+    def block(self, name: str) -> Dict[str, Any]:
+        """
+        Return the single nested block `name` (Terraform renders blocks as one-element lists)
+        """
+        blocks = self.values.get(name) or [{}]
+        return blocks[0]
+
+    def policy_actions(self, attribute: str = "policy") -> List[str]:
+        """
+        Flatten the actions of a JSON policy document attribute
+        """
+        document = json.loads(self.values[attribute])
+        actions: List[str] = []
+        for statement in document.get("Statement", []):
+            statement_actions = statement.get("Action", [])
+            if isinstance(statement_actions, str):
+                statement_actions = [statement_actions]
+            actions.extend(statement_actions)
+        return actions
+
+
+class TerraformPlan:
+    """
+    Indexed resource graph built from `terraform show -json` output
+    """
+
+    def __init__(self, plan: Dict[str, Any]):
+        self.format_version = plan.get("format_version")
+        self.terraform_version = plan.get("terraform_version")
+        self.variables = {key: value.get("value") for key, value in plan.get("variables", {}).items()}
+
+        self._by_address: Dict[str, PlanResource] = {}
+        self._by_type: Dict[str, List[PlanResource]] = {}
+
+        changes = {change["address"]: change for change in plan.get("resource_changes", [])}
+        root_module = plan.get("planned_values", {}).get("root_module", {})
+        for resource in self._walk_module(root_module, changes):
+            self._by_address[resource.address] = resource
+            self._by_type.setdefault(resource.type, []).append(resource)
+
+    @classmethod
+    def from_file(cls, path: str) -> "TerraformPlan":
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_plan_file(cls, plan_file: str, terraform_dir: str) -> "TerraformPlan":
+        result = subprocess.run(
+            ["terraform", "show", "-json", plan_file],
+            cwd=terraform_dir,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return cls(json.loads(result.stdout))
+
+    def _walk_module(self, module: Dict[str, Any], changes: Dict[str, Any]) -> Iterator[PlanResource]:
+        for resource in module.get("resources", []):
+            if resource.get("mode", "managed") != "managed":
+                continue
+
+            change = changes.get(resource["address"], {}).get("change", {})
+            yield PlanResource(
+                address=resource["address"],
+                type=resource["type"],
+                name=resource["name"],
+                module_address=module.get("address"),
+                values=resource.get("values", {}),
+                unknown_values=change.get("after_unknown", {}),
+                actions=change.get("actions", [])
+            )
+
+        for child_module in module.get("child_modules", []):
+            yield from self._walk_module(child_module, changes)
+
+    def __len__(self) -> int:
+        return len(self._by_address)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._by_address
+
+    @property
+    def resources(self) -> List[PlanResource]:
+        return list(self._by_address.values())
+
+    def by_address(self, address: str) -> PlanResource:
+        try:
+            return self._by_address[address]
+        except KeyError:
+            raise KeyError(f"Resource {address} not found in plan")
+
+    def by_type(self, resource_type: str) -> List[PlanResource]:
+        return list(self._by_type.get(resource_type, []))
+
+    def get(self, resource_type: str, name: str, module_address: Optional[str] = None) -> PlanResource:
+        matches = [
+            resource for resource in self._by_type.get(resource_type, [])
+            if resource.name == name and (module_address is None or resource.module_address == module_address)
+        ]
+
+        if not matches:
+            raise KeyError(f"Resource {resource_type}.{name} not found in plan")
+        if len(matches) > 1:
+            addresses = ", ".join(resource.address for resource in matches)
+            raise KeyError(f"Resource {resource_type}.{name} is ambiguous: {addresses}")
+        return matches[0]
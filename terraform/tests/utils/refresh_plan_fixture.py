@@ -0,0 +1,57 @@
+"""
+Regenerate the committed plan fixture from Terraform instead of editing it by hand.
+
+Runs `terraform plan -out` in tf-<environment> and writes `terraform show -json`
+of that plan to tests/fixtures/plans/tf-<environment>.json. Needs the
+environment initialized (`terraform init`) and AWS credentials that can read
+its state and data sources.
+
+Run from the terraform directory:
+
+    python -m tests.utils.refresh_plan_fixture --environment dev
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+from typing import Optional, Sequence
+
+from tests.fixtures.terraform_plan import PLANS_DIR
+
+
+TERRAFORM_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _terraform(args: Sequence[str], cwd: str) -> str:
+    result = subprocess.run(["terraform", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def refresh_plan_fixture(environment: str) -> str:
+    """
+    Plan tf-<environment> and write its JSON rendering to the fixture, returns the fixture's path
+    """
+    environment_dir = os.path.join(TERRAFORM_DIR, f"tf-{environment}")
+    fixture_path = os.path.join(PLANS_DIR, f"tf-{environment}.json")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plan_file = os.path.join(tmp_dir, "tfplan")
+        _terraform(["plan", "-input=false", "-lock=false", f"-out={plan_file}"], environment_dir)
+        plan = json.loads(_terraform(["show", "-json", plan_file], environment_dir))
+
+    with open(fixture_path, "w") as f:
+        f.write(json.dumps(plan, indent=2) + "\n")
+    return fixture_path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Regenerate tests/fixtures/plans/tf-<env>.json from terraform plan")
+    parser.add_argument("--environment", default=os.getenv("TF_ENVIRONMENT", "dev"))
+    args = parser.parse_args(argv)
+
+    print(f"Wrote {refresh_plan_fixture(args.environment)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -45,15 +45,17 @@ module "application" {
   aws_region   = var.aws_region
   project_name = var.project_name
 
-  vpc_id                   = module.environment.vpc_id
-  public_subnet_ids        = module.environment.public_subnet_ids
-  private_subnet_ids       = module.environment.private_subnet_ids
-  s3_bucket_arn            = module.environment.s3_bucket_arn
-  sns_topic_arn            = module.environment.sns_topic_arn
-  sqs_queue_arn            = module.environment.sqs_queue_arn
-  dynamodb_table_name      = module.environment.dynamodb_table_name
-  dynamodb_table_arn       = module.environment.dynamodb_table_arn
-  lambda_security_group_id = module.environment.lambda_security_group_id
+  vpc_id                     = module.environment.vpc_id
+  public_subnet_ids          = module.environment.public_subnet_ids
+  private_subnet_ids         = module.environment.private_subnet_ids
+  s3_bucket_arn              = module.environment.s3_bucket_arn
+  sns_topic_arn              = module.environment.sns_topic_arn
+  sqs_queue_arn              = module.environment.sqs_queue_arn
+  dynamodb_table_name        = module.environment.dynamodb_table_name
+  dynamodb_table_arn         = module.environment.dynamodb_table_arn
+  completion_feed_table_name = module.environment.completion_feed_table_name
+  completion_feed_table_arn  = module.environment.completion_feed_table_arn
+  lambda_security_group_id   = module.environment.lambda_security_group_id
 }
 
 # ===================================================================